@@ -0,0 +1,46 @@
+"""add dashboard snapshots
+
+Revision ID: 3f6b2a9d1c47
+Revises: 9c11762ea17a
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f6b2a9d1c47'
+down_revision: Union[str, Sequence[str], None] = '9c11762ea17a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'dashboard_snapshots',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_properties_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_floors_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_appliance_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('appliances_expiring_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('computed_on', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_dashboard_snapshots_id'), 'dashboard_snapshots', ['id'], unique=False)
+    op.create_index(op.f('ix_dashboard_snapshots_user_id'), 'dashboard_snapshots', ['user_id'], unique=True)
+    # Rows are filled lazily on the next dashboard load, or in bulk with
+    # `python rebuild_dashboard_snapshots.py`.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_dashboard_snapshots_user_id'), table_name='dashboard_snapshots')
+    op.drop_index(op.f('ix_dashboard_snapshots_id'), table_name='dashboard_snapshots')
+    op.drop_table('dashboard_snapshots')
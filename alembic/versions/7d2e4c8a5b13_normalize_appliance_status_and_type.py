@@ -0,0 +1,85 @@
+"""normalize appliance status and add appliance_type
+
+Revision ID: 7d2e4c8a5b13
+Revises: 3f6b2a9d1c47
+Create Date: 2026-10-17 11:40:02.553817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4c8a5b13'
+down_revision: Union[str, Sequence[str], None] = '3f6b2a9d1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _derive_appliance_type(name):
+    # Same rule as app.crud.derive_appliance_type, copied so the migration stays frozen
+    main_type = name.split(" Front")[0].strip() if name else ""
+    return main_type or "Unknown"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    op.add_column('appliances', sa.Column('appliance_type', sa.String(length=100), nullable=True))
+
+    # Backfill appliance_type in id-ordered batches
+    appliances = sa.table(
+        'appliances',
+        sa.column('id', sa.Integer),
+        sa.column('name', sa.String),
+        sa.column('appliance_type', sa.String),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(appliances.c.id, appliances.c.name)
+            .where(appliances.c.id > last_id)
+            .order_by(appliances.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            appliances.update()
+            .where(appliances.c.id == sa.bindparam('b_id'))
+            .values(appliance_type=sa.bindparam('b_type')),
+            [{'b_id': row.id, 'b_type': _derive_appliance_type(row.name)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    # Collapse free-form statuses onto the enum member names
+    op.execute(
+        """
+        UPDATE appliances SET status = CASE lower(trim(status))
+            WHEN 'working' THEN 'working'
+            WHEN 'warranty expired' THEN 'warranty_expired'
+            WHEN 'warranty_expired' THEN 'warranty_expired'
+            ELSE 'not_working'
+        END
+        """
+    )
+
+    if bind.dialect.name == 'postgresql':
+        appliance_status_enum = sa.Enum('working', 'not_working', 'warranty_expired', name='appliancestatus')
+        appliance_status_enum.create(bind, checkfirst=True)
+        op.execute(
+            "ALTER TABLE appliances ALTER COLUMN status TYPE appliancestatus USING status::text::appliancestatus"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("ALTER TABLE appliances ALTER COLUMN status TYPE VARCHAR(50) USING status::text")
+        sa.Enum(name='appliancestatus').drop(bind, checkfirst=True)
+    op.drop_column('appliances', 'appliance_type')
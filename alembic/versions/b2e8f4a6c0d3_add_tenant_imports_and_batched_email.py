@@ -0,0 +1,57 @@
+"""add tenant imports and batched email outbox columns
+
+Revision ID: b2e8f4a6c0d3
+Revises: a7d3e9c1f5b8
+Create Date: 2026-10-18 01:26:48.114095
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8f4a6c0d3'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e9c1f5b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tenant_imports',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total_rows', sa.Integer(), nullable=False),
+        sa.Column('invited', sa.Integer(), nullable=False),
+        sa.Column('skipped_existing', sa.Integer(), nullable=False),
+        sa.Column('duplicates', sa.Integer(), nullable=False),
+        sa.Column('invalid', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tenant_imports_id'), 'tenant_imports', ['id'], unique=False)
+    op.create_index(op.f('ix_tenant_imports_owner_id'), 'tenant_imports', ['owner_id'], unique=False)
+
+    op.add_column('email_outbox', sa.Column('batch_key', sa.String(length=64), nullable=True))
+    op.add_column('email_outbox', sa.Column('params', sa.Text(), nullable=True))
+    op.create_index(op.f('ix_email_outbox_batch_key'), 'email_outbox', ['batch_key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_email_outbox_batch_key'), table_name='email_outbox')
+    with op.batch_alter_table('email_outbox') as batch_op:
+        batch_op.drop_column('params')
+        batch_op.drop_column('batch_key')
+
+    op.drop_index(op.f('ix_tenant_imports_owner_id'), table_name='tenant_imports')
+    op.drop_index(op.f('ix_tenant_imports_id'), table_name='tenant_imports')
+    op.drop_table('tenant_imports')
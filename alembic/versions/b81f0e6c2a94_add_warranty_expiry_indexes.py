@@ -0,0 +1,30 @@
+"""add warranty expiry indexes
+
+Revision ID: b81f0e6c2a94
+Revises: 7d2e4c8a5b13
+Create Date: 2026-10-17 14:05:27.310946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f0e6c2a94'
+down_revision: Union[str, Sequence[str], None] = '7d2e4c8a5b13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_appliances_warranty_expiry'), 'appliances', ['warranty_expiry'], unique=False)
+    op.create_index('ix_appliances_property_warranty_expiry', 'appliances', ['property_id', 'warranty_expiry'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appliances_property_warranty_expiry', table_name='appliances')
+    op.drop_index(op.f('ix_appliances_warranty_expiry'), table_name='appliances')
@@ -0,0 +1,54 @@
+"""add hot path composite indexes
+
+Revision ID: c5a9e1d7f302
+Revises: b81f0e6c2a94
+Create Date: 2026-10-17 16:20:41.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a9e1d7f302'
+down_revision: Union[str, Sequence[str], None] = 'b81f0e6c2a94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns) -- see benchmarks/explain_hot_queries.py for the queries each one serves
+INDEXES = [
+    ('ix_appliances_property_id_floor_id', 'appliances', ['property_id', 'floor_id']),
+    ('ix_issues_vendor_id_status', 'issues', ['vendor_id', 'status']),
+    ('ix_issues_property_id', 'issues', ['property_id']),
+    ('ix_tenant_queries_reported_by_id', 'tenant_queries', ['reported_by_id']),
+    ('ix_activity_logs_timestamp', 'activity_logs', ['timestamp']),
+    ('ix_users_role_property_id', 'users', ['role', 'property_id']),
+    ('ix_floors_property_id_floor_number', 'floors', ['property_id', 'floor_number']),
+    ('ix_properties_owner_id', 'properties', ['owner_id']),
+    ('ix_properties_manager_id', 'properties', ['manager_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction; it avoids locking writes on live tables
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in reversed(INDEXES):
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
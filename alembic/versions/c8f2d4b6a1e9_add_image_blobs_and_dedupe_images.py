@@ -0,0 +1,123 @@
+"""add content-addressed image blobs and dedupe existing images
+
+Revision ID: c8f2d4b6a1e9
+Revises: b2e8f4a6c0d3
+Create Date: 2026-10-18 03:12:40.527316
+
+"""
+import hashlib
+import os
+import shutil
+from collections import Counter
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8f2d4b6a1e9'
+down_revision: Union[str, Sequence[str], None] = 'b2e8f4a6c0d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The directory app.uploads writes images to; IMAGE_STORE_DIR overrides it (e.g. a mounted volume)
+IMAGE_DIR = os.getenv("IMAGE_STORE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "app", "static", "images"
+)
+
+image_blobs = sa.table(
+    'image_blobs',
+    sa.column('sha256'), sa.column('filename'), sa.column('size'),
+    sa.column('ref_count'), sa.column('created_at'), sa.column('updated_at'),
+)
+# Tables and columns that hold an image filename
+IMAGE_REFERENCES = (
+    (sa.table('appliances', sa.column('front_image'), sa.column('detail_image')), ('front_image', 'detail_image')),
+    (sa.table('appliance_images', sa.column('image_path')), ('image_path',)),
+)
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dedupe_images(conn) -> None:
+    """
+    Give every file in the image directory its content-hash name (one file per
+    distinct content), point the image columns at the new names and record the
+    blobs with their reference counts. Old names are removed last, so a failure
+    before that leaves every existing reference working.
+    """
+    if not os.path.isdir(IMAGE_DIR):
+        return
+    renamed, blobs = {}, {}  # old name -> blob filename; sha256 -> (blob filename, size)
+    for name in sorted(os.listdir(IMAGE_DIR)):
+        path = os.path.join(IMAGE_DIR, name)
+        if name.startswith('.') or not os.path.isfile(path):
+            continue
+        sha256 = _sha256(path)
+        if sha256 not in blobs:
+            blob = f"{sha256}{os.path.splitext(name)[1].lower()}"
+            blob_path = os.path.join(IMAGE_DIR, blob)
+            if not os.path.exists(blob_path):
+                try:
+                    os.link(path, blob_path)
+                except OSError:
+                    shutil.copy2(path, blob_path)
+            blobs[sha256] = (blob, os.path.getsize(path))
+        renamed[name] = blobs[sha256][0]
+
+    refs = Counter()
+    for table, columns in IMAGE_REFERENCES:
+        for column in columns:
+            col = table.c[column]
+            for old, count in conn.execute(sa.select(col, sa.func.count()).where(col.isnot(None)).group_by(col)).all():
+                if old not in renamed:
+                    continue  # file is missing; leave the reference as it is
+                if renamed[old] != old:
+                    conn.execute(sa.update(table).where(col == old).values({column: renamed[old]}))
+                refs[renamed[old]] += count
+
+    now = datetime.utcnow()
+    if blobs:
+        op.bulk_insert(image_blobs, [
+            {'sha256': sha256, 'filename': blob, 'size': size, 'ref_count': refs[blob],
+             'created_at': now, 'updated_at': now}
+            for sha256, (blob, size) in blobs.items()
+        ])
+    for old, blob in renamed.items():
+        if old != blob:
+            os.unlink(os.path.join(IMAGE_DIR, old))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'image_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('sha256'),
+        sa.UniqueConstraint('filename')
+    )
+    op.create_index('ix_image_blobs_ref_count_updated_at', 'image_blobs', ['ref_count', 'updated_at'], unique=False)
+
+    _dedupe_images(op.get_bind())
+
+
+def downgrade() -> None:
+    """
+    Downgrade schema. Files keep their content-hash names, which the image
+    columns already point at; the deduplication itself is not undone.
+    """
+    op.drop_index('ix_image_blobs_ref_count_updated_at', table_name='image_blobs')
+    op.drop_table('image_blobs')
@@ -0,0 +1,61 @@
+"""scope activity logs by owner and add archive table
+
+Revision ID: d3b7f0a6e215
+Revises: c5a9e1d7f302
+Create Date: 2026-10-17 17:02:13.884105
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b7f0a6e215'
+down_revision: Union[str, Sequence[str], None] = 'c5a9e1d7f302'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('activity_logs') as batch_op:
+        batch_op.add_column(sa.Column('owner_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_activity_logs_owner_id_users', 'users', ['owner_id'], ['id'])
+
+    # Existing entries written by an owner belong in that owner's feed; other actors'
+    # old entries stay visible in their own feed only.
+    op.execute(
+        "UPDATE activity_logs SET owner_id = user_id "
+        "WHERE user_id IN (SELECT id FROM users WHERE role = 'owner')"
+    )
+    op.create_index('ix_activity_logs_owner_id_timestamp', 'activity_logs', ['owner_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_activity_logs_user_id_timestamp', 'activity_logs', ['user_id', 'timestamp', 'id'], unique=False)
+
+    op.create_table(
+        'activity_log_archives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=True),
+        sa.Column('first_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_activity_log_archives_id'), 'activity_log_archives', ['id'], unique=False)
+    op.create_index(op.f('ix_activity_log_archives_owner_id'), 'activity_log_archives', ['owner_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_activity_log_archives_owner_id'), table_name='activity_log_archives')
+    op.drop_index(op.f('ix_activity_log_archives_id'), table_name='activity_log_archives')
+    op.drop_table('activity_log_archives')
+    op.drop_index('ix_activity_logs_user_id_timestamp', table_name='activity_logs')
+    op.drop_index('ix_activity_logs_owner_id_timestamp', table_name='activity_logs')
+    with op.batch_alter_table('activity_logs') as batch_op:
+        batch_op.drop_constraint('fk_activity_logs_owner_id_users', type_='foreignkey')
+        batch_op.drop_column('owner_id')
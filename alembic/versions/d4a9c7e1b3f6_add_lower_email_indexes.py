@@ -0,0 +1,30 @@
+"""add lower(email) indexes on users and pending_tenants
+
+Revision ID: d4a9c7e1b3f6
+Revises: c8f2d4b6a1e9
+Create Date: 2026-10-18 04:05:17.803412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a9c7e1b3f6'
+down_revision: Union[str, Sequence[str], None] = 'c8f2d4b6a1e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=False)
+    op.create_index('ix_pending_tenants_email_lower', 'pending_tenants', [sa.text('lower(email)')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pending_tenants_email_lower', table_name='pending_tenants')
+    op.drop_index('ix_users_email_lower', table_name='users')
@@ -0,0 +1,40 @@
+"""add otp codes table
+
+Revision ID: f1c9a3d5b7e2
+Revises: e4b8c2f1a907
+Create Date: 2026-10-17 23:05:14.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c9a3d5b7e2'
+down_revision: Union[str, Sequence[str], None] = 'e4b8c2f1a907'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'otp_codes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=255), nullable=False),
+        sa.Column('purpose', sa.String(length=32), nullable=False),
+        sa.Column('code', sa.String(length=20), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_otp_codes_expires_at'), 'otp_codes', ['expires_at'], unique=False)
+    op.create_index('ix_otp_codes_email_purpose_expires_at', 'otp_codes', ['email', 'purpose', 'expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_otp_codes_email_purpose_expires_at', table_name='otp_codes')
+    op.drop_index(op.f('ix_otp_codes_expires_at'), table_name='otp_codes')
+    op.drop_table('otp_codes')
@@ -0,0 +1,51 @@
+# app/access.py
+#
+# Which property IDs a user may touch, resolved once and cached in-process.
+
+import os
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.models import Property, User
+from app.ttl_cache import TTLCache
+
+SCOPE_CACHE_TTL_SECONDS = float(os.getenv("SCOPE_CACHE_TTL_SECONDS", "60"))
+SCOPE_CACHE_MAX_USERS = int(os.getenv("SCOPE_CACHE_MAX_USERS", "1024"))
+
+
+# user_id -> frozenset of property IDs; writes in this process invalidate through invalidate_user_scope()
+scope_cache = TTLCache(SCOPE_CACHE_TTL_SECONDS, SCOPE_CACHE_MAX_USERS)
+
+
+def get_accessible_property_ids(db: Session, user: User) -> frozenset:
+    """
+    Property IDs the user can access: owned (owner), assigned (manager) or rented (tenant).
+    A tenant's scope comes straight from the user row, so only owners/managers hit the cache.
+    """
+    if user.role == "tenant":
+        return frozenset([user.property_id]) if user.property_id else frozenset()
+    if user.role not in ("owner", "manager"):
+        return frozenset()
+
+    property_ids = scope_cache.get(user.id)
+    if property_ids is None:
+        generation = scope_cache.generation()
+        column = Property.owner_id if user.role == "owner" else Property.manager_id
+        property_ids = frozenset(pid for (pid,) in db.query(Property.id).filter(column == user.id))
+        scope_cache.set(user.id, property_ids, generation)
+    return property_ids
+
+
+def can_access_property(db: Session, user: User, property_id: int) -> bool:
+    return property_id in get_accessible_property_ids(db, user)
+
+
+def require_property_access(db: Session, user: User, property_id: int, detail: str = "Not authorized"):
+    if not can_access_property(db, user, property_id):
+        raise HTTPException(status_code=403, detail=detail)
+
+
+def invalidate_user_scope(*user_ids):
+    """Drop cached scopes after ownership, assignment or tenancy changes."""
+    scope_cache.invalidate(*[user_id for user_id in user_ids if user_id is not None])
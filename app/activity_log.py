@@ -0,0 +1,111 @@
+# app/activity_log.py
+#
+# Write-behind sink for ActivityLog rows. Routes have usually just committed their
+# main change, so instead of a second commit per action, entries are buffered and
+# written with one bulk INSERT when the buffer fills, every few seconds, and at
+# shutdown. ACTIVITY_LOG_MODE=sync writes through the caller's session instead
+# (tests, one-off scripts).
+
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app.database import engine
+from app.models import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_LOG_MODE = os.getenv("ACTIVITY_LOG_MODE", "buffered").lower()
+ACTIVITY_LOG_FLUSH_SIZE = int(os.getenv("ACTIVITY_LOG_FLUSH_SIZE", "100"))
+ACTIVITY_LOG_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_LOG_FLUSH_INTERVAL", "2"))
+# Entries kept across failed flushes before the oldest are dropped
+ACTIVITY_LOG_MAX_BUFFER = int(os.getenv("ACTIVITY_LOG_MAX_BUFFER", "10000"))
+
+
+class ActivityLogSink:
+    """
+    In-memory buffer of pending activity_logs rows. enqueue() is cheap and never
+    touches the database unless it fills the buffer; a daemon thread flushes on the
+    interval. Timestamps are taken at enqueue time, so ordering is preserved.
+    """
+
+    def __init__(self, bind=engine, flush_size: int = ACTIVITY_LOG_FLUSH_SIZE,
+                 flush_interval: float = ACTIVITY_LOG_FLUSH_INTERVAL,
+                 max_buffer: int = ACTIVITY_LOG_MAX_BUFFER, buffered: bool = ACTIVITY_LOG_MODE != "sync"):
+        self.bind = bind
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.buffered = buffered
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def enqueue(self, user_id: int, action: str, owner_id: int = None):
+        with self._lock:
+            self._pending.append({
+                "user_id": user_id, "owner_id": owner_id, "action": action, "timestamp": datetime.utcnow()
+            })
+            full = len(self._pending) >= self.flush_size
+        self._ensure_flusher()
+        if full:
+            self.flush()
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """Write everything buffered so far in one INSERT. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                with self.bind.begin() as conn:
+                    conn.execute(insert(ActivityLog), rows)
+            except Exception:
+                logger.exception("Activity log flush of %d entries failed; will retry", len(rows))
+                with self._lock:
+                    self._pending = rows + self._pending
+                    overflow = len(self._pending) - self.max_buffer
+                    if overflow > 0:
+                        del self._pending[:overflow]
+                        logger.error("Activity log buffer full; dropped %d oldest entries", overflow)
+                return 0
+            return len(rows)
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def stop(self):
+        """Stop the interval flusher and write out whatever is still buffered."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+
+activity_log_sink = ActivityLogSink()
+
+# Covers scripts and workers that exit without going through the app's shutdown hook
+atexit.register(activity_log_sink.stop)
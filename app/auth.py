@@ -1,11 +1,25 @@
+import hashlib
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import jwt
 from fastapi import Request, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
-from app.models import User
-from app.database import get_db
-from app import crud  # Make sure crud has get_user_by_id
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
+from app.principal import Principal, load_principal, principal_cache
 
+logger = logging.getLogger(__name__)
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> Principal:
+    """
+    The session user as a cached, read-only Principal (see app.principal). Routes that
+    need the full User row load it themselves with crud.get_user_by_id.
+    """
     user_id = request.session.get("user_id")
     if not user_id:
         raise HTTPException(
@@ -13,26 +27,158 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
             detail="Not authenticated"
         )
 
-    user = crud.get_user_by_id(db, user_id)
+    user = load_principal(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    return user
 
-    # Optional: attach any session info to user object
-    user.is_admin = request.session.get("is_admin", False)
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """get_current_user for `async def` routes; a cache miss loads through the async engine."""
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+
+    user = principal_cache.get(user_id) or await db.run_sync(load_principal, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     return user
-from datetime import datetime, timedelta
-import jwt
 
-SECRET_KEY = "your-secret-key"  # Change this to a strong secret and keep it private
+# --------------------------
+# Bearer tokens (mobile / integration clients)
+# --------------------------
+# Access tokens are short-lived JWTs carrying the principal and its scopes, verified
+# locally with no DB lookup. Refresh tokens live longer and are exchanged at
+# /api/token/refresh, which re-reads the user, so role changes apply from the next
+# refresh and a password reset revokes every outstanding refresh token.
+#
+# There is no default signing key: anyone who knew it could mint a token for any
+# user. Without JWT_SECRET_KEY bearer auth is off; /api/token answers 503 and a
+# request carrying a bearer token gets 401 (session logins are unaffected).
+SECRET_KEY = os.getenv("JWT_SECRET_KEY") or None
+if SECRET_KEY is None:
+    logger.warning("JWT_SECRET_KEY is not set; bearer token auth is disabled")
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+
+# What a bearer token of each role may call
+ROLE_SCOPES = {
+    "owner": ("appliances:read", "properties:read", "activity:read"),
+    "manager": ("appliances:read", "properties:read", "issues:read", "activity:read"),
+    "tenant": ("appliances:read", "queries:read"),
+    "vendor": ("issues:read",),
+}
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+def _signing_key(status_code: int) -> str:
+    if SECRET_KEY is None:
+        raise HTTPException(status_code=status_code, detail="Bearer token auth is not configured",
+                            headers={"WWW-Authenticate": "Bearer"} if status_code == 401 else None)
+    return SECRET_KEY
 
-def create_access_token(data: dict):
+
+def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _signing_key(503), algorithm=ALGORITHM)
     return encoded_jwt
+
+
+def password_version(password_hash: str) -> str:
+    """Short fingerprint of the stored hash; changes whenever the password does."""
+    return hashlib.sha256((password_hash or "").encode()).hexdigest()[:16]
+
+
+def create_token_pair(user) -> dict:
+    """Access + refresh token for a full User row (the refresh token is tied to its password)."""
+    now = datetime.utcnow()
+    access_token = create_access_token({
+        "sub": str(user.id),
+        "type": "access",
+        "iat": now,
+        "username": user.username,
+        "role": user.role,
+        "property_id": user.property_id,
+        "floor_id": user.floor_id,
+        "scope": " ".join(ROLE_SCOPES.get(user.role, ())),
+    })
+    refresh_token = create_access_token({
+        "sub": str(user.id),
+        "type": "refresh",
+        "iat": now,
+        "jti": uuid.uuid4().hex,
+        "pwv": password_version(user.password_hash),
+    }, expires_delta=timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, expected_type: str = "access") -> dict:
+    key = _signing_key(401)
+    try:
+        claims = jwt.decode(token, key, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expired", headers={"WWW-Authenticate": "Bearer"})
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token", headers={"WWW-Authenticate": "Bearer"})
+    if claims.get("type") != expected_type:
+        raise HTTPException(status_code=401, detail="Invalid token type", headers={"WWW-Authenticate": "Bearer"})
+    return claims
+
+
+def principal_from_claims(claims: dict) -> Principal:
+    return Principal(
+        id=int(claims["sub"]),
+        username=claims.get("username"),
+        role=claims.get("role"),
+        property_id=claims.get("property_id"),
+        floor_id=claims.get("floor_id"),
+        is_verified=True,
+    )
+
+
+def get_api_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Principal for JSON endpoints: from a bearer access token when one is sent (no DB
+    access at all), otherwise from the browser session like get_current_user.
+    """
+    if credentials is None:
+        return get_current_user(request, db)
+    claims = decode_token(credentials.credentials, "access")
+    request.state.token_scopes = frozenset(claims.get("scope", "").split())
+    return principal_from_claims(claims)
+
+
+def require_scope(scope: str):
+    """get_api_user, plus a 403 when a bearer token lacks `scope`. Session users aren't scope-limited."""
+    def check_scope(request: Request, user: Principal = Depends(get_api_user)) -> Principal:
+        token_scopes = getattr(request.state, "token_scopes", None)
+        if token_scopes is not None and scope not in token_scopes:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Token lacks the {scope} scope",
+                headers={"WWW-Authenticate": f'Bearer scope="{scope}"'}
+            )
+        return user
+    return check_scope
@@ -0,0 +1,83 @@
+# app/background.py
+#
+# Shared pieces of the in-process background jobs (OTP sweeper, email outbox
+# drainer, image collector): a daemon thread that runs a task every interval or
+# as soon as it is woken, and a delete that works through a large backlog in
+# short per-batch transactions instead of one long statement holding locks.
+
+import logging
+import threading
+
+from sqlalchemy import select, delete
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker:
+    """Runs `task` on a daemon thread every `interval` seconds, or right after wake()."""
+
+    def __init__(self, name: str, task, interval: float, join_timeout: float = 5):
+        self.name = name
+        self.task = task
+        self.interval = interval
+        self.join_timeout = join_timeout
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.task()
+            except Exception:
+                logger.exception("%s failed; will retry", self.name)
+
+    def stop(self):
+        """Stop after the current run of the task, waiting up to join_timeout for it."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.join_timeout)
+            self._thread = None
+
+
+def delete_in_batches(bind, key_column, conditions, batch_size: int, returning=(), on_deleted=None) -> int:
+    """
+    Delete the rows matching `conditions`, batch_size at a time, one transaction per
+    batch. Candidates are locked with SKIP LOCKED, so concurrent callers take disjoint
+    batches, and the DELETE re-checks the conditions, so a row changed since the select
+    is kept. on_deleted(rows) gets the deleted (key, *returning) rows inside the batch's
+    transaction, before it commits. Returns how many rows went.
+    """
+    deleted = 0
+    while True:
+        with bind.begin() as conn:
+            candidates = list(conn.scalars(
+                select(key_column).where(*conditions).limit(batch_size).with_for_update(skip_locked=True)
+            ))
+            rows = []
+            if candidates:
+                rows = conn.execute(
+                    delete(key_column.table)
+                    .where(key_column.in_(candidates), *conditions)
+                    .returning(key_column, *returning)
+                ).all()
+                if rows and on_deleted is not None:
+                    on_deleted(rows)
+        deleted += len(rows)
+        if len(candidates) < batch_size:
+            return deleted
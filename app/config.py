@@ -9,8 +9,12 @@ SENDER_EMAIL = os.getenv("SENDER_EMAIL")
 APP_URL = os.getenv("APP_URL")
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Test printing (safe)
-print("BREVO_API_KEY:", "*" * 8)  # hide actual key
-print("SENDER_EMAIL:", SENDER_EMAIL)
-print("APP_URL:", APP_URL)
-print("DATABASE_URL:", DATABASE_URL[:40] + "...")
+
+def describe():
+    """Masked summary of the loaded settings, for debugging (nothing is printed at import)."""
+    return {
+        "BREVO_API_KEY": "*" * 8 if BREVO_API_KEY else None,  # hide actual key
+        "SENDER_EMAIL": SENDER_EMAIL,
+        "APP_URL": APP_URL,
+        "DATABASE_URL": DATABASE_URL[:40] + "..." if DATABASE_URL else None,
+    }
@@ -1,16 +1,24 @@
 from datetime import datetime, date, timedelta
+import json
 import uuid
+import zlib
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, case, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 from passlib.context import CryptContext
 from fastapi import UploadFile
 
 
 from app.models import (
-    Property, User, Appliance, Floor, ActivityLog,
-    PendingTenant, ApplianceImage
+    Property, User, Appliance, Floor, ActivityLog, ActivityLogArchive,
+    PendingTenant, ApplianceImage, DashboardSnapshot, ApplianceStatus, Issue
 )
 from app.schemas import PropertyCreate
+from app.access import invalidate_user_scope
+from app.principal import invalidate_principal
+from app.activity_log import activity_log_sink
+from app.otp_store import otp_service, VERIFY_EMAIL
 from app.utils import hash_password, send_otp_email  # ✅ Import from utils
 
 
@@ -28,7 +36,9 @@ def create_property(db: Session, property: PropertyCreate, user_id: int):
         owner_id=user_id
     )
     db.add(db_property)
+    _apply_snapshot_delta(db, db_property, total_properties_count=1)
     db.commit()
+    invalidate_user_scope(user_id)
     db.refresh(db_property)
     return db_property
 
@@ -48,6 +58,20 @@ def update_property(db: Session, property_id: int, name: str, address: str, prop
         db.refresh(property_obj)
     return property_obj
 
+def delete_property(db: Session, property_obj):
+    counts = get_dashboard_counts(db, property_id=property_obj.id)
+    affected_user_ids = (property_obj.owner_id, property_obj.manager_id)
+    db.delete(property_obj)
+    _apply_snapshot_delta(
+        db, property_obj,
+        total_properties_count=-1,
+        total_floors_count=-counts["total_floors_count"],
+        total_appliance_count=-counts["total_appliance_count"],
+        appliances_expiring_count=-counts["appliances_expiring_count"]
+    )
+    db.commit()
+    invalidate_user_scope(*affected_user_ids)
+
 # --------------------------
 # MANAGER ASSIGNMENT
 # --------------------------
@@ -63,8 +87,13 @@ def assign_property_to_manager(db: Session, property_id: int, manager_id: int):
     if not manager:
         raise HTTPException(status_code=404, detail="Manager not found")
 
+    previous_manager_id = property_obj.manager_id
     property_obj.manager_id = manager.id
+    db.flush()
+    for affected_id in {previous_manager_id, manager.id} - {None}:
+        _load_snapshot(db, affected_id, "manager", date.today(), force=True)
     db.commit()
+    invalidate_user_scope(previous_manager_id, manager.id)
     db.refresh(property_obj)
     return property_obj
 
@@ -83,6 +112,21 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
+def update_user(db: Session, user: User, **fields):
+    """Set columns on a user row and commit. Use this for role, tenancy, verification or password changes."""
+    for field, value in fields.items():
+        setattr(user, field, value)
+    db.commit()
+    invalidate_principal(user.id)
+    if "role" in fields or "property_id" in fields:
+        invalidate_user_scope(user.id)
+    db.refresh(user)
+    return user
+
+def set_user_password(db: Session, user: User, new_password: str):
+    """Password reset: store the new hash and mark the account verified."""
+    return update_user(db, user, password_hash=hash_password(new_password), is_verified=True)
+
 
 from app.crud import get_user_by_email  # make sure this exists
 
@@ -106,21 +150,19 @@ def create_user(db: Session, username: str, email: str, password: str, role: str
     if role.lower() in ["owner", "manager"]:
         # Generate OTP for owner/manager
         otp = str(uuid.uuid4())[:6]  # 6-character OTP
-        otp_expiry = datetime.utcnow() + timedelta(minutes=10)
+        otp_service.issue(email, VERIFY_EMAIL, otp, minutes=10, db=db)
 
         new_user = User(
             username=username,
             email=email,
             password_hash=hashed_password,
             role=role.lower(),
-            otp=otp,
-            otp_expiry=otp_expiry,
             is_verified=False,  # OTP pending
             **kwargs
         )
 
-        # Send OTP email
-        send_otp_email(to_email=email, otp=otp)
+        # Queue the OTP email; the code, the email and the user commit together below
+        send_otp_email(db, email, otp)
 
     else:
         # Tenant registration (no OTP)
@@ -143,17 +185,36 @@ def create_user(db: Session, username: str, email: str, password: str, role: str
 # --------------------------
 # APPLIANCE MANAGEMENT
 # --------------------------
+def normalize_appliance_status(status) -> ApplianceStatus:
+    """Map free-form status input ("working", " Not Working", "not_working", ...) to ApplianceStatus."""
+    if isinstance(status, ApplianceStatus):
+        return status
+    key = str(status or "").strip().lower().replace("_", " ")
+    for member in ApplianceStatus:
+        if key == member.value.lower():
+            return member
+    return ApplianceStatus.not_working
+
+def derive_appliance_type(name: str) -> str:
+    """Appliance type used for grouping, e.g. "Refrigerator Front" -> "Refrigerator"."""
+    main_type = name.split(" Front")[0].strip() if name else ""
+    return main_type or "Unknown"
+
 def create_appliance(
     db: Session, user_id: int, name: str, model: str, color: str,
     status: str, warranty_expiry: date, property_id: int, floor_id: int,
     location: str, front_image: str = None, detail_image: str = None
 ):
+    property_obj = get_property_by_id(db, property_id)
+    if property_obj is None:
+        raise HTTPException(status_code=404, detail="Property not found")
     appliance = Appliance(
         user_id=user_id,
         name=name,
+        appliance_type=derive_appliance_type(name),
         model=model,
         color=color,
-        status=status,
+        status=normalize_appliance_status(status),
         warranty_expiry=warranty_expiry,
         property_id=property_id,
         floor_id=floor_id,
@@ -162,9 +223,17 @@ def create_appliance(
         detail_image=detail_image
     )
     db.add(appliance)
+    _apply_snapshot_delta(
+        db, property_obj,
+        total_appliance_count=1,
+        appliances_expiring_count=int(_is_expiring(warranty_expiry))
+    )
     db.commit()
     db.refresh(appliance)
-    log_activity(db, user_id=user_id, action=f"Added appliance '{name}' to property {property_id}, floor {floor_id}")
+    log_activity(
+        db, user_id=user_id, action=f"Added appliance '{name}' to property {property_id}, floor {floor_id}",
+        owner_id=property_obj.owner_id
+    )
     return appliance
 
 def get_appliance_by_id(db: Session, appliance_id: int):
@@ -172,16 +241,32 @@ def get_appliance_by_id(db: Session, appliance_id: int):
 
 def update_appliance(db: Session, appliance, name: str, model: str, color: str,
                      status: str, warranty_expiry, location: str):
+    was_expiring = _is_expiring(appliance.warranty_expiry)
     appliance.name = name
+    appliance.appliance_type = derive_appliance_type(name)
     appliance.model = model
     appliance.color = color
-    appliance.status = status
+    appliance.status = normalize_appliance_status(status)
     appliance.warranty_expiry = warranty_expiry
     appliance.location = location
+    _apply_snapshot_delta(
+        db, appliance.property,
+        appliances_expiring_count=int(_is_expiring(warranty_expiry)) - int(was_expiring)
+    )
     db.commit()
     db.refresh(appliance)
     return appliance
 
+def delete_appliance(db: Session, appliance):
+    property_obj = appliance.property
+    db.delete(appliance)
+    _apply_snapshot_delta(
+        db, property_obj,
+        total_appliance_count=-1,
+        appliances_expiring_count=-int(_is_expiring(appliance.warranty_expiry))
+    )
+    db.commit()
+
 def get_appliances_by_property(db: Session, property_id: int):
     return db.query(Appliance).filter(Appliance.property_id == property_id).all()
 
@@ -199,9 +284,19 @@ def add_appliance_image(db: Session, appliance_id: int, image_path: str):
 # --------------------------
 # FLOOR MANAGEMENT
 # --------------------------
-def create_floor(db: Session, floor_number: str, property_id: int):
-    floor = Floor(floor_number=floor_number, property_id=property_id)
+def create_floor(db: Session, floor_number: str, property_id: int,
+                 floor_plan: str = None, extracted_details: str = None):
+    property_obj = get_property_by_id(db, property_id)
+    if property_obj is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+    floor = Floor(
+        floor_number=floor_number,
+        property_id=property_id,
+        floor_plan=floor_plan,
+        extracted_details=extracted_details
+    )
     db.add(floor)
+    _apply_snapshot_delta(db, property_obj, total_floors_count=1)
     db.commit()
     db.refresh(floor)
     return floor
@@ -209,6 +304,16 @@ def create_floor(db: Session, floor_number: str, property_id: int):
 def get_floors_by_property(db: Session, property_id: int):
     return db.query(Floor).filter(Floor.property_id == property_id).all()
 
+def get_floors_for_properties(db: Session, property_ids):
+    """Floors of several properties in one query, grouped by property id."""
+    grouped = {property_id: [] for property_id in property_ids}
+    if not grouped:
+        return grouped
+    floors = db.query(Floor).filter(Floor.property_id.in_(list(grouped))).order_by(Floor.property_id, Floor.id)
+    for floor in floors:
+        grouped[floor.property_id].append(floor)
+    return grouped
+
 def floor_exists(db: Session, property_id: int, floor_number: str):
     return db.query(Floor).filter_by(property_id=property_id, floor_number=floor_number).first() is not None
 
@@ -216,18 +321,561 @@ def get_floors_with_appliances(db: Session, property_id: int):
     floors = get_floors_by_property(db, property_id)
     return [{"floor_number": f.floor_number, "appliances": f.appliances} for f in floors]
 
+# --------------------------
+# DASHBOARD AGGREGATION
+# --------------------------
+EXPIRY_ALERT_WINDOW_DAYS = 30
+
+def _dashboard_scope(owner_id: int = None, manager_id: int = None, property_id: int = None):
+    """Property filters describing the portfolio a dashboard is looking at."""
+    scope = []
+    if owner_id is not None:
+        scope.append(Property.owner_id == owner_id)
+    if manager_id is not None:
+        scope.append(Property.manager_id == manager_id)
+    if property_id is not None:
+        scope.append(Property.id == property_id)
+    return scope
+
+def get_dashboard_counts(db: Session, owner_id: int = None, manager_id: int = None,
+                         property_id: int = None, floor_id: int = None, today: date = None,
+                         window_days: int = EXPIRY_ALERT_WINDOW_DAYS):
+    """Property/floor/appliance counts and expiry buckets for one dashboard scope (three queries)."""
+    today = today or date.today()
+    soon = today + timedelta(days=window_days)
+    scope = _dashboard_scope(owner_id=owner_id, manager_id=manager_id, property_id=property_id)
+    counts = {
+        "total_properties_count": 0,
+        "total_floors_count": 0,
+        "total_appliance_count": 0,
+        "working_count": 0,
+        "expiry_buckets": {"expired": 0, "expiring_soon": 0},
+        "appliances_expiring_count": 0,
+    }
+    if not scope:
+        return counts
+
+    appliance_scope = list(scope)
+    if floor_id is not None:
+        appliance_scope.append(Appliance.floor_id == floor_id)
+
+    counts["total_properties_count"] = db.query(func.count(Property.id)).filter(*scope).scalar()
+    counts["total_floors_count"] = (
+        db.query(func.count(Floor.id))
+        .join(Property, Floor.property_id == Property.id)
+        .filter(*scope)
+        .scalar()
+    )
+
+    expired = case((Appliance.warranty_expiry < today, 1), else_=0)
+    expiring_soon = case((Appliance.warranty_expiry.between(today, soon), 1), else_=0)
+    working = case((Appliance.status == ApplianceStatus.working, 1), else_=0)
+    total, working_count, expired_count, expiring_soon_count = (
+        db.query(
+            func.count(Appliance.id),
+            func.coalesce(func.sum(working), 0),
+            func.coalesce(func.sum(expired), 0),
+            func.coalesce(func.sum(expiring_soon), 0),
+        )
+        .join(Property, Appliance.property_id == Property.id)
+        .filter(*appliance_scope)
+        .one()
+    )
+    counts["total_appliance_count"] = total
+    counts["working_count"] = working_count
+    counts["expiry_buckets"] = {"expired": expired_count, "expiring_soon": expiring_soon_count}
+    counts["appliances_expiring_count"] = expired_count + expiring_soon_count
+    return counts
+
+def user_dashboard_scope(user: User):
+    """Scope keyword arguments (owner_id / manager_id / property_id, floor_id) for a user's role."""
+    if user.role == "owner":
+        return {"owner_id": user.id}
+    if user.role == "manager":
+        return {"manager_id": user.id}
+    if user.role == "tenant" and user.property_id:
+        return {"property_id": user.property_id, "floor_id": user.floor_id}
+    return {}
+
+def get_dashboard_aggregates(db: Session, owner_id: int = None, manager_id: int = None,
+                             property_id: int = None, floor_id: int = None, today: date = None,
+                             window_days: int = EXPIRY_ALERT_WINDOW_DAYS):
+    """
+    Counts, expiry buckets and the first page of alert rows for an owner, manager or
+    tenant dashboard. Runs a fixed number of queries, however many properties are in scope.
+    """
+    scope = dict(owner_id=owner_id, manager_id=manager_id, property_id=property_id, floor_id=floor_id)
+    summary = get_dashboard_counts(db, today=today, window_days=window_days, **scope)
+    summary["expiry_alerts"], summary["expiry_alerts_next_cursor"] = get_warranty_alerts(
+        db, limit=WARRANTY_ALERT_PAGE_SIZE, today=today, within_days=window_days, **scope
+    )
+    return summary
+
+def get_appliance_type_status_counts(db: Session, owner_id: int):
+    """(appliance_type, status, count) rows for an owner's appliances, grouped in SQL."""
+    return (
+        db.query(Appliance.appliance_type, Appliance.status, func.count(Appliance.id))
+        .join(Property, Appliance.property_id == Property.id)
+        .filter(Property.owner_id == owner_id)
+        .group_by(Appliance.appliance_type, Appliance.status)
+        .all()
+    )
+
+MANAGER_DASHBOARD_APPLIANCES_PER_PROPERTY = 20
+
+def get_appliances_for_properties(db: Session, property_ids, limit_per_property: int = None):
+    """
+    Appliances of several properties in one query, grouped by property id. With
+    limit_per_property, only the first that many (by id) of each property are loaded.
+    """
+    grouped = {property_id: [] for property_id in property_ids}
+    if not grouped:
+        return grouped
+    query = db.query(Appliance).filter(Appliance.property_id.in_(list(grouped)))
+    if limit_per_property is not None:
+        ranked = (
+            query.with_entities(
+                Appliance.id,
+                func.row_number().over(partition_by=Appliance.property_id, order_by=Appliance.id).label("rank")
+            ).subquery()
+        )
+        query = (
+            db.query(Appliance)
+            .join(ranked, ranked.c.id == Appliance.id)
+            .filter(ranked.c.rank <= limit_per_property)
+        )
+    for appliance in query.order_by(Appliance.property_id, Appliance.id):
+        grouped[appliance.property_id].append(appliance)
+    return grouped
+
+def count_appliances_by_property(db: Session, property_ids):
+    return _count_by(db, Appliance.property_id, list(property_ids))
+
+# --------------------------
+# WARRANTY ALERTS
+# --------------------------
+WARRANTY_ALERT_PAGE_SIZE = 50
+
+def encode_warranty_cursor(warranty_expiry: date, appliance_id: int) -> str:
+    return f"{warranty_expiry.isoformat()}_{appliance_id}"
+
+def decode_warranty_cursor(cursor: str):
+    try:
+        expiry, appliance_id = cursor.split("_", 1)
+        return date.fromisoformat(expiry), int(appliance_id)
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _warranty_alert_query(db: Session, columns, owner_id: int = None, manager_id: int = None,
+                          property_id: int = None, floor_id: int = None, today: date = None,
+                          within_days: int = EXPIRY_ALERT_WINDOW_DAYS, include_expired: bool = True):
+    """
+    Range predicate on appliances.warranty_expiry (ix_appliances_property_warranty_expiry)
+    for one owner/manager/tenant scope. Returns None when the scope is empty.
+    """
+    today = today or date.today()
+    scope = _dashboard_scope(owner_id=owner_id, manager_id=manager_id, property_id=property_id)
+    if not scope:
+        return None
+    if floor_id is not None:
+        scope.append(Appliance.floor_id == floor_id)
+    scope.append(Appliance.warranty_expiry <= today + timedelta(days=within_days))
+    if not include_expired:
+        scope.append(Appliance.warranty_expiry >= today)
+    return (
+        db.query(*columns)
+        .join(Property, Appliance.property_id == Property.id)
+        .filter(*scope)
+    )
+
+def count_warranty_alerts(db: Session, **scope):
+    """Number of appliances in a warranty window; takes the same scope/window arguments as get_warranty_alerts."""
+    query = _warranty_alert_query(db, [func.count(Appliance.id)], **scope)
+    return query.scalar() if query is not None else 0
+
+def get_warranty_alerts(db: Session, cursor: str = None, limit: int = None, today: date = None, **scope):
+    """
+    Appliances whose warranty has expired or ends within `within_days`, earliest expiry
+    first, keyset-paginated on (warranty_expiry, id). Returns (alerts, next_cursor);
+    next_cursor is None on the last page. limit=None returns the whole window.
+    """
+    today = today or date.today()
+    query = _warranty_alert_query(
+        db,
+        [Appliance.id, Property.name, Floor.floor_number, Appliance.name, Appliance.model, Appliance.warranty_expiry],
+        today=today,
+        **scope
+    )
+    if query is None:
+        return [], None
+
+    query = query.outerjoin(Floor, Appliance.floor_id == Floor.id)
+    if cursor:
+        after_expiry, after_id = decode_warranty_cursor(cursor)
+        query = query.filter(or_(
+            Appliance.warranty_expiry > after_expiry,
+            and_(Appliance.warranty_expiry == after_expiry, Appliance.id > after_id)
+        ))
+    query = query.order_by(Appliance.warranty_expiry, Appliance.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_warranty_cursor(rows[-1].warranty_expiry, rows[-1].id)
+
+    alerts = [
+        {
+            "appliance_id": appliance_id,
+            "property_name": property_name,
+            "floor_name": floor_number,
+            "name": name,
+            "model": model,
+            "expiry": expiry,
+            "status": "expired" if expiry < today else "expiring_soon",
+        }
+        for appliance_id, property_name, floor_number, name, model, expiry in rows
+    ]
+    return alerts, next_cursor
+
+# --------------------------
+# PROPERTY TREE (view_properties)
+# --------------------------
+PROPERTY_TREE_PAGE_SIZE = 20
+
+def _keyset_page(query, id_column, cursor: int = None, limit: int = PROPERTY_TREE_PAGE_SIZE):
+    """Rows after `cursor` ordered by id_column; returns (rows, next_cursor)."""
+    if cursor is not None:
+        query = query.filter(id_column > cursor)
+    rows = query.order_by(id_column).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].id
+    return rows, None
+
+def _count_by(db: Session, column, ids):
+    if not ids:
+        return {}
+    return dict(db.query(column, func.count()).filter(column.in_(ids)).group_by(column).all())
+
+ISSUE_PAGE_SIZE = 50
+
+def get_issues_page(db: Session, cursor: int = None, limit: int = ISSUE_PAGE_SIZE):
+    """One page of issues by id, with property, appliance and tenant loaded; returns (issues, next_cursor)."""
+    return _keyset_page(
+        db.query(Issue).options(
+            joinedload(Issue.property),
+            joinedload(Issue.appliance),
+            joinedload(Issue.tenant)
+        ),
+        Issue.id, cursor, limit
+    )
+
+def get_property_tree_page(db: Session, owner_id: int, cursor: int = None, limit: int = PROPERTY_TREE_PAGE_SIZE):
+    """One page of an owner's properties with floor/appliance counts (three queries)."""
+    properties, next_cursor = _keyset_page(
+        db.query(Property).filter(Property.owner_id == owner_id), Property.id, cursor, limit
+    )
+    ids = [p.id for p in properties]
+    floor_counts = _count_by(db, Floor.property_id, ids)
+    appliance_counts = _count_by(db, Appliance.property_id, ids)
+    nodes = [
+        {
+            "id": p.id,
+            "name": p.name,
+            "address": p.address,
+            "property_type": p.property_type,
+            "floors_count": floor_counts.get(p.id, 0),
+            "appliances_count": appliance_counts.get(p.id, 0),
+        }
+        for p in properties
+    ]
+    return nodes, next_cursor
+
+def get_floor_tree_page(db: Session, owner_id: int, property_id: int, cursor: int = None,
+                        limit: int = PROPERTY_TREE_PAGE_SIZE):
+    """One page of a property's floors with appliance counts; 404 unless the owner owns it."""
+    if not db.query(Property.id).filter(Property.id == property_id, Property.owner_id == owner_id).first():
+        raise HTTPException(status_code=404, detail="Property not found")
+    floors, next_cursor = _keyset_page(
+        db.query(Floor).filter(Floor.property_id == property_id), Floor.id, cursor, limit
+    )
+    appliance_counts = _count_by(db, Appliance.floor_id, [f.id for f in floors])
+    nodes = [
+        {
+            "id": f.id,
+            "floor_number": f.floor_number,
+            "appliances_count": appliance_counts.get(f.id, 0),
+        }
+        for f in floors
+    ]
+    return nodes, next_cursor
+
+def get_appliance_tree_page(db: Session, owner_id: int, floor_id: int, cursor: int = None,
+                            limit: int = PROPERTY_TREE_PAGE_SIZE):
+    """One page of a floor's appliances; 404 unless the owner owns the floor's property."""
+    owned = (
+        db.query(Floor.id)
+        .join(Property, Floor.property_id == Property.id)
+        .filter(Floor.id == floor_id, Property.owner_id == owner_id)
+        .first()
+    )
+    if not owned:
+        raise HTTPException(status_code=404, detail="Floor not found")
+    appliances, next_cursor = _keyset_page(
+        db.query(Appliance).filter(Appliance.floor_id == floor_id), Appliance.id, cursor, limit
+    )
+    nodes = [
+        {
+            "id": a.id,
+            "name": a.name,
+            "model": a.model,
+            "color": a.color,
+            "status": a.status.value if a.status else None,
+            "warranty_expiry": a.warranty_expiry,
+            # Formatted as the server-rendered pages show it
+            "warranty_expiry_label": a.warranty_expiry.strftime("%b %d, %Y") if a.warranty_expiry else None,
+            "location": a.location,
+            "front_image": a.front_image,
+        }
+        for a in appliances
+    ]
+    return nodes, next_cursor
+
+# --------------------------
+# DASHBOARD SNAPSHOTS
+# --------------------------
+SNAPSHOT_COUNTERS = (
+    "total_properties_count", "total_floors_count",
+    "total_appliance_count", "appliances_expiring_count",
+)
+
+def _is_expiring(warranty_expiry, today: date = None):
+    today = today or date.today()
+    return bool(warranty_expiry) and warranty_expiry <= today + timedelta(days=EXPIRY_ALERT_WINDOW_DAYS)
+
+def _load_snapshot(db: Session, user_id: int, role: str, today: date, force: bool = False):
+    """
+    Return (snapshot, recomputed). A missing row, or one computed on an earlier day
+    (its expiring count has drifted), is recomputed from the aggregation queries.
+    Does not commit.
+    """
+    snapshot = db.query(DashboardSnapshot).filter(DashboardSnapshot.user_id == user_id).first()
+    if snapshot is not None and snapshot.computed_on == today and not force:
+        return snapshot, False
+    if snapshot is None:
+        try:
+            # In a savepoint: a concurrent first load or write may insert this user's row first
+            with db.begin_nested():
+                snapshot = DashboardSnapshot(user_id=user_id)
+                db.add(snapshot)
+        except IntegrityError:
+            snapshot = db.query(DashboardSnapshot).filter(DashboardSnapshot.user_id == user_id).one()
+            if snapshot.computed_on == today and not force:
+                return snapshot, False
+
+    scope = {"manager_id": user_id} if role == "manager" else {"owner_id": user_id}
+    counts = get_dashboard_counts(db, today=today, **scope)
+    for field in SNAPSHOT_COUNTERS:
+        setattr(snapshot, field, counts[field])
+    snapshot.computed_on = today
+    return snapshot, True
+
+def _apply_snapshot_delta(db: Session, property_obj, **deltas):
+    """
+    Shift the counters of the owner and manager of property_obj inside the caller's
+    transaction. Call after the change itself has been added/deleted; does not commit.
+    """
+    db.flush()
+    today = date.today()
+    targets = [(property_obj.owner_id, "owner")]
+    if property_obj.manager_id and property_obj.manager_id != property_obj.owner_id:
+        targets.append((property_obj.manager_id, "manager"))
+
+    for user_id, role in targets:
+        if user_id is None:
+            continue
+        snapshot, recomputed = _load_snapshot(db, user_id, role, today)
+        if recomputed:
+            continue  # the fresh counts already include this change
+        for field, delta in deltas.items():
+            if delta:
+                setattr(snapshot, field, getattr(DashboardSnapshot, field) + delta)
+
+def get_dashboard_snapshot(db: Session, user: User):
+    """Dashboard counters for an owner or manager, read from their snapshot row."""
+    snapshot, recomputed = _load_snapshot(db, user.id, user.role, date.today())
+    if recomputed:
+        db.commit()
+        db.refresh(snapshot)
+    return snapshot
+
+def rebuild_dashboard_snapshots(db: Session, today: date = None):
+    """
+    Recompute every owner/manager snapshot with grouped queries and replace the table
+    contents in one transaction. Used to repair snapshots after migrations or bulk edits.
+    """
+    today = today or date.today()
+    soon = today + timedelta(days=EXPIRY_ALERT_WINDOW_DAYS)
+    expiring = case((Appliance.warranty_expiry <= soon, 1), else_=0)
+    rows = {}
+
+    for role, column in (("owner", Property.owner_id), ("manager", Property.manager_id)):
+        user_ids = [uid for (uid,) in db.query(User.id).filter(User.role == role)]
+        for user_id in user_ids:
+            rows[user_id] = {
+                "user_id": user_id, "computed_on": today, "updated_at": datetime.utcnow(),
+                **{field: 0 for field in SNAPSHOT_COUNTERS},
+            }
+        if not user_ids:
+            continue
+
+        property_counts = (
+            db.query(column, func.count(Property.id))
+            .filter(column.in_(user_ids))
+            .group_by(column)
+        )
+        floor_counts = (
+            db.query(column, func.count(Floor.id))
+            .join(Property, Floor.property_id == Property.id)
+            .filter(column.in_(user_ids))
+            .group_by(column)
+        )
+        appliance_counts = (
+            db.query(column, func.count(Appliance.id), func.coalesce(func.sum(expiring), 0))
+            .join(Property, Appliance.property_id == Property.id)
+            .filter(column.in_(user_ids))
+            .group_by(column)
+        )
+        for user_id, count in property_counts:
+            rows[user_id]["total_properties_count"] = count
+        for user_id, count in floor_counts:
+            rows[user_id]["total_floors_count"] = count
+        for user_id, count, expiring_count in appliance_counts:
+            rows[user_id]["total_appliance_count"] = count
+            rows[user_id]["appliances_expiring_count"] = expiring_count
+
+    db.query(DashboardSnapshot).delete(synchronize_session=False)
+    if rows:
+        db.bulk_insert_mappings(DashboardSnapshot, list(rows.values()))
+    db.commit()
+    return len(rows)
+
 # --------------------------
 # ACTIVITY LOG
 # --------------------------
-def log_activity(db: Session, user_id: int, action: str):
-    log = ActivityLog(user_id=user_id, action=action)
+ACTIVITY_FEED_PAGE_SIZE = 20
+ACTIVITY_ARCHIVE_BATCH_SIZE = 1000
+
+def log_activity(db: Session, user_id: int, action: str, owner_id: int = None):
+    """
+    Record an activity entry; owner_id is the owner whose feed it belongs in. Normally queued
+    on the write-behind sink (no commit here; returns None). With ACTIVITY_LOG_MODE=sync it is
+    committed on `db` and returned.
+    """
+    if activity_log_sink.buffered:
+        activity_log_sink.enqueue(user_id, action, owner_id=owner_id)
+        return None
+    log = ActivityLog(user_id=user_id, action=action, owner_id=owner_id)
     db.add(log)
     db.commit()
     db.refresh(log)
     return log
 
-def get_recent_logs(db: Session, limit: int = 10):
-    return db.query(ActivityLog).order_by(ActivityLog.timestamp.desc()).limit(limit).all()
+def encode_activity_cursor(timestamp: datetime, log_id: int) -> str:
+    return f"{timestamp.isoformat()}_{log_id}"
+
+def decode_activity_cursor(cursor: str):
+    try:
+        timestamp, log_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (AttributeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def get_activity_feed(db: Session, owner_id: int = None, user_id: int = None,
+                      cursor: str = None, limit: int = ACTIVITY_FEED_PAGE_SIZE):
+    """
+    Newest-first activity for one owner's portfolio (owner_id) or one actor (user_id),
+    keyset-paginated on (timestamp, id) over ix_activity_logs_{owner,user}_id_timestamp.
+    Returns (entries, next_cursor); next_cursor is None on the last page.
+    """
+    if owner_id is not None:
+        scope = ActivityLog.owner_id == owner_id
+    elif user_id is not None:
+        scope = ActivityLog.user_id == user_id
+    else:
+        return [], None
+
+    query = (
+        db.query(ActivityLog.id, ActivityLog.timestamp, ActivityLog.action, ActivityLog.user_id, User.username)
+        .outerjoin(User, ActivityLog.user_id == User.id)
+        .filter(scope)
+    )
+    if cursor:
+        after_timestamp, after_id = decode_activity_cursor(cursor)
+        query = query.filter(or_(
+            ActivityLog.timestamp < after_timestamp,
+            and_(ActivityLog.timestamp == after_timestamp, ActivityLog.id < after_id)
+        ))
+    rows = query.order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(limit + 1).all()
+
+    entries = [
+        {"id": log_id, "timestamp": timestamp, "action": action, "user_id": actor_id, "username": username}
+        for log_id, timestamp, action, actor_id, username in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = entries[-1]
+        next_cursor = encode_activity_cursor(last["timestamp"], last["id"])
+    return entries, next_cursor
+
+def archive_activity_logs(db: Session, older_than_days: int, batch_size: int = ACTIVITY_ARCHIVE_BATCH_SIZE,
+                          now: datetime = None):
+    """
+    Move activity_logs rows older than `older_than_days` into activity_log_archives, oldest
+    first, one committed batch at a time so locks stay short. Each archive row holds one
+    owner's share of a batch as zlib-compressed JSON. Returns the number of rows archived.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        rows = (
+            db.query(ActivityLog.id, ActivityLog.timestamp, ActivityLog.action,
+                     ActivityLog.user, ActivityLog.user_id, ActivityLog.owner_id)
+            .filter(ActivityLog.timestamp < cutoff)
+            .order_by(ActivityLog.timestamp, ActivityLog.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return archived
+
+        per_owner = {}
+        for row in rows:
+            per_owner.setdefault(row.owner_id, []).append(row)
+        db.add_all([
+            ActivityLogArchive(
+                owner_id=owner_id,
+                first_timestamp=entries[0].timestamp,
+                last_timestamp=entries[-1].timestamp,
+                entry_count=len(entries),
+                payload=zlib.compress(json.dumps([
+                    {"id": e.id, "timestamp": e.timestamp.isoformat(), "action": e.action,
+                     "user": e.user, "user_id": e.user_id}
+                    for e in entries
+                ]).encode("utf-8"))
+            )
+            for owner_id, entries in per_owner.items()
+        ])
+        db.query(ActivityLog).filter(ActivityLog.id.in_([row.id for row in rows])).delete(synchronize_session=False)
+        db.commit()
+        archived += len(rows)
+
+def read_activity_archive(archive: ActivityLogArchive):
+    """Decompressed entries of one archive row."""
+    return json.loads(zlib.decompress(archive.payload).decode("utf-8"))
 
 # --------------------------
 # TENANT MANAGEMENT
@@ -293,6 +941,8 @@ def assign_tenant_to_property(db: Session, tenant_id: int, property_id: int,
     tenant.flat_no = flat_no
     tenant.room_no = room_no
     db.commit()
+    invalidate_user_scope(tenant.id)
+    invalidate_principal(tenant.id)
     db.refresh(tenant)
     return tenant
 
@@ -306,26 +956,10 @@ def get_tenant_property(db, tenant_id: int):
         return None
     return db.query(Property).filter(Property.id == tenant.property_id).first()
 
-from app.utils import save_file
-
-import os
-import shutil
 from fastapi import UploadFile
 from sqlalchemy.orm import Session
 from app.models import Appliance
-
-# Helper function to save uploaded files
-def save_uploaded_file(file: UploadFile, prefix: str):
-    if file and file.filename:
-        filename = f"{prefix}_{file.filename}".replace(" ", "_")
-        save_dir = "app/static/images"
-        os.makedirs(save_dir, exist_ok=True)
-        file_path = os.path.join(save_dir, filename)
-        with open(file_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
-        file.file.close()
-        return filename
-    return None
+from app.image_store import image_store
 
 # Function to create appliance with images
 def create_appliance_with_images(
@@ -342,17 +976,24 @@ def create_appliance_with_images(
     front_file: UploadFile = None,
     detail_file: UploadFile = None
 ):
-    # Save images and get filenames
-    front_filename = save_uploaded_file(front_file, "front")
-    detail_filename = save_uploaded_file(detail_file, "detail")
+    # Save images, once per distinct content (see app.image_store), and get their blob filenames
+    front = image_store.store(front_file)
+    try:
+        detail = image_store.store(detail_file)
+    except HTTPException:
+        image_store.discard(front)
+        raise
+    front_filename = front.filename if front else None
+    detail_filename = detail.filename if detail else None
 
     # Create appliance record
     new_appliance = Appliance(
         user_id=user_id,
         name=name,
+        appliance_type=derive_appliance_type(name),
         model=model,
         color=color,
-        status=status,
+        status=normalize_appliance_status(status),
         warranty_expiry=warranty_expiry,
         property_id=property_id,
         floor_id=floor_id,
@@ -362,6 +1003,11 @@ def create_appliance_with_images(
     )
 
     db.add(new_appliance)
+    _apply_snapshot_delta(
+        db, get_property_by_id(db, property_id),
+        total_appliance_count=1,
+        appliances_expiring_count=int(_is_expiring(warranty_expiry))
+    )
     db.commit()
     db.refresh(new_appliance)
     return new_appliance
@@ -0,0 +1,90 @@
+# app/crud_async.py
+#
+# Async counterparts of the hot functions in app/crud.py, for `async def` routes.
+# Reads are native AsyncSession queries. Writes call the sync crud function through
+# AsyncSession.run_sync, so normalization, snapshot counters and cache
+# invalidation stay defined in one place.
+
+from datetime import date
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.models import User, Property, Floor, Appliance
+
+# --------------------------
+# USERS
+# --------------------------
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    return await db.scalar(select(User).where(User.username == username))
+
+# --------------------------
+# PROPERTIES / FLOORS
+# --------------------------
+async def get_property_by_id(db: AsyncSession, property_id: int):
+    return await db.get(Property, property_id)
+
+async def get_properties_by_owner(db: AsyncSession, owner_id: int):
+    result = await db.scalars(select(Property).where(Property.owner_id == owner_id))
+    return result.all()
+
+async def get_all_properties(db: AsyncSession):
+    result = await db.scalars(select(Property))
+    return result.all()
+
+async def get_floors_by_property(db: AsyncSession, property_id: int):
+    result = await db.scalars(select(Floor).where(Floor.property_id == property_id))
+    return result.all()
+
+async def create_floor(db: AsyncSession, floor_number: str, property_id: int,
+                       floor_plan: str = None, extracted_details: str = None):
+    return await db.run_sync(
+        crud.create_floor,
+        floor_number=floor_number,
+        property_id=property_id,
+        floor_plan=floor_plan,
+        extracted_details=extracted_details
+    )
+
+# --------------------------
+# APPLIANCES
+# --------------------------
+async def count_appliances_by_owner(db: AsyncSession, owner_id: int) -> int:
+    return await db.scalar(
+        select(func.count(Appliance.id))
+        .join(Property, Appliance.property_id == Property.id)
+        .where(Property.owner_id == owner_id)
+    )
+
+async def create_appliance(
+    db: AsyncSession, user_id: int, name: str, model: str, color: str,
+    status: str, warranty_expiry: date, property_id: int, floor_id: int,
+    location: str, front_image: str = None, detail_image: str = None
+):
+    return await db.run_sync(
+        crud.create_appliance,
+        user_id=user_id,
+        name=name,
+        model=model,
+        color=color,
+        status=status,
+        warranty_expiry=warranty_expiry,
+        property_id=property_id,
+        floor_id=floor_id,
+        location=location,
+        front_image=front_image,
+        detail_image=detail_image
+    )
+
+# --------------------------
+# DASHBOARD / ACTIVITY
+# --------------------------
+async def get_dashboard_snapshot(db: AsyncSession, user: User):
+    return await db.run_sync(crud.get_dashboard_snapshot, user)
+
+async def log_activity(db: AsyncSession, user_id: int, action: str, owner_id: int = None):
+    return await db.run_sync(crud.log_activity, user_id=user_id, action=action, owner_id=owner_id)
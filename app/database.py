@@ -1,13 +1,43 @@
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 from dotenv import load_dotenv
 
+from app.pool_metrics import InstrumentedQueuePool, InstrumentedAsyncQueuePool, instrument_engine
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# --------------------------
+# Pool configuration (env driven)
+# --------------------------
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Render drops idle connections; recycle before that and ping on checkout
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+def pool_options(url, is_async: bool = False):
+    """Engine kwargs for the configured pool. In-memory SQLite keeps its single-connection pool."""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+instrument_engine(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -18,3 +48,67 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# --------------------------
+# Read replica (optional; falls back to the primary)
+# --------------------------
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+# After a write, this many of the user's following read-routed requests stay on the primary
+READ_YOUR_WRITES_REQUESTS = int(os.getenv("READ_YOUR_WRITES_REQUESTS", "3"))
+READ_PIN_SESSION_KEY = "reads_on_primary"
+
+if READ_DATABASE_URL:
+    read_engine = create_engine(READ_DATABASE_URL, **pool_options(READ_DATABASE_URL))
+    instrument_engine(read_engine, "replica")
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+def pin_reads_to_primary(request: Request):
+    """Route the next READ_YOUR_WRITES_REQUESTS reads of this browser session to the primary."""
+    if "session" in request.scope and READ_YOUR_WRITES_REQUESTS > 0:
+        request.session[READ_PIN_SESSION_KEY] = READ_YOUR_WRITES_REQUESTS
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica, unless a recent write pinned this user to the primary."""
+    session_factory = ReadSessionLocal
+    if "session" in request.scope:
+        pinned = request.session.get(READ_PIN_SESSION_KEY, 0)
+        if pinned:
+            session_factory = SessionLocal
+            if pinned > 1:
+                request.session[READ_PIN_SESSION_KEY] = pinned - 1
+            else:
+                request.session.pop(READ_PIN_SESSION_KEY)
+
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# --------------------------
+# Async engine (asyncpg for Postgres, aiosqlite for local SQLite)
+# --------------------------
+def to_async_url(url: str):
+    """Rewrite a sync DATABASE_URL for the matching async driver."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        query = dict(url.query)
+        # asyncpg takes `ssl` instead of libpq's `sslmode`
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        return url.set(drivername="postgresql+asyncpg", query=query)
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+async_engine = create_async_engine(to_async_url(DATABASE_URL), **pool_options(DATABASE_URL, is_async=True))
+instrument_engine(async_engine.sync_engine, "primary_async")
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,309 @@
+# app/email_outbox.py
+#
+# Transactional outbox for outbound email. Routes add an email_outbox row to their
+# own session (enqueue_email), so the email exists if and only if the change that
+# triggered it commits, and the request never waits on Brevo. A background worker
+# claims due rows in batches and posts them over one keep-alive HTTP client, at
+# most EMAIL_OUTBOX_CONCURRENCY at a time, retrying 429/5xx/network errors with
+# exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS. Bulk sends (enqueue_batch)
+# go out as Brevo multi-recipient calls (messageVersions, per-recipient params),
+# up to EMAIL_BATCH_MAX_RECIPIENTS per call.
+#
+# Every app worker runs a drainer; on Postgres they claim disjoint rows with
+# FOR UPDATE SKIP LOCKED. A claimed row is leased: if its worker dies mid-send,
+# the row becomes due again when the lease runs out.
+#
+# EMAIL_API_URL points the worker somewhere other than Brevo, e.g. the local stub
+# in benchmarks/email_stub.py.
+
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event, select, update, func
+from sqlalchemy.orm import Session
+
+from app.background import PeriodicWorker, delete_in_batches
+from app.database import engine
+from app.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+EMAIL_API_URL = os.getenv("EMAIL_API_URL", "https://api.brevo.com/v3/smtp/email")
+BREVO_API_KEY = os.getenv("BREVO_API_KEY")
+SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+
+EMAIL_OUTBOX_CONCURRENCY = int(os.getenv("EMAIL_OUTBOX_CONCURRENCY", "4"))
+# Rows claimed per drain round; batched rows among them share API calls
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "100"))
+EMAIL_BATCH_MAX_RECIPIENTS = int(os.getenv("EMAIL_BATCH_MAX_RECIPIENTS", "100"))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "2"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+# First retry after this long, doubling per attempt up to EMAIL_OUTBOX_MAX_BACKOFF_SECONDS
+EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
+# Margin on top of the worst-case time to send a claimed round (waves of timeouts)
+EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "60"))
+EMAIL_OUTBOX_RETENTION_DAYS = float(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "7"))
+EMAIL_SEND_TIMEOUT = float(os.getenv("EMAIL_SEND_TIMEOUT", "10"))
+
+_WAKE_KEY = "email_outbox_pending"
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, html_content: str, sender_name: str = None) -> EmailOutbox:
+    """Add an email to the caller's session; it is sent once (and only if) the session commits."""
+    message = EmailOutbox(
+        to_email=to_email, subject=subject, html_content=html_content, sender_name=sender_name,
+        status="pending", attempts=0, next_attempt_at=datetime.utcnow(), created_at=datetime.utcnow(),
+    )
+    db.add(message)
+    db.info[_WAKE_KEY] = True
+    return message
+
+
+def enqueue_batch(db: Session, recipients, subject: str, html_template: str, batch_key: str,
+                  sender_name: str = None) -> int:
+    """
+    Queue one email per (to_email, params) in `recipients` with a single bulk INSERT.
+    `html_template` refers to params as {{ params.name }}; rows with the same
+    batch_key are sent together. Sent after the caller commits, like enqueue_email.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {"to_email": to_email, "subject": subject, "html_content": html_template, "sender_name": sender_name,
+         "batch_key": batch_key, "params": json.dumps(params), "status": "pending", "attempts": 0,
+         "next_attempt_at": now, "created_at": now}
+        for to_email, params in recipients
+    ]
+    if rows:
+        db.execute(EmailOutbox.__table__.insert(), rows)
+        db.info[_WAKE_KEY] = True
+    return len(rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_after_commit(session):
+    # Start sending right away instead of at the next poll
+    if session.info.pop(_WAKE_KEY, False):
+        email_outbox_worker.wake()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_after_rollback(session, previous_transaction):
+    session.info.pop(_WAKE_KEY, None)
+
+
+def backoff_seconds(attempts: int, base: float = EMAIL_OUTBOX_BACKOFF_SECONDS,
+                    cap: float = EMAIL_OUTBOX_MAX_BACKOFF_SECONDS) -> float:
+    """Delay before retry number `attempts`, with +-20% jitter so failed batches spread out."""
+    return min(cap, base * 2 ** max(attempts - 1, 0)) * random.uniform(0.8, 1.2)
+
+
+class EmailOutboxWorker:
+    def __init__(self, bind=engine, api_url: str = EMAIL_API_URL, concurrency: int = EMAIL_OUTBOX_CONCURRENCY,
+                 batch_size: int = EMAIL_OUTBOX_BATCH_SIZE, poll_interval: float = EMAIL_OUTBOX_POLL_INTERVAL,
+                 max_attempts: int = EMAIL_OUTBOX_MAX_ATTEMPTS, timeout: float = EMAIL_SEND_TIMEOUT,
+                 max_recipients: int = EMAIL_BATCH_MAX_RECIPIENTS):
+        self.bind = bind
+        self.api_url = api_url
+        self.concurrency = max(concurrency, 1)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.max_recipients = max(max_recipients, 1)
+        self._client = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._drainer = PeriodicWorker("email-outbox", self._tick, poll_interval, join_timeout=timeout + 5)
+        self._last_purge = 0.0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_error = None
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                # One keep-alive connection per concurrent send, reused across batches
+                self._client = httpx.Client(
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+                )
+                self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="email-outbox")
+            return self._client, self._executor
+
+    def _group(self, rows) -> list:
+        """Split claimed rows into API calls: one per plain email, chunks per batch."""
+        calls, batches = [], {}
+        for row in rows:
+            if row.batch_key:
+                batches.setdefault((row.batch_key, row.subject, row.sender_name, row.html_content), []).append(row)
+            else:
+                calls.append([row])
+        for batch in batches.values():
+            calls.extend(batch[i:i + self.max_recipients] for i in range(0, len(batch), self.max_recipients))
+        return calls
+
+    def _claim(self, now: datetime) -> list:
+        """Lease a round of due rows to this worker. Returns them grouped into API calls."""
+        with self.bind.begin() as conn:
+            rows = conn.execute(
+                select(EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.html_content,
+                       EmailOutbox.sender_name, EmailOutbox.batch_key, EmailOutbox.params, EmailOutbox.attempts)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not rows:
+                return []
+            calls = self._group(rows)
+            # Long enough for every call to time out, `concurrency` at a time, before anyone else retries
+            lease = math.ceil(len(calls) / self.concurrency) * self.timeout + EMAIL_OUTBOX_LEASE_SECONDS
+            conn.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([row.id for row in rows]))
+                .values(attempts=EmailOutbox.attempts + 1, next_attempt_at=now + timedelta(seconds=lease))
+            )
+        return calls
+
+    def _payload(self, rows) -> dict:
+        first = rows[0]
+        payload = {
+            "sender": {"name": first.sender_name or "Property Management", "email": SENDER_EMAIL},
+            "subject": first.subject,
+            "htmlContent": first.html_content,
+        }
+        if first.batch_key:
+            payload["messageVersions"] = [
+                {"to": [{"email": row.to_email}], "params": json.loads(row.params or "{}")} for row in rows
+            ]
+        else:
+            payload["to"] = [{"email": first.to_email}]
+        return payload
+
+    def _deliver(self, rows):
+        """POST one API call. Returns (outcome, error, retry_after) with outcome sent / retry / failed."""
+        client, _ = self._get_client()
+        headers = {"accept": "application/json", "api-key": BREVO_API_KEY or "", "content-type": "application/json"}
+        try:
+            response = client.post(self.api_url, headers=headers, json=self._payload(rows))
+        except httpx.HTTPError as e:
+            return "retry", f"{type(e).__name__}: {e}", None
+        if response.status_code in (200, 201, 202):
+            return "sent", None, None
+        error = f"HTTP {response.status_code}: {response.text[:500]}"
+        if response.status_code == 429 or response.status_code >= 500:
+            retry_after = response.headers.get("retry-after")
+            return "retry", error, float(retry_after) if retry_after and retry_after.isdigit() else None
+        # Other 4xx (bad address, bad key) won't succeed on retry
+        return "failed", error, None
+
+    def _record(self, rows, results, now: datetime):
+        with self.bind.begin() as conn:
+            for row, (outcome, error, retry_after) in zip(rows, results):
+                attempts = row.attempts + 1
+                if outcome == "retry" and attempts >= self.max_attempts:
+                    outcome = "failed"
+                if outcome == "sent":
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                elif outcome == "retry":
+                    delay = max(backoff_seconds(attempts), retry_after or 0)
+                    values = {"last_error": error, "next_attempt_at": now + timedelta(seconds=delay)}
+                else:
+                    values = {"status": "failed", "last_error": error}
+                conn.execute(update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values))
+
+        with self._lock:
+            for row, (outcome, error, _) in zip(rows, results):
+                if outcome == "sent":
+                    self.sent += 1
+                else:
+                    self.last_error = error
+                    if outcome == "retry" and row.attempts + 1 < self.max_attempts:
+                        self.retried += 1
+                    else:
+                        self.failed += 1
+                        logger.error("Giving up on email %s to %s: %s", row.id, row.to_email, error)
+
+    def drain_once(self) -> int:
+        """Claim and send one round of due emails. Returns how many were claimed."""
+        calls = self._claim(datetime.utcnow())
+        if not calls:
+            return 0
+        _, executor = self._get_client()
+        # A call's outcome applies to every recipient in it
+        rows, results = [], []
+        for call, result in zip(calls, executor.map(self._deliver, calls)):
+            rows.extend(call)
+            results.extend([result] * len(call))
+        self._record(rows, results, datetime.utcnow())
+        return len(rows)
+
+    def drain(self) -> int:
+        """Send everything due now (scripts, or a manual flush). Returns how many were claimed."""
+        total = 0
+        while True:
+            claimed = self.drain_once()
+            total += claimed
+            if claimed < self.batch_size:
+                return total
+
+    def purge(self, before: datetime) -> int:
+        """Delete sent emails older than `before`, in batches."""
+        return delete_in_batches(
+            self.bind, EmailOutbox.id, (EmailOutbox.status == "sent", EmailOutbox.sent_at < before), 1000
+        )
+
+    def wake(self):
+        self._drainer.wake()
+
+    def start(self):
+        self._drainer.start()
+
+    def _tick(self):
+        self.drain()
+        if time.monotonic() - self._last_purge > 3600:
+            self._last_purge = time.monotonic()
+            self.purge(datetime.utcnow() - timedelta(days=EMAIL_OUTBOX_RETENTION_DAYS))
+
+    def stop(self):
+        """Stop draining; rows still pending are picked up by the next process to start."""
+        self._drainer.stop()
+        with self._lock:
+            client, self._client = self._client, None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if client is not None:
+            client.close()
+
+    def stats(self) -> dict:
+        """Queue depth and age from the table, plus this process's send counters."""
+        with self.bind.connect() as conn:
+            pending, oldest = conn.execute(
+                select(func.count(), func.min(EmailOutbox.created_at)).where(EmailOutbox.status == "pending")
+            ).one()
+            failed = conn.scalar(select(func.count()).where(EmailOutbox.status == "failed"))
+        with self._lock:
+            return {
+                "pending": pending,
+                "oldest_pending_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+                "failed": failed,
+                "sent_by_this_worker": self.sent,
+                "retried_by_this_worker": self.retried,
+                "failed_by_this_worker": self.failed,
+                "concurrency": self.concurrency,
+                "last_error": self.last_error,
+            }
+
+
+email_outbox_worker = EmailOutboxWorker()
@@ -1,9 +1,20 @@
-import pytesseract
-from PIL import Image
+import os
 import re
 
-# 🔹 Set path to Tesseract on your system
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# 🔹 Path to Tesseract on your system (TESSERACT_CMD overrides; default is the Windows install path)
+TESSERACT_CMD = os.getenv("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+
+_pytesseract = None
+
+def _load_ocr():
+    """Import pytesseract/PIL on first use; they are only needed when a floor plan is uploaded."""
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        _pytesseract = pytesseract
+    from PIL import Image
+    return _pytesseract, Image
 
 def extract_floorplan_details(image_path: str) -> dict:
     """
@@ -11,6 +22,8 @@ def extract_floorplan_details(image_path: str) -> dict:
     Returns a dictionary with counts of rooms, kitchens, bathrooms, etc.
     """
     try:
+        pytesseract, Image = _load_ocr()
+
         # Open the uploaded floorplan image
         img = Image.open(image_path)
         text = pytesseract.image_to_string(img).lower()
@@ -0,0 +1,196 @@
+# app/image_store.py
+#
+# Appliance photos stored once per distinct content. An upload is streamed to disk
+# by app.uploads (size cap, SHA-256 computed on the way through) and then renamed
+# to <sha256><ext>; if that content is already stored the new copy is dropped and
+# the existing filename is used, so the same photo uploaded for a hundred
+# identical units is one file. image_blobs has a row per file whose ref_count is
+# kept in step, by mapper events, with the Appliance.front_image/detail_image and
+# ApplianceImage.image_path values that name it (cascade deletes included).
+#
+# A daemon thread deletes blobs that have had no references for
+# IMAGE_GC_GRACE_SECONDS. The grace period covers the gap between storing an
+# image and saving the appliance that uses it. A request that fails in that gap
+# discards what it stored straight away; the collector catches anything left over.
+
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import event, inspect, select, update, insert
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.background import PeriodicWorker, delete_in_batches
+from app.database import engine
+from app.models import ImageBlob, Appliance, ApplianceImage
+from app.uploads import UPLOAD_KINDS, StoredUpload, save_upload, discard_upload
+
+IMAGE_GC_INTERVAL = float(os.getenv("IMAGE_GC_INTERVAL", "3600"))
+IMAGE_GC_GRACE_SECONDS = float(os.getenv("IMAGE_GC_GRACE_SECONDS", "3600"))
+IMAGE_GC_BATCH = int(os.getenv("IMAGE_GC_BATCH", "500"))
+
+# Columns holding a blob filename, per model
+_IMAGE_COLUMNS = {
+    Appliance: ("front_image", "detail_image"),
+    ApplianceImage: ("image_path",),
+}
+
+
+class StoredImage(NamedTuple):
+    filename: str  # the blob's name inside app/static/images
+    sha256: str
+    # The updated_at this upload stamped on the blob; discard() only removes the blob
+    # if nothing has touched it since
+    stamped_at: datetime
+
+
+def blob_filename(sha256: str, extension: str) -> str:
+    return f"{sha256}{extension.lower()}"
+
+
+class ImageStore:
+    def __init__(self, bind=engine, directory: str = UPLOAD_KINDS["image"].directory,
+                 gc_interval: float = IMAGE_GC_INTERVAL, grace_seconds: float = IMAGE_GC_GRACE_SECONDS,
+                 gc_batch: int = IMAGE_GC_BATCH):
+        self.bind = bind
+        self.directory = directory
+        self.grace_seconds = grace_seconds
+        self.gc_batch = gc_batch
+        self._collector = PeriodicWorker("image-gc", self.collect, gc_interval)
+
+    def store(self, upload: UploadFile) -> StoredImage:
+        """
+        Save an uploaded image as a blob, or None when no file was sent. Same 413/415
+        errors as app.uploads.save_upload. Blocking: call store_async from async routes.
+        """
+        stored = save_upload(upload, "image")
+        if stored is None:
+            return None
+        try:
+            return self._adopt(stored)
+        except BaseException:
+            discard_upload(stored)
+            raise
+
+    async def store_async(self, upload: UploadFile) -> StoredImage:
+        return await run_in_threadpool(self.store, upload)
+
+    def _adopt(self, stored: StoredUpload) -> StoredImage:
+        """Turn a freshly written upload into a blob, or drop it in favour of an identical one."""
+        for _ in range(3):
+            try:
+                with self.bind.begin() as conn:
+                    now = datetime.utcnow()
+                    # Locked, so this waits for a collector that is deleting the same blob
+                    existing = conn.scalar(
+                        select(ImageBlob.filename).where(ImageBlob.sha256 == stored.sha256).with_for_update()
+                    )
+                    if existing is not None:
+                        # Touching updated_at holds off the collector until the appliance is saved
+                        touched = conn.execute(
+                            update(ImageBlob).where(ImageBlob.sha256 == stored.sha256).values(updated_at=now)
+                        ).rowcount
+                        if not touched:
+                            continue  # collected in between; store it again
+                        discard_upload(stored)
+                        return StoredImage(existing, stored.sha256, now)
+                    filename = blob_filename(stored.sha256, os.path.splitext(stored.filename)[1])
+                    conn.execute(insert(ImageBlob).values(
+                        sha256=stored.sha256, filename=filename, size=stored.size,
+                        ref_count=0, created_at=now, updated_at=now,
+                    ))
+                    os.replace(stored.path, os.path.join(self.directory, filename))
+                    return StoredImage(filename, stored.sha256, now)
+            except IntegrityError:
+                # A concurrent upload of the same content inserted first; use its blob
+                continue
+        raise HTTPException(status_code=503, detail="Could not store the image, please try again")
+
+    def _unlink_files(self, rows):
+        # Called before the delete commits, while an upload of the same content is still waiting on the row
+        for _, filename in rows:
+            try:
+                os.unlink(os.path.join(self.directory, filename))
+            except FileNotFoundError:
+                pass
+
+    def _delete_blobs(self, conditions, batch_size: int) -> int:
+        return delete_in_batches(
+            self.bind, ImageBlob.sha256, conditions, batch_size,
+            returning=(ImageBlob.filename,), on_deleted=self._unlink_files,
+        )
+
+    def discard(self, image: StoredImage):
+        """
+        Remove an image stored earlier in a request that then failed, unless something
+        references it or another upload has reused it since.
+        """
+        if image is not None:
+            self._delete_blobs((
+                ImageBlob.sha256 == image.sha256,
+                ImageBlob.ref_count <= 0,
+                ImageBlob.updated_at == image.stamped_at,
+            ), batch_size=1)
+
+    async def discard_async(self, image: StoredImage):
+        await run_in_threadpool(self.discard, image)
+
+    def collect(self) -> int:
+        """Delete blobs unreferenced for the grace period, files included. Returns how many went."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.grace_seconds)
+        return self._delete_blobs((ImageBlob.ref_count <= 0, ImageBlob.updated_at < cutoff), self.gc_batch)
+
+    def start_collector(self):
+        self._collector.start()
+
+    def stop_collector(self):
+        self._collector.stop()
+
+
+image_store = ImageStore()
+
+
+# --------------------------
+# REFERENCE COUNTING
+# --------------------------
+def _adjust_refs(connection, deltas: Counter):
+    now = datetime.utcnow()
+    for filename, delta in deltas.items():
+        # Filenames without a blob (images from before content addressing) match nothing
+        if filename and delta:
+            connection.execute(
+                update(ImageBlob).where(ImageBlob.filename == filename)
+                .values(ref_count=ImageBlob.ref_count + delta, updated_at=now)
+            )
+
+
+def _after_insert(mapper, connection, target):
+    _adjust_refs(connection, Counter(getattr(target, column) for column in _IMAGE_COLUMNS[mapper.class_]))
+
+
+def _after_update(mapper, connection, target):
+    state, deltas = inspect(target), Counter()
+    for column in _IMAGE_COLUMNS[mapper.class_]:
+        history = state.attrs[column].history
+        for filename in history.added:
+            deltas[filename] += 1
+        # Empty if the old value was never loaded; the old blob then just keeps a reference
+        for filename in history.deleted:
+            deltas[filename] -= 1
+    _adjust_refs(connection, deltas)
+
+
+def _after_delete(mapper, connection, target):
+    deltas = Counter()
+    for column in _IMAGE_COLUMNS[mapper.class_]:
+        deltas[getattr(target, column)] -= 1
+    _adjust_refs(connection, deltas)
+
+
+for _model in _IMAGE_COLUMNS:
+    event.listen(_model, "after_insert", _after_insert)
+    event.listen(_model, "after_update", _after_update)
+    event.listen(_model, "after_delete", _after_delete)
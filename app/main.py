@@ -1,14 +1,55 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
 # --- Import all your route files ---
-from app.routes import auth_routes, dashboard_routes, floor_routes, otp_routes, tenant_routes, vendor_routes
-from app.database import engine, Base
+from app.routes import auth_routes, dashboard_routes, floor_routes, otp_routes, tenant_routes, vendor_routes, internal_routes, token_routes
+from app.database import pin_reads_to_primary, async_engine
+from app.schema_check import prepare_schema
+from app.query_stats import query_stats_middleware
+from app.activity_log import activity_log_sink
+from app.password_pool import password_pool
+from app.otp_store import otp_service
+from app.email_outbox import email_outbox_worker
+from app.image_store import image_store
+
+# ✅ Startup / shutdown hooks
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Verify the schema against the Alembic head (or create_all on local SQLite); see app.schema_check
+    prepare_schema()
+    # Fork the bcrypt workers while the process is still single-threaded
+    password_pool.start()
+    # Delete expired OTP codes in the background
+    otp_service.start_sweeper()
+    # Send queued emails (and anything left pending by a previous run)
+    email_outbox_worker.start()
+    # Delete stored images nothing has referenced for a while
+    image_store.start_collector()
+    yield
+    image_store.stop_collector()
+    email_outbox_worker.stop()
+    otp_service.stop_sweeper()
+    # Write out buffered activity log entries before the worker exits
+    activity_log_sink.stop()
+    password_pool.shutdown()
+    # Close pooled async connections (aiosqlite keeps a thread per connection)
+    await async_engine.dispose()
 
 # ✅ Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# ✅ Read-your-writes: after a successful write, keep this user's next reads on the primary.
+# Registered before SessionMiddleware so it runs inside it and can touch request.session.
+@app.middleware("http")
+async def read_your_writes(request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        pin_reads_to_primary(request)
+    return response
 
 # ✅ Add session middleware
 app.add_middleware(
@@ -19,12 +60,12 @@ app.add_middleware(
     https_only=False  # True only in production with HTTPS
 )
 
+# ✅ Per-request SQL counts, Server-Timing header and N+1 warnings (outermost, so it sees everything)
+app.middleware("http")(query_stats_middleware)
+
 # ✅ Serve static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# ✅ Auto-create tables
-Base.metadata.create_all(bind=engine)
-
 # ✅ Register routers
 # Since owner routes are inside auth_routes.py, no separate owner_routes import is needed
 app.include_router(auth_routes.router)         # includes /owner/invite_tenant_page
@@ -33,6 +74,8 @@ app.include_router(floor_routes.router)
 app.include_router(otp_routes.router)
 app.include_router(tenant_routes.router)
 app.include_router(vendor_routes.router)
+app.include_router(internal_routes.router)
+app.include_router(token_routes.router)        # /api/token bearer tokens
 
 # ✅ Redirect root to /login
 @app.get("/")
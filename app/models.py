@@ -3,7 +3,7 @@ from datetime import datetime, date
 from enum import Enum as PyEnum
 from sqlalchemy import (
     Column, Integer, String, ForeignKey, DateTime,
-    Boolean, Date, Text, UniqueConstraint, Float, Enum
+    Boolean, Date, Text, UniqueConstraint, Float, Enum, Index, LargeBinary, func
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -30,6 +30,11 @@ class QueryStatus(str, PyEnum):
     pending = "pending"
     resolved = "resolved"
 
+class ApplianceStatus(str, PyEnum):
+    working = "Working"
+    not_working = "Not Working"
+    warranty_expired = "Warranty Expired"
+
 # ----------------------
 # User model
 # ----------------------
@@ -46,6 +51,7 @@ class User(Base):
     password_hash = Column(String(255), nullable=True)
     role = Column(String(50), default="tenant")  # owner / manager / tenant / vendor
 
+    # Legacy; OTPs now live in otp_codes (app.otp_store) and these are no longer written
     otp = Column(String(20), nullable=True)
     otp_expiry = Column(DateTime, nullable=True)
     is_verified = Column(Boolean, default=False)
@@ -62,7 +68,7 @@ class User(Base):
     appliances = relationship("Appliance", back_populates="user", cascade="all, delete-orphan")
     properties_owned = relationship("Property", back_populates="owner", foreign_keys="Property.owner_id")
     properties_managed = relationship("Property", back_populates="manager", foreign_keys="Property.manager_id")
-    activity_logs = relationship("ActivityLog", back_populates="user_obj", cascade="all, delete-orphan")
+    activity_logs = relationship("ActivityLog", back_populates="user_obj", cascade="all, delete-orphan", foreign_keys="ActivityLog.user_id")
 
     # Issues reported by tenant
     issues_reported = relationship("Issue", back_populates="tenant", cascade="all, delete-orphan", foreign_keys="Issue.tenant_id")
@@ -73,6 +79,13 @@ class User(Base):
     # Queries raised by tenant
     tenant_queries = relationship("TenantQuery", back_populates="reported_by", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Role listings and tenants-of-property lookups
+        Index("ix_users_role_property_id", "role", "property_id"),
+        # Case-insensitive email lookups (tenant_import's duplicate check)
+        Index("ix_users_email_lower", func.lower(email)),
+    )
+
 # ----------------------
 # Property model
 # ----------------------
@@ -97,7 +110,11 @@ class Property(Base):
     tenant_queries = relationship("TenantQuery", back_populates="property", cascade="all, delete-orphan")
     issues = relationship("Issue", back_populates="property", cascade="all, delete-orphan")
 
-    __table_args__ = (UniqueConstraint('name', 'address', name='uix_name_address'),)
+    __table_args__ = (
+        UniqueConstraint('name', 'address', name='uix_name_address'),
+        Index("ix_properties_owner_id", "owner_id"),
+        Index("ix_properties_manager_id", "manager_id"),
+    )
 
 # ----------------------
 # Floor model
@@ -115,6 +132,10 @@ class Floor(Base):
     property = relationship("Property", back_populates="floors")
     appliances = relationship("Appliance", back_populates="floor", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_floors_property_id_floor_number", "property_id", "floor_number"),
+    )
+
 # ----------------------
 # Appliance model
 # ----------------------
@@ -127,10 +148,11 @@ class Appliance(Base):
     floor_id = Column(Integer, ForeignKey("floors.id"), nullable=True)
 
     name = Column(String(100), nullable=False)
+    appliance_type = Column(String(100), nullable=True)  # derived from name, see crud.derive_appliance_type
     model = Column(String(100), nullable=True)
     color = Column(String(50), nullable=True)
-    status = Column(String(50), nullable=True)
-    warranty_expiry = Column(Date, nullable=True)
+    status = Column(Enum(ApplianceStatus), default=ApplianceStatus.not_working, nullable=True)
+    warranty_expiry = Column(Date, nullable=True, index=True)
     location = Column(String(255), nullable=True)
 
     front_image = Column(String(255), nullable=True)
@@ -143,6 +165,12 @@ class Appliance(Base):
     queries = relationship("TenantQuery", back_populates="appliance", cascade="all, delete-orphan")
     issues = relationship("Issue", back_populates="appliance")
 
+    __table_args__ = (
+        # Scoped warranty range scans (crud.get_warranty_alerts)
+        Index("ix_appliances_property_warranty_expiry", "property_id", "warranty_expiry"),
+        Index("ix_appliances_property_id_floor_id", "property_id", "floor_id"),
+    )
+
 # ----------------------
 # ApplianceImage model
 # ----------------------
@@ -167,8 +195,33 @@ class ActivityLog(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
     user = Column(String(100), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    # Owner whose portfolio the action touched; scopes the owner's activity feed
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    user_obj = relationship("User", back_populates="activity_logs", foreign_keys=[user_id])
+
+    __table_args__ = (
+        # Retention job: oldest entries first
+        Index("ix_activity_logs_timestamp", "timestamp"),
+        # Keyset feeds (crud.get_activity_feed), newest first
+        Index("ix_activity_logs_owner_id_timestamp", "owner_id", "timestamp", "id"),
+        Index("ix_activity_logs_user_id_timestamp", "user_id", "timestamp", "id"),
+    )
 
-    user_obj = relationship("User", back_populates="activity_logs")
+# ----------------------
+# ActivityLogArchive model
+# ----------------------
+class ActivityLogArchive(Base):
+    """A batch of expired activity_logs rows for one owner, stored as zlib-compressed JSON."""
+    __tablename__ = "activity_log_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    first_timestamp = Column(DateTime, nullable=False)
+    last_timestamp = Column(DateTime, nullable=False)
+    entry_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 # ----------------------
 # Issue model
@@ -195,6 +248,11 @@ class Issue(Base):
     vendor = relationship("User", back_populates="issues_assigned", foreign_keys=[vendor_id])
     appliance = relationship("Appliance", back_populates="issues", foreign_keys=[appliance_id])
 
+    __table_args__ = (
+        Index("ix_issues_vendor_id_status", "vendor_id", "status"),
+        Index("ix_issues_property_id", "property_id"),
+    )
+
 # ----------------------
 # TenantQuery model
 # ----------------------
@@ -214,6 +272,10 @@ class TenantQuery(Base):
     property = relationship("Property", back_populates="tenant_queries")
     appliance = relationship("Appliance", back_populates="queries")
 
+    __table_args__ = (
+        Index("ix_tenant_queries_reported_by_id", "reported_by_id"),
+    )
+
 # ----------------------
 # PendingTenant model
 # ----------------------
@@ -234,3 +296,134 @@ class PendingTenant(Base):
 
     property = relationship("Property")
     floor = relationship("Floor")
+
+    __table_args__ = (
+        # Case-insensitive email lookups (tenant_import's duplicate check)
+        Index("ix_pending_tenants_email_lower", func.lower(email)),
+    )
+
+# ----------------------
+# TenantImport model
+# ----------------------
+class TenantImport(Base):
+    """One bulk tenant-invite upload and its running counts (see app.tenant_import)."""
+    __tablename__ = "tenant_imports"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    filename = Column(String(255), nullable=True)
+    status = Column(String(20), nullable=False, default="processing")  # processing / completed / failed
+
+    total_rows = Column(Integer, nullable=False, default=0)
+    invited = Column(Integer, nullable=False, default=0)
+    skipped_existing = Column(Integer, nullable=False, default=0)  # email already a user or pending invite
+    duplicates = Column(Integer, nullable=False, default=0)  # repeated within the file
+    invalid = Column(Integer, nullable=False, default=0)
+    errors = Column(Text, nullable=True)  # JSON list of {"row", "error"}, first few only
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    owner = relationship("User")
+
+# ----------------------
+# DashboardSnapshot model
+# ----------------------
+class DashboardSnapshot(Base):
+    __tablename__ = "dashboard_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False, index=True)
+
+    total_properties_count = Column(Integer, default=0, nullable=False)
+    total_floors_count = Column(Integer, default=0, nullable=False)
+    total_appliance_count = Column(Integer, default=0, nullable=False)
+    appliances_expiring_count = Column(Integer, default=0, nullable=False)
+
+    computed_on = Column(Date, nullable=True)  # day the expiring count is relative to
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User")
+
+# ----------------------
+# RateLimitBucket model
+# ----------------------
+class RateLimitBucket(Base):
+    """Token-bucket state shared by all workers when RATE_LIMIT_STORE=database (see app.rate_limit)."""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)  # "<route>:<ip|account>:<identity>"
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)  # epoch seconds of the last refill
+
+# ----------------------
+# OtpCode model
+# ----------------------
+class OtpCode(Base):
+    """One-time codes for email verification, password reset and OTP login (see app.otp_store)."""
+    __tablename__ = "otp_codes"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String(255), nullable=False)
+    purpose = Column(String(32), nullable=False)  # verify_email / reset_password / login
+    code = Column(String(20), nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)  # the sweeper's range scan
+
+    __table_args__ = (
+        # Verify and re-issue: one (email, purpose) prefix, unexpired codes only
+        Index("ix_otp_codes_email_purpose_expires_at", "email", "purpose", "expires_at"),
+    )
+
+# ----------------------
+# EmailOutbox model
+# ----------------------
+class EmailOutbox(Base):
+    """Outbound email, written in the transaction that triggers it and sent by app.email_outbox."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    html_content = Column(Text, nullable=False)
+    sender_name = Column(String(255), nullable=True)
+    # Bulk sends (e.g. tenant imports): html_content is a template over the JSON params,
+    # and due rows sharing a batch_key go out together in one multi-recipient API call
+    batch_key = Column(String(64), nullable=True, index=True)
+    params = Column(Text, nullable=True)
+
+    status = Column(String(20), nullable=False, default="pending")  # pending / sent / failed
+    attempts = Column(Integer, nullable=False, default=0)
+    # When a pending row may next be tried; while a worker holds it, the end of its lease
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The worker's claim query and the queue-depth gauge
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+# ----------------------
+# ImageBlob model
+# ----------------------
+class ImageBlob(Base):
+    """
+    One stored image file, named by its content hash (see app.image_store). Appliance
+    front/detail images and ApplianceImage paths hold the filename; ref_count is how
+    many of those point at it, kept up to date by mapper events.
+    """
+    __tablename__ = "image_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    filename = Column(String(255), nullable=False, unique=True)  # inside app/static/images
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Last upload or reference change; unreferenced blobs are collected a grace period after it
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # The collector's scan for unreferenced blobs
+        Index("ix_image_blobs_ref_count_updated_at", "ref_count", "updated_at"),
+    )
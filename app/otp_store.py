@@ -0,0 +1,159 @@
+# app/otp_store.py
+#
+# One-time codes (email verification, password reset, OTP login) kept out of the
+# users table, so requesting a code no longer rewrites and locks the hot user row.
+# Each (email, purpose) has at most one live code; issuing replaces it, and a
+# successful verify consumes it in the same statement that finds it.
+#
+# OTP_STORE=database (default) keeps codes in otp_codes, shared by every worker;
+# OTP_STORE=memory keeps them in this process (single-worker dev, scripts). A
+# daemon thread deletes expired codes in batches every OTP_SWEEP_INTERVAL seconds.
+
+import hmac
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert
+
+from app.background import PeriodicWorker, delete_in_batches
+from app.database import engine
+from app.models import OtpCode
+
+OTP_STORE = os.getenv("OTP_STORE", "database").lower()
+OTP_SWEEP_INTERVAL = float(os.getenv("OTP_SWEEP_INTERVAL", "60"))
+OTP_SWEEP_BATCH = int(os.getenv("OTP_SWEEP_BATCH", "500"))
+
+# Purposes, so a password-reset code can't be replayed as a login code
+VERIFY_EMAIL = "verify_email"
+RESET_PASSWORD = "reset_password"
+LOGIN = "login"
+
+
+def _normalize(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+class MemoryOtpStore:
+    """(email, purpose) -> (code, expires_at) in this process only."""
+
+    def __init__(self):
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def issue(self, email: str, purpose: str, code: str, expires_at: datetime, db=None):
+        with self._lock:
+            self._codes[(_normalize(email), purpose)] = (code, expires_at)
+
+    def consume(self, email: str, purpose: str, code: str, now: datetime) -> bool:
+        key = (_normalize(email), purpose)
+        with self._lock:
+            stored = self._codes.get(key)
+            if stored is None or stored[1] <= now or not hmac.compare_digest(stored[0], code):
+                return False
+            del self._codes[key]
+            return True
+
+    def sweep(self, now: datetime, batch_size: int) -> int:
+        deleted = 0
+        while True:
+            # Batches keep the lock hold short when a lot has expired at once
+            with self._lock:
+                expired = [key for key, (_, expires_at) in self._codes.items() if expires_at <= now][:batch_size]
+                for key in expired:
+                    del self._codes[key]
+            deleted += len(expired)
+            if len(expired) < batch_size:
+                return deleted
+
+    def clear(self):
+        with self._lock:
+            self._codes.clear()
+
+
+class DatabaseOtpStore:
+    """
+    Codes in the otp_codes table. Issue drops the previous code for the pair and
+    inserts the new one, in its own short transaction or the caller's; consume is a
+    single DELETE matched on the (email, purpose, expires_at) index, so a code can't
+    be used twice even by concurrent requests.
+    """
+
+    def __init__(self, bind=engine):
+        self.bind = bind
+
+    def issue(self, email: str, purpose: str, code: str, expires_at: datetime, db=None):
+        email = _normalize(email)
+        statements = (
+            delete(OtpCode).where(OtpCode.email == email, OtpCode.purpose == purpose),
+            insert(OtpCode).values(email=email, purpose=purpose, code=code, expires_at=expires_at),
+        )
+        if db is not None:
+            # Part of the caller's transaction (e.g. with the email that carries the code)
+            for statement in statements:
+                db.execute(statement)
+            return
+        with self.bind.begin() as conn:
+            for statement in statements:
+                conn.execute(statement)
+
+    def consume(self, email: str, purpose: str, code: str, now: datetime) -> bool:
+        with self.bind.begin() as conn:
+            return conn.execute(
+                delete(OtpCode).where(
+                    OtpCode.email == _normalize(email),
+                    OtpCode.purpose == purpose,
+                    OtpCode.expires_at > now,
+                    OtpCode.code == code,
+                )
+            ).rowcount > 0
+
+    def sweep(self, now: datetime, batch_size: int) -> int:
+        return delete_in_batches(self.bind, OtpCode.id, (OtpCode.expires_at <= now,), batch_size)
+
+    def clear(self):
+        with self.bind.begin() as conn:
+            conn.execute(delete(OtpCode))
+
+
+def make_store(kind: str = OTP_STORE):
+    if kind == "database":
+        return DatabaseOtpStore()
+    if kind == "memory":
+        return MemoryOtpStore()
+    raise ValueError(f"Unknown OTP_STORE {kind!r} (expected database or memory)")
+
+
+class OtpService:
+    def __init__(self, store, sweep_interval: float = OTP_SWEEP_INTERVAL, sweep_batch: int = OTP_SWEEP_BATCH):
+        self.store = store
+        self.sweep_interval = sweep_interval
+        self.sweep_batch = sweep_batch
+        self._sweeper = PeriodicWorker("otp-sweeper", self.sweep, sweep_interval)
+
+    def issue(self, email: str, purpose: str, code: str, minutes: float = 10, db=None):
+        """
+        Store `code` as the only live code for (email, purpose), valid for `minutes`.
+        With `db`, the database store writes through that session and the code is live
+        once the caller commits.
+        """
+        self.store.issue(email, purpose, code, datetime.utcnow() + timedelta(minutes=minutes), db=db)
+
+    def verify(self, email: str, purpose: str, code: str) -> bool:
+        """True, and the code is used up, if it matches the live unexpired code."""
+        if not email or not code:
+            return False
+        return self.store.consume(email, purpose, code.strip(), datetime.utcnow())
+
+    def sweep(self) -> int:
+        """Delete every expired code. Returns how many went."""
+        return self.store.sweep(datetime.utcnow(), self.sweep_batch)
+
+    def start_sweeper(self):
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._sweeper.stop()
+
+
+otp_service = OtpService(make_store())
@@ -0,0 +1,158 @@
+# app/password_pool.py
+#
+# bcrypt hashing and verification in a small dedicated process pool, so a login
+# burst burns its CPU outside the request thread pool instead of starving every
+# other route. In-flight work (running + queued) is capped; past the cap callers
+# get a 503 with Retry-After instead of queueing behind the burst.
+# PASSWORD_POOL_WORKERS=0 hashes inline in the calling thread (scripts, tests).
+
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
+
+_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(2, _CPUS))))
+# Jobs allowed to wait for a worker before new ones are turned away; at ~250 ms per
+# bcrypt call, 4 per worker keeps the worst-case wait around a second
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", str(4 * max(PASSWORD_POOL_WORKERS, 1))))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed(fn, *args):
+    # Runs in the worker: bcrypt time alone, without the wait for a free worker
+    started = time.perf_counter()
+    return fn(*args), time.perf_counter() - started
+
+
+class PasswordPool:
+    """
+    Bounded front for a ProcessPoolExecutor. The app forks the workers at startup,
+    before request threads exist; scripts get them lazily on first use. Fork rather
+    than spawn, because spawn re-runs the parent's __main__ in every worker.
+    """
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, max_queue: int = PASSWORD_POOL_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._avg_seconds = 0.25  # running estimate of one bcrypt call, for Retry-After
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context(method)
+                    )
+        return self._executor
+
+    def start(self):
+        """Start the workers now (app startup) instead of on the first password check."""
+        if self.workers > 0:
+            # A no-op job makes the executor fork all its workers
+            self._get_executor().submit(int).result()
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._in_flight * self._avg_seconds / max(self.workers, 1)))
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                retry_after = self._retry_after()
+                raise HTTPException(
+                    status_code=503,
+                    detail="Server busy, please retry shortly.",
+                    headers={"Retry-After": str(retry_after)}
+                )
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+            if not future.cancelled() and future.exception() is None:
+                self._avg_seconds = 0.9 * self._avg_seconds + 0.1 * future.result()[1]
+
+    def run(self, fn, *args):
+        """Run fn in the pool and wait for it (for sync routes and crud)."""
+        if self.workers <= 0:
+            return fn(*args)
+        return self._submit(fn, *args).result()[0]
+
+    async def run_async(self, fn, *args):
+        """Run fn in the pool without holding a thread while it waits (for async routes)."""
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+        result, _ = await asyncio.wrap_future(self._submit(fn, *args))
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self._avg_seconds * 1000, 1),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_pool = PasswordPool()
+
+
+def hash_password(password: str) -> str:
+    return password_pool.run(_hash, password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_pool.run(_verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run_async(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run_async(_verify, plain_password, hashed_password)
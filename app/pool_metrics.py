@@ -0,0 +1,146 @@
+# app/pool_metrics.py
+#
+# Connection-pool counters and checkout wait-time histograms, fed by pool event
+# hooks and reported by /internal/db-pool.
+
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+# Upper bounds (ms) of the wait-time histogram buckets; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Counters for one engine's pool. Updated from pool events, read by the metrics endpoint."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.wait_count = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def incr(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def observe_wait(self, wait_ms: float):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+            self.wait_buckets[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            buckets = {f"le_{bound}ms": count for bound, count in zip(WAIT_BUCKETS_MS, self.wait_buckets)}
+            buckets["le_inf"] = self.wait_buckets[-1]
+            data = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "avg": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                    "max": round(self.wait_max_ms, 3),
+                    "buckets": buckets,
+                },
+            }
+        # Live gauges only exist on queue pools (not on SQLite's singleton/static pools)
+        if isinstance(pool, QueuePool):
+            data.update(
+                pool_size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout_seconds=pool.timeout(),
+            )
+        data["status"] = pool.status()
+        return data
+
+
+class _TimedCheckoutMixin:
+    """
+    Times how long a checkout waits on the queue. The pool events fire only once a
+    connection is in hand, so the wait itself is measured around _do_get().
+    """
+
+    metrics: PoolMetrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.incr("timeouts")
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait((time.perf_counter() - started) * 1000)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+pool_metrics = {}
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    """Attach event hooks to engine's pool and register it under `name`."""
+    metrics = PoolMetrics(name)
+    pool = engine.pool
+    if isinstance(pool, _TimedCheckoutMixin):
+        pool.metrics = metrics
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.incr("connects")
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.incr("checkouts")
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.incr("checkins")
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr("invalidations")
+
+    pool_metrics[name] = (engine, metrics)
+    return metrics
+
+
+def collect_pool_metrics() -> dict:
+    return {name: metrics.snapshot(engine.pool) for name, (engine, metrics) in pool_metrics.items()}
@@ -0,0 +1,66 @@
+# app/principal.py
+#
+# Who the session user is (id, role, tenancy, verification), resolved once and
+# cached in-process so authenticating a request doesn't need a users query.
+
+import os
+
+from sqlalchemy.orm import Session
+
+from app.models import User
+from app.ttl_cache import TTLCache
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "300"))
+PRINCIPAL_CACHE_MAX_USERS = int(os.getenv("PRINCIPAL_CACHE_MAX_USERS", "10000"))
+
+
+class Principal:
+    """
+    Read-only snapshot of the user row fields routes and templates use for auth and
+    scoping. Immutable, so one cached instance can be shared by concurrent requests.
+    """
+
+    __slots__ = ("id", "username", "role", "property_id", "floor_id", "flat_no", "room_no", "is_verified")
+
+    def __init__(self, id: int, username: str, role: str, property_id: int = None, floor_id: int = None,
+                 flat_no: str = None, room_no: str = None, is_verified: bool = False):
+        for field, value in zip(self.__slots__, (id, username, role, property_id, floor_id,
+                                                 flat_no, room_no, bool(is_verified))):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Principal is read-only; update the user through crud instead of setting {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError("Principal is read-only")
+
+    def __repr__(self):
+        return f"Principal(id={self.id}, username={self.username!r}, role={self.role!r})"
+
+
+PRINCIPAL_COLUMNS = (
+    User.id, User.username, User.role, User.property_id, User.floor_id,
+    User.flat_no, User.room_no, User.is_verified,
+)
+
+
+# user_id -> Principal; writes in this process invalidate through invalidate_principal()
+principal_cache = TTLCache(PRINCIPAL_CACHE_TTL_SECONDS, PRINCIPAL_CACHE_MAX_USERS)
+
+
+def load_principal(db: Session, user_id: int):
+    """The cached Principal for user_id, reading only its columns on a miss. None if the user is gone."""
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation()
+        row = db.query(*PRINCIPAL_COLUMNS).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        principal_cache.set(user_id, principal, generation)
+    return principal
+
+
+def invalidate_principal(*user_ids):
+    """Drop cached principals after a user's role, tenancy, verification or password changes."""
+    principal_cache.invalidate(*[user_id for user_id in user_ids if user_id is not None])
@@ -0,0 +1,148 @@
+# app/query_stats.py
+#
+# Per-request SQL accounting: statement count, DB time and repeated statement
+# shapes, collected from cursor events and attached to the response as a
+# Server-Timing header. Requests over the thresholds are logged as suspected N+1s.
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Log a request that runs more statements than this
+SQL_STATEMENT_WARN_THRESHOLD = int(os.getenv("SQL_STATEMENT_WARN_THRESHOLD", "30"))
+# ...or that runs the same statement shape at least this many times
+SQL_REPEAT_WARN_THRESHOLD = int(os.getenv("SQL_REPEAT_WARN_THRESHOLD", "5"))
+
+_current_stats = ContextVar("query_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+|\$\d+)\s*,?)+\)")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals and expanded IN-lists collapsed so loop iterations compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("N", shape)
+    return _PARAM_LIST.sub("(...)", shape)
+
+
+class RequestQueryStats:
+    """Statements seen while handling one request."""
+
+    __slots__ = ("statements", "db_time", "fingerprints")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.statements += 1
+        self.db_time += elapsed
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int = None):
+        """(fingerprint, count) pairs executed at least `threshold` times, most frequent first."""
+        threshold = threshold or SQL_REPEAT_WARN_THRESHOLD
+        return [(shape, count) for shape, count in self.fingerprints.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.db_time * 1000:.1f};desc="{self.statements} queries"'
+
+
+class RouteQueryTotals:
+    """Running per-route totals, so regressions show up route by route at /internal/query-stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route: str, stats: RequestQueryStats, suspected: bool):
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "statements": 0, "max_statements": 0, "db_ms": 0.0, "suspected_n_plus_one": 0
+            })
+            totals["requests"] += 1
+            totals["statements"] += stats.statements
+            totals["max_statements"] = max(totals["max_statements"], stats.statements)
+            totals["db_ms"] += stats.db_time * 1000
+            totals["suspected_n_plus_one"] += int(suspected)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                route: dict(
+                    totals,
+                    db_ms=round(totals["db_ms"], 3),
+                    avg_statements=round(totals["statements"] / totals["requests"], 2)
+                )
+                for route, totals in self._routes.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_totals = RouteQueryTotals()
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+# Listen on the Engine class so the primary, replica and async engines are all covered
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_stats_started")
+    if stats is not None and started:
+        stats.record(statement, time.perf_counter() - started.pop())
+
+
+def _report(request, stats: RequestQueryStats):
+    route = request.scope.get("route")
+    route_name = f"{request.method} {route.path if route is not None else request.url.path}"
+    repeated = stats.repeated()
+    suspected = stats.statements > SQL_STATEMENT_WARN_THRESHOLD or bool(repeated)
+    route_totals.add(route_name, stats, suspected)
+    if suspected:
+        logger.warning(
+            "Suspected N+1 on %s: %d statements, %.1f ms in DB; repeated: %s",
+            route_name, stats.statements, stats.db_time * 1000,
+            "; ".join(f"{count}x {shape[:200]}" for shape, count in repeated[:3]) or "none",
+        )
+
+
+async def query_stats_middleware(request, call_next):
+    if not QUERY_STATS_ENABLED:
+        return await call_next(request)
+
+    stats = RequestQueryStats()
+    token = _current_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+    response.headers.append("Server-Timing", stats.server_timing())
+    _report(request, stats)
+    return response
@@ -0,0 +1,247 @@
+# app/rate_limit.py
+#
+# Token-bucket admission control for the auth endpoints that cost a bcrypt hash or
+# an outbound email. Each route has a bucket per client IP and one per account
+# (username, email or activation token). A request spends one token from each, and
+# only when both have one; otherwise it is refused with 429 + Retry-After and
+# neither bucket is charged.
+#
+# Limits are "<burst>/<seconds>" (burst tokens, refilled evenly over that many
+# seconds) and can be overridden per route and scope, e.g. RATE_LIMIT_LOGIN_IP=30/60
+# or RATE_LIMIT_REGISTER_ACCOUNT=off. Buckets live in process memory by default;
+# RATE_LIMIT_STORE=database keeps them in rate_limit_buckets so every worker
+# shares them.
+
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request
+from sqlalchemy import select, update, delete
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.database import engine
+from app.models import RateLimitBucket
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+# Proxies in front of the app that append to X-Forwarded-For (Render has one). The client
+# IP is the entry that many places from the end; anything before it is client-supplied.
+# 0 ignores the header and uses the socket peer.
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "1"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+DEFAULT_LIMITS = {
+    "login": {"ip": "20/60", "account": "5/60"},
+    "register": {"ip": "5/300", "account": "3/300"},
+    "forgot_password": {"ip": "5/300", "account": "3/900"},
+    "reset_password": {"ip": "10/300", "account": "5/900"},
+    "login_request_otp": {"ip": "5/300", "account": "3/900"},
+    "verify_otp": {"ip": "10/300", "account": "5/900"},
+    "activate": {"ip": "10/300", "account": "5/900"},
+}
+
+
+def parse_rate(value: str):
+    """Parse "10/60" into (capacity 10, refill 10/60 tokens per second); "off" disables the limit."""
+    if value.strip().lower() in ("off", "none", "0"):
+        return None
+    burst, seconds = value.split("/")
+    capacity = float(burst)
+    return capacity, capacity / float(seconds)
+
+
+def load_limits() -> dict:
+    limits = {}
+    for name, scopes in DEFAULT_LIMITS.items():
+        limits[name] = {}
+        for scope, default in scopes.items():
+            rate = parse_rate(os.getenv(f"RATE_LIMIT_{name.upper()}_{scope.upper()}", default))
+            if rate is not None:
+                limits[name][scope] = rate
+    return limits
+
+
+def _refill(tokens: float, updated_at: float, capacity: float, refill_per_second: float, now: float):
+    """Refill a bucket up to `now`. Returns (tokens in it, seconds until it has a whole token)."""
+    tokens = min(capacity, tokens + max(now - updated_at, 0.0) * refill_per_second)
+    if tokens >= 1:
+        return tokens, 0.0
+    return tokens, (1 - tokens) / refill_per_second
+
+
+def _spend(refilled: dict):
+    """
+    Given {key: (tokens, wait)} for every bucket a request needs, spend one token from
+    each if all have one. Returns ({key: tokens left}, seconds to wait, 0 if spent).
+    """
+    wait = max(wait for _, wait in refilled.values())
+    return {key: tokens - 1 if not wait else tokens for key, (tokens, _) in refilled.items()}, wait
+
+
+class MemoryBucketStore:
+    """Buckets in this process only, LRU-bounded; an evicted key just starts again with a full bucket."""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets, now: float = None) -> float:
+        """Spend a token from every (key, capacity, refill_per_second) bucket, or from none."""
+        now = time.time() if now is None else now
+        with self._lock:
+            refilled = {
+                key: _refill(*self._buckets.get(key, (capacity, now)), capacity, refill_per_second, now)
+                for key, capacity, refill_per_second in buckets
+            }
+            left, wait = _spend(refilled)
+            for key, tokens in left.items():
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBucketStore:
+    """
+    Buckets in the rate_limit_buckets table, shared by all workers. Each take() is one
+    short transaction that locks the bucket rows, in key order (SELECT ... FOR UPDATE
+    on Postgres; SQLite serializes writers anyway). Idle rows are purged now and then.
+    """
+
+    blocking = True
+
+    def __init__(self, bind=engine, purge_every: int = 1000, idle_seconds: float = 86400):
+        self.bind = bind
+        self.purge_every = purge_every
+        self.idle_seconds = idle_seconds
+
+    def _ensure_row(self, conn, key: str, capacity: float, now: float):
+        values = {"key": key, "tokens": capacity, "updated_at": now}
+        if conn.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif conn.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            try:
+                with conn.begin_nested():
+                    conn.execute(RateLimitBucket.__table__.insert().values(**values))
+            except IntegrityError:
+                pass
+            return
+        conn.execute(dialect_insert(RateLimitBucket).values(**values).on_conflict_do_nothing(index_elements=["key"]))
+
+    def take(self, buckets, now: float = None) -> float:
+        """Spend a token from every (key, capacity, refill_per_second) bucket, or from none."""
+        now = time.time() if now is None else now
+        with self.bind.begin() as conn:
+            refilled = {}
+            for key, capacity, refill_per_second in sorted(buckets):
+                self._ensure_row(conn, key, capacity, now)
+                tokens, updated_at = conn.execute(
+                    select(RateLimitBucket.tokens, RateLimitBucket.updated_at)
+                    .where(RateLimitBucket.key == key)
+                    .with_for_update()
+                ).one()
+                refilled[key] = _refill(tokens, updated_at, capacity, refill_per_second, now)
+            left, wait = _spend(refilled)
+            for key, tokens in left.items():
+                conn.execute(
+                    update(RateLimitBucket).where(RateLimitBucket.key == key).values(tokens=tokens, updated_at=now)
+                )
+        if random.randrange(self.purge_every) == 0:
+            self.purge(now - self.idle_seconds)
+        return wait
+
+    def purge(self, before: float) -> int:
+        """Delete buckets untouched since `before` (they would have refilled completely)."""
+        with self.bind.begin() as conn:
+            return conn.execute(delete(RateLimitBucket).where(RateLimitBucket.updated_at < before)).rowcount
+
+    def clear(self):
+        with self.bind.begin() as conn:
+            conn.execute(delete(RateLimitBucket))
+
+
+def make_store(kind: str = RATE_LIMIT_STORE):
+    if kind == "database":
+        return DatabaseBucketStore()
+    if kind == "memory":
+        return MemoryBucketStore()
+    raise ValueError(f"Unknown RATE_LIMIT_STORE {kind!r} (expected memory or database)")
+
+
+class RateLimiter:
+    def __init__(self, store, limits: dict):
+        self.store = store
+        self.limits = limits
+
+    def take(self, name: str, identities, now: float = None) -> float:
+        """
+        Spend a token from each (scope, identity) bucket of route `name`, only if all of
+        them have one. Returns seconds to wait, 0 if allowed.
+        """
+        buckets = []
+        for scope, identity in identities:
+            rate = self.limits.get(name, {}).get(scope)
+            if rate is not None and identity:
+                buckets.append((f"{name}:{scope}:{identity}", *rate))
+        if not buckets:
+            return 0.0
+        return self.store.take(buckets, now)
+
+
+rate_limiter = RateLimiter(make_store(), load_limits())
+
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_PROXY_HOPS > 0:
+        forwarded = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if forwarded:
+            return forwarded[-min(RATE_LIMIT_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(name: str, account_field: str = None, account_path_param: str = None):
+    """
+    Route dependency spending one token per request from `name`'s IP bucket and, when
+    the account can be read from form field `account_field` or path parameter
+    `account_path_param`, from its account bucket; both or neither.
+    """
+    async def check_rate_limit(request: Request):
+        if not RATE_LIMIT_ENABLED:
+            return
+        identities = [("ip", client_ip(request))]
+        account = None
+        if account_field:
+            # FastAPI has already parsed the form for the route's Form() params; this is cached
+            account = (await request.form()).get(account_field)
+        elif account_path_param:
+            account = request.path_params.get(account_path_param)
+        if isinstance(account, str) and account.strip():
+            identities.append(("account", account.strip().lower()))
+
+        if rate_limiter.store.blocking:
+            wait = await run_in_threadpool(rate_limiter.take, name, identities)
+        else:
+            wait = rate_limiter.take(name, identities)
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many attempts. Please wait and try again.",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    return check_rate_limit
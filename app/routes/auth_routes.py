@@ -1,17 +1,22 @@
 import random, os
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Request, Form, Depends, HTTPException
+from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File, Query
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app import crud
-from app.models import User, Property, Appliance, PendingTenant, Issue, IssueStatus
+from app.database import get_db, get_read_db, get_async_db
+from app import crud, crud_async
+from app.models import User, Property, Appliance, PendingTenant, Issue, IssueStatus, TenantImport
 from app.crud import create_user, get_user_by_email
-from app.utils import hash_password, verify_password, send_otp_email, get_current_user, send_activation_email
+from app.auth import get_current_user, require_scope
+from app.rate_limit import rate_limit
+from app.tenant_import import import_tenants, import_progress
+from app.otp_store import otp_service, VERIFY_EMAIL, RESET_PASSWORD
+from app.utils import verify_password_async, send_otp_email, verify_otp, send_activation_email
 import os
 
 
@@ -29,16 +34,19 @@ def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 
-@router.post("/login")
-def login_post(
+@router.post("/login", dependencies=[Depends(rate_limit("login", account_field="username"))])
+async def login_post(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = crud.get_user_by_username(db, username)
+    # Async so a login burst waits on the bcrypt process pool, not on request threads
+    user = await crud_async.get_user_by_username(db, username)
+    # Hand the connection back before the (slow) bcrypt check; the loaded row stays usable
+    await db.close()
 
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await verify_password_async(password, user.password_hash):
         return templates.TemplateResponse(
             "login.html",
             {"request": request, "error": "Invalid username or password."}
@@ -74,7 +82,7 @@ def login_post(
 def register_get(request: Request):
     return templates.TemplateResponse("register.html", {"request": request})
 
-@router.post("/register")
+@router.post("/register", dependencies=[Depends(rate_limit("register", account_field="email"))])
 def register_post(
     request: Request,
     username: str = Form(...),
@@ -139,6 +147,9 @@ def register_post(
             })
 
     except Exception as e:
+        # Password pool saturated: let the 503 + Retry-After through
+        if isinstance(e, HTTPException) and e.status_code == 503:
+            raise
         return templates.TemplateResponse("register.html", {"request": request, "error": str(e)})
 
 @router.get("/verify_otp", response_class=HTMLResponse)
@@ -146,16 +157,15 @@ def verify_otp_get(request: Request, email: str):
     return templates.TemplateResponse("verify_otp.html", {"request": request, "email": email})
 
 
-@router.post("/verify_otp")
+@router.post("/verify_otp", dependencies=[Depends(rate_limit("verify_otp", account_field="email"))])
 def verify_otp_post(request: Request, email: str = Form(...), otp: str = Form(...), db: Session = Depends(get_db)):
     user = crud.get_user_by_email(db, email)
     if not user:
         return templates.TemplateResponse("verify_otp.html", {"request": request, "error": "User not found.", "email": email})
-    if user.otp != otp or user.otp_expiry < datetime.utcnow():
+    if not verify_otp(email, VERIFY_EMAIL, otp):
         return templates.TemplateResponse("verify_otp.html", {"request": request, "error": "Invalid or expired OTP.", "email": email})
 
-    user.is_verified = True
-    db.commit()
+    crud.update_user(db, user, is_verified=True)
     return RedirectResponse(url="/login", status_code=302)
 
 
@@ -167,17 +177,16 @@ def forgot_password_get(request: Request):
     return templates.TemplateResponse("forgot_password.html", {"request": request})
 
 
-@router.post("/forgot_password")
+@router.post("/forgot_password", dependencies=[Depends(rate_limit("forgot_password", account_field="email"))])
 def forgot_password_post(request: Request, email: str = Form(...), db: Session = Depends(get_db)):
     user = crud.get_user_by_email(db, email)
     if not user:
         return templates.TemplateResponse("forgot_password.html", {"request": request, "error": "Email not registered."})
 
     otp_code = str(random.randint(100000, 999999))
-    user.otp = otp_code
-    user.otp_expiry = datetime.utcnow() + timedelta(minutes=5)
+    otp_service.issue(email, RESET_PASSWORD, otp_code, minutes=5, db=db)
+    send_otp_email(db, email, otp_code)
     db.commit()
-    send_otp_email(to_email=email, otp=otp_code)
     return RedirectResponse(url=f"/reset_password?email={email}", status_code=302)
 
 
@@ -186,18 +195,16 @@ def reset_password_get(request: Request, email: str):
     return templates.TemplateResponse("reset_password.html", {"request": request, "email": email})
 
 
-@router.post("/reset_password")
+@router.post("/reset_password", dependencies=[Depends(rate_limit("reset_password", account_field="email"))])
 def reset_password_post(request: Request, email: str = Form(...), otp: str = Form(...),
                         new_password: str = Form(...), db: Session = Depends(get_db)):
     user = crud.get_user_by_email(db, email)
     if not user:
         return templates.TemplateResponse("reset_password.html", {"request": request, "error": "User not found.", "email": email})
-    if user.otp != otp or user.otp_expiry < datetime.utcnow():
+    if not verify_otp(email, RESET_PASSWORD, otp):
         return templates.TemplateResponse("reset_password.html", {"request": request, "error": "Invalid or expired OTP.", "email": email})
 
-    user.password_hash = hash_password(new_password)
-    user.is_verified = True
-    db.commit()
+    crud.set_user_password(db, user, new_password)
     return RedirectResponse(url="/login", status_code=302)
 
 
@@ -205,10 +212,22 @@ def reset_password_post(request: Request, email: str = Form(...), otp: str = For
 # OWNER: INVITE TENANT
 # --------------------------
 @router.get("/owner/invite_tenant_page", response_class=HTMLResponse)
-def invite_tenant_page(request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def invite_tenant_page(
+    request: Request,
+    import_id: int = Query(None),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
     if user.role != "owner":
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    # Progress of a bulk import submitted from this page
+    tenant_import = None
+    if import_id is not None:
+        job = db.get(TenantImport, import_id)
+        if job and job.owner_id == user.id:
+            tenant_import = import_progress(db, job)
+
     # Fetch all properties for this owner
     owner_properties = crud.get_properties_by_owner(db, user.id)
     # Fetch pending tenants
@@ -218,7 +237,8 @@ def invite_tenant_page(request: Request, db: Session = Depends(get_db), user=Dep
         "request": request,
         "user": user,
         "properties": owner_properties,
-        "pending_tenants": pending_tenants
+        "pending_tenants": pending_tenants,
+        "tenant_import": tenant_import
     })
 
 @router.post("/owner/invite_tenant")
@@ -253,17 +273,53 @@ def invite_tenant_post(
         is_activated=False
     )
     db.add(pending)
+    # Activation email is queued in the same transaction as the invite
+    send_activation_email(db, email, activation_token)
     db.commit()
-    db.refresh(pending)
-
-    # Send activation email
-    send_activation_email(email, activation_token)
 
     return RedirectResponse("/owner/invite_tenant_page", status_code=303)
 
 
 
 
+@router.post("/owner/invite_tenants/import", status_code=201)
+def import_tenant_invites(
+    request: Request,
+    file: UploadFile = File(...),
+    property_id: str = Form(None),  # the form's "from file" option sends an empty string
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """
+    Invite tenants in bulk from a CSV/JSONL upload; activation emails go out in the
+    background. API clients get the progress as JSON; the form on the invite page is
+    sent back there to see it.
+    """
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    try:
+        default_property_id = int(property_id) if property_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="property_id must be a number")
+
+    job = import_tenants(db, user.id, file, default_property_id=default_property_id)
+    if "text/html" in request.headers.get("accept", ""):
+        return RedirectResponse(f"/owner/invite_tenant_page?import_id={job.id}", status_code=303)
+    return import_progress(db, job)
+
+
+@router.get("/owner/invite_tenants/import/{import_id}")
+def tenant_import_progress(import_id: int, db: Session = Depends(get_db), user=Depends(get_current_user)):
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    job = db.get(TenantImport, import_id)
+    if not job or job.owner_id != user.id:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return import_progress(db, job)
+
+
 @router.get("/activate/{token}", response_class=HTMLResponse)
 def activate_tenant_form(request: Request, token: str, db: Session = Depends(get_db)):
     token = token.strip()
@@ -284,7 +340,8 @@ def activate_tenant_form(request: Request, token: str, db: Session = Depends(get
     })
 
 
-@router.post("/activate/{token}", response_class=HTMLResponse)
+@router.post("/activate/{token}", response_class=HTMLResponse,
+             dependencies=[Depends(rate_limit("activate", account_path_param="token"))])
 def activate_tenant_post(
     request: Request,
     token: str,
@@ -377,7 +434,7 @@ def report_issue(appliance_id: int, description: str = Form(...), db: Session =
 
 from fastapi import Request
 @router.get("/owner/issues", response_class=HTMLResponse)
-def owner_issues(request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def owner_issues(request: Request, db: Session = Depends(get_read_db), user=Depends(get_current_user)):
     if user.role != "owner":
         raise HTTPException(status_code=403, detail="Not authorized")
 
@@ -395,33 +452,31 @@ def owner_issues(request: Request, db: Session = Depends(get_db), user=Depends(g
 
 
 @router.get("/manager/issues", response_class=HTMLResponse)
-def manager_issues(request: Request, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def manager_issues(
+    request: Request,
+    cursor: int = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
     if current_user.role != "manager":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    # Load related property, tenant, appliance
-    issues = (
-        db.query(Issue)
-        .options(
-            joinedload(Issue.property),
-            joinedload(Issue.appliance),
-            joinedload(Issue.tenant)
-        )
-        .all()
-    )
+    # One page at a time (with related property, tenant, appliance), not every issue ever raised
+    issues, next_cursor = crud.get_issues_page(db, cursor=cursor)
 
     # Fetch all vendors
     vendors = db.query(User).filter(User.role == "vendor").all()
 
     return templates.TemplateResponse(
         "issues.html",
-        {"request": request, "issues": issues, "vendors": vendors, "user": current_user}
+        {"request": request, "issues": issues, "vendors": vendors, "user": current_user,
+         "next_cursor": next_cursor}
     )
 
 
 
 @router.get("/tenant/queries")
-def tenant_queries_list(request: Request, db: Session = Depends(get_db), user=Depends(get_current_user)):
+def tenant_queries_list(request: Request, db: Session = Depends(get_read_db), user=Depends(require_scope("queries:read"))):
     from app.models import TenantQuery  # ✅ Import locally to avoid circular import
     queries = db.query(TenantQuery).filter(TenantQuery.reported_by_id == user.id).all()
     return {"queries": queries}
@@ -1,75 +1,51 @@
 # app/routes/dashboard_routes.py  (or your existing routes file)
-from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File, Path
+from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File, Path, Query
 from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_303_SEE_OTHER
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
-import os
-import shutil
 import logging
-import uuid
 
-from app import crud, models
-from app.database import get_db
-from app.auth import get_current_user
-from app.models import User, Property, Floor, Appliance
+from app import crud, crud_async, models, schemas
+from app.database import get_db, get_read_db, get_async_db
+from app.auth import get_current_user, get_current_user_async, require_scope
+from app.principal import Principal
+from app.access import require_property_access
+from app.image_store import image_store
+from app.models import User, Property, Floor, Appliance, ApplianceStatus
 
 templates = Jinja2Templates(directory="app/templates")
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# -----------------------
-# Utility: safe filename
-# -----------------------
-def make_safe_filename(name_prefix: str, suffix: str, original_filename: str) -> str:
-    # remove spaces and attach a short uuid to avoid collisions
-    base = original_filename.replace(" ", "_")
-    uid = uuid.uuid4().hex[:8]
-    safe = f"{name_prefix}_{suffix}_{uid}_{base}"
-    return safe
-
 # -----------------------
 # Appliance stats API
 # -----------------------
 @router.get("/api/appliance-stats")
-def get_appliance_stats(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    appliances = (
-        db.query(Appliance)
-        .join(Property, Appliance.property_id == Property.id)
-        .filter(Property.owner_id == user.id)
-        .all()
-    )
-
-    total = len(appliances)
-    working_count = sum(1 for a in appliances if str(a.status).strip().lower() == "working")
-    health_percent = round((working_count / total) * 100, 2) if total > 0 else 0
-
+def get_appliance_stats(db: Session = Depends(get_read_db), user: Principal = Depends(require_scope("appliances:read"))):
     type_status = {}
-    expiring_soon_count = 0
-    today = date.today()
-    warning_days = 90  # warranty expiring in next 90 days
-
-    for a in appliances:
-        main_type = a.name.split(" Front")[0].strip() if a.name else "Unknown"
-        status_lower = str(a.status).strip().lower() if a.status else ""
-        if status_lower == "working":
-            status = "Working"
-        elif status_lower == "not working":
-            status = "Not Working"
-        elif status_lower == "warranty expired":
-            status = "Warranty Expired"
-        else:
-            status = "Not Working"
+    total = 0
+    working_count = 0
 
+    # One GROUP BY appliance_type, status query; memory stays flat however many appliances exist
+    for appliance_type, status, count in crud.get_appliance_type_status_counts(db, user.id):
+        status = status or ApplianceStatus.not_working
+        main_type = appliance_type or "Unknown"
         if main_type not in type_status:
-            type_status[main_type] = {"Working": 0, "Not Working": 0, "Warranty Expired": 0}
+            type_status[main_type] = {s.value: 0 for s in ApplianceStatus}
+        type_status[main_type][status.value] += count
+        total += count
+        if status == ApplianceStatus.working:
+            working_count += count
 
-        type_status[main_type][status] += 1
+    health_percent = round((working_count / total) * 100, 2) if total > 0 else 0
 
-        if a.warranty_expiry:
-            if today <= a.warranty_expiry <= today + timedelta(days=warning_days):
-                expiring_soon_count += 1
+    warning_days = 90  # warranty expiring in next 90 days
+    expiring_soon_count = crud.count_warranty_alerts(
+        db, owner_id=user.id, within_days=warning_days, include_expired=False
+    )
 
     return {
         "health_percent": health_percent,
@@ -77,6 +53,31 @@ def get_appliance_stats(db: Session = Depends(get_db), user: User = Depends(get_
         "appliances_expiring_count": expiring_soon_count
     }
 
+# -----------------------
+# Warranty alerts API
+# -----------------------
+@router.get("/api/warranty-alerts")
+def get_warranty_alerts(
+    within_days: int = Query(crud.EXPIRY_ALERT_WINDOW_DAYS, ge=0, le=3650),
+    cursor: str = Query(None),
+    limit: int = Query(crud.WARRANTY_ALERT_PAGE_SIZE, ge=1, le=200),
+    include_expired: bool = Query(True),
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(require_scope("appliances:read"))
+):
+    if user.role not in ["owner", "manager", "tenant"]:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    alerts, next_cursor = crud.get_warranty_alerts(
+        db,
+        cursor=cursor,
+        limit=limit,
+        within_days=within_days,
+        include_expired=include_expired,
+        **crud.user_dashboard_scope(user)
+    )
+    return {"alerts": alerts, "next_cursor": next_cursor}
+
 # ---------------------- ADD APPLIANCE ---------------------- #
 @router.post("/add_appliance")
 async def add_appliance(
@@ -91,8 +92,8 @@ async def add_appliance(
     floor_id: int = Form(...),
     front_image: UploadFile = File(None),
     detail_image: UploadFile = File(None),
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user_async)
 ):
     # Authorization
     if user.role != "owner":
@@ -106,29 +107,23 @@ async def add_appliance(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    # Ensure upload dir exists
-    uploads_dir = "app/static/images"
-    os.makedirs(uploads_dir, exist_ok=True)
-
-    # Save upload file helper
-    def save_file(upload_file: UploadFile, suffix: str):
-        if upload_file and getattr(upload_file, "filename", None):
-            safe_filename = make_safe_filename(name_prefix=name or "appliance", suffix=suffix, original_filename=upload_file.filename)
-            file_path = os.path.join(uploads_dir, safe_filename)
-            try:
-                with open(file_path, "wb") as f:
-                    shutil.copyfileobj(upload_file.file, f)
-            finally:
-                try:
-                    upload_file.file.close()
-                except Exception:
-                    pass
-            return safe_filename
-        return None
-
-    # Save images (if provided)
-    front_filename = save_file(front_image, "front")
-    detail_filename = save_file(detail_image, "detail")
+    # Scope checks come before anything is stored
+    await db.run_sync(
+        require_property_access, user, property_id, "You are not allowed to add appliances to this property"
+    )
+    floor = await db.get(Floor, floor_id)
+    if floor is None or floor.property_id != property_id:
+        raise HTTPException(status_code=400, detail="Floor does not belong to this property")
+
+    # Save images (if provided) off the event loop, stored once per distinct content; see app.image_store
+    front = await image_store.store_async(front_image)
+    try:
+        detail = await image_store.store_async(detail_image)
+    except HTTPException:
+        await image_store.discard_async(front)
+        raise
+    front_filename = front.filename if front else None
+    detail_filename = detail.filename if detail else None
 
     # FIX: convert empty-string location to None or default
     if location is None or (isinstance(location, str) and location.strip() == ""):
@@ -136,7 +131,7 @@ async def add_appliance(
         location = "Unknown"
 
     # Create appliance in DB via crud
-    crud.create_appliance(
+    await crud_async.create_appliance(
         db=db,
         user_id=user.id,
         name=name,
@@ -157,89 +152,49 @@ async def add_appliance(
 @router.get("/dashboard", response_class=HTMLResponse)
 def get_dashboard(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
     today = datetime.today().date()
 
+    # Snapshots may be recomputed and written on read, so they always go through the primary
     if user.role == "owner":
-        properties = crud.get_properties_by_owner(db, user.id)
-        total_properties_count = len(properties)
-        floors_per_property = {p.id: crud.get_floors_by_property(db, p.id) for p in properties}
-        total_floors_count = sum(len(floors) for floors in floors_per_property.values())
-
-        appliances_per_property = {}
-        expiry_alerts = []
-        total_appliance_count = 0
-
-        for prop in properties:
-            appliances = crud.get_appliances_by_property(db, prop.id)
-            appliances_per_property[prop.id] = appliances
-            total_appliance_count += len(appliances)
-
-            for appliance in appliances:
-                if appliance.warranty_expiry:
-                    days_remaining = (appliance.warranty_expiry - today).days
-                    status_flag = "expired" if days_remaining < 0 else ("expiring_soon" if days_remaining <= 30 else None)
-                    if status_flag:
-                        expiry_alerts.append({
-                            "property_name": prop.name,
-                            "name": appliance.name,
-                            "model": appliance.model,
-                            "expiry": appliance.warranty_expiry,
-                            "status": status_flag
-                        })
-
-        appliances_expiring_count = len(expiry_alerts)
-        logs = crud.get_recent_logs(db)
-        all_appliances = [a for alist in appliances_per_property.values() for a in alist]
+        snapshot = crud.get_dashboard_snapshot(primary_db, user)
+        logs, _ = crud.get_activity_feed(db, owner_id=user.id, limit=10)
 
         return templates.TemplateResponse("dashboard_owner.html", {
             "request": request,
             "user": user,
-            "properties": properties,
-            "floors_per_property": floors_per_property,
-            "appliances_per_property": appliances_per_property,
-            "appliances": all_appliances,
-            "expiry_alerts": expiry_alerts,
-            "total_appliance_count": total_appliance_count,
-            "total_properties_count": total_properties_count,
-            "total_floors_count": total_floors_count,
-            "appliances_expiring_count": appliances_expiring_count,
+            "total_appliance_count": snapshot.total_appliance_count,
+            "total_properties_count": snapshot.total_properties_count,
+            "total_floors_count": snapshot.total_floors_count,
+            "appliances_expiring_count": snapshot.appliances_expiring_count,
             "logs": logs
         })
 
     elif user.role == "manager":
         assigned_properties = crud.get_properties_assigned_to_manager(db, user.id)
-        appliances_per_property = {}
-        expiry_alerts = []
-        total_appliance_count = 0
-
-        for prop in assigned_properties:
-            appliances = crud.get_appliances_by_property(db, prop.id)
-            appliances_per_property[prop.id] = appliances
-            total_appliance_count += len(appliances)
-
-            for appliance in appliances:
-                if appliance.warranty_expiry:
-                    days_remaining = (appliance.warranty_expiry - today).days
-                    status_flag = "expired" if days_remaining < 0 else ("expiring_soon" if days_remaining <= 30 else None)
-                    if status_flag:
-                        expiry_alerts.append({
-                            "property_name": prop.name,
-                            "name": appliance.name,
-                            "model": appliance.model,
-                            "expiry": appliance.warranty_expiry,
-                            "status": status_flag
-                        })
+        property_ids = [p.id for p in assigned_properties]
+        # A preview per property; loading every appliance made this page grow with the portfolio
+        appliances_per_property = crud.get_appliances_for_properties(
+            db, property_ids, limit_per_property=crud.MANAGER_DASHBOARD_APPLIANCES_PER_PROPERTY
+        )
+        appliance_counts = crud.count_appliances_by_property(db, property_ids)
+        snapshot = crud.get_dashboard_snapshot(primary_db, user)
+        expiry_alerts, expiry_alerts_next_cursor = crud.get_warranty_alerts(
+            db, manager_id=user.id, limit=crud.WARRANTY_ALERT_PAGE_SIZE, today=today
+        )
 
         return templates.TemplateResponse("dashboard_manager.html", {
             "request": request,
             "user": user,
             "properties": assigned_properties,
             "appliances_per_property": appliances_per_property,
-            "total_appliance_count": total_appliance_count,
+            "appliance_counts": appliance_counts,
+            "total_appliance_count": snapshot.total_appliance_count,
             "expiry_alerts": expiry_alerts,
+            "expiry_alerts_next_cursor": expiry_alerts_next_cursor,
             "today": today
         })
 
@@ -247,32 +202,19 @@ def get_dashboard(
         tenant_property = db.query(Property).filter(Property.id == user.property_id).first() if user.property_id else None
         tenant_floor = db.query(Floor).filter(Floor.id == user.floor_id).first() if user.floor_id else None
 
-        appliances_per_property = {}
-        expiry_alerts = []
-        total_appliance_count = 0
         appliances = []
+        summary = crud.get_dashboard_aggregates(
+            db,
+            property_id=tenant_property.id if tenant_property else None,
+            floor_id=tenant_floor.id if tenant_floor else None,
+            today=today
+        )
 
         if tenant_property:
             query = db.query(Appliance).filter(Appliance.property_id == tenant_property.id)
             if tenant_floor:
                 query = query.filter(Appliance.floor_id == tenant_floor.id)
             appliances = query.all()
-            appliances_per_property[tenant_property.id] = appliances
-            total_appliance_count = len(appliances)
-
-            for appliance in appliances:
-                if appliance.warranty_expiry:
-                    days_remaining = (appliance.warranty_expiry - today).days
-                    status_flag = "expired" if days_remaining < 0 else ("expiring_soon" if days_remaining <= 30 else None)
-                    if status_flag:
-                        expiry_alerts.append({
-                            "property_name": tenant_property.name,
-                            "floor_name": tenant_floor.name if tenant_floor else None,
-                            "name": appliance.name,
-                            "model": appliance.model,
-                            "expiry": appliance.warranty_expiry,
-                            "status": status_flag
-                        })
 
         return templates.TemplateResponse("tenant_dashboard.html", {
             "request": request,
@@ -282,11 +224,14 @@ def get_dashboard(
             "floor": tenant_floor,
             "appliances": appliances,
             "stats": {
-                "total_appliances": total_appliance_count,
-                "working": sum(1 for a in appliances if a.status == "working"),
-                "expiring_soon": len([a for a in appliances if a.warranty_expiry and 0 <= (a.warranty_expiry - today).days <= 30])
+                "total_appliances": summary["total_appliance_count"],
+                "working": summary["working_count"],
+                "expiring_soon": crud.count_warranty_alerts(
+                    db, today=today, include_expired=False, **crud.user_dashboard_scope(user)
+                )
             },
-            "expiry_alerts": expiry_alerts
+            "expiry_alerts": summary["expiry_alerts"],
+            "expiry_alerts_next_cursor": summary["expiry_alerts_next_cursor"]
         })
 
     else:
@@ -312,8 +257,8 @@ def assign_property_page(request: Request, user=Depends(get_current_user), db: S
 def add_appliance_page(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
     properties = crud.get_properties_by_owner(db, user.id)
     floors_dict = {
-        p.id: [{"id": f.id, "floor_number": f.floor_number} for f in crud.get_floors_by_property(db, p.id)]
-        for p in properties
+        property_id: [{"id": f.id, "floor_number": f.floor_number} for f in floors]
+        for property_id, floors in crud.get_floors_for_properties(db, [p.id for p in properties]).items()
     }
     return templates.TemplateResponse("add_appliance.html", {
         "request": request,
@@ -324,33 +269,84 @@ def add_appliance_page(request: Request, user=Depends(get_current_user), db: Ses
     })
 
 @router.get("/view_properties", response_class=HTMLResponse)
-def view_properties(request: Request, user=Depends(get_current_user), db: Session = Depends(get_db)):
+def view_properties(request: Request, user=Depends(get_current_user), db: Session = Depends(get_read_db)):
     if user.role != "owner":
         raise HTTPException(status_code=403, detail="Unauthorized")
 
-    properties = crud.get_properties_by_owner(db, user.id)
-    appliances_per_property = {}
-    floors_per_property = {}
-
-    for prop in properties:
-        appliances = crud.get_appliances_by_property(db, prop.id)
-        floors = crud.get_floors_by_property(db, prop.id)
-
-        # attach appliances to floors
-        for floor in floors:
-            floor.appliances = [appliance for appliance in appliances if appliance.floor_id == floor.id]
-
-        appliances_per_property[prop.id] = appliances
-        floors_per_property[prop.id] = floors
+    # First screen only; floors and appliances are fetched on expand from the tree API below
+    properties, next_cursor = crud.get_property_tree_page(db, user.id)
 
     return templates.TemplateResponse("view_properties.html", {
         "request": request,
         "user": user,
         "properties": properties,
-        "appliances_per_property": appliances_per_property,
-        "floors_per_property": floors_per_property
+        "next_cursor": next_cursor
     })
 
+# ---------------------- ACTIVITY FEED ---------------------- #
+def _activity_scope(user: User):
+    # Owners see everything done in their portfolio; everyone else sees their own actions
+    return {"owner_id": user.id} if user.role == "owner" else {"user_id": user.id}
+
+@router.get("/activity", response_class=HTMLResponse)
+def activity_page(request: Request, user=Depends(get_current_user), db: Session = Depends(get_read_db)):
+    logs, next_cursor = crud.get_activity_feed(db, **_activity_scope(user))
+    return templates.TemplateResponse("activity_log.html", {
+        "request": request,
+        "user": user,
+        "logs": logs,
+        "next_cursor": next_cursor
+    })
+
+@router.get("/api/activity")
+def activity_feed(
+    cursor: str = Query(None),
+    limit: int = Query(crud.ACTIVITY_FEED_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(require_scope("activity:read"))
+):
+    entries, next_cursor = crud.get_activity_feed(db, cursor=cursor, limit=limit, **_activity_scope(user))
+    return {"entries": entries, "next_cursor": next_cursor}
+
+# ---------------------- PROPERTY TREE API ---------------------- #
+@router.get("/api/properties")
+def property_tree(
+    cursor: int = Query(None),
+    limit: int = Query(crud.PROPERTY_TREE_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(require_scope("properties:read"))
+):
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    properties, next_cursor = crud.get_property_tree_page(db, user.id, cursor=cursor, limit=limit)
+    return {"properties": properties, "next_cursor": next_cursor}
+
+@router.get("/api/properties/{property_id}/floors")
+def property_tree_floors(
+    property_id: int,
+    cursor: int = Query(None),
+    limit: int = Query(crud.PROPERTY_TREE_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(require_scope("properties:read"))
+):
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    floors, next_cursor = crud.get_floor_tree_page(db, user.id, property_id, cursor=cursor, limit=limit)
+    return {"floors": floors, "next_cursor": next_cursor}
+
+@router.get("/api/floors/{floor_id}/appliances")
+def property_tree_appliances(
+    floor_id: int,
+    cursor: int = Query(None),
+    limit: int = Query(crud.PROPERTY_TREE_PAGE_SIZE, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(require_scope("properties:read"))
+):
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Unauthorized")
+    appliances, next_cursor = crud.get_appliance_tree_page(db, user.id, floor_id, cursor=cursor, limit=limit)
+    return {"appliances": appliances, "next_cursor": next_cursor}
+
 # ---------------------- PROPERTY ---------------------- #
 @router.post("/assign_property")
 def assign_property(
@@ -406,6 +402,7 @@ def edit_appliance_page(appliance_id: int, request: Request, db: Session = Depen
     appliance = crud.get_appliance_by_id(db, appliance_id)
     if not appliance:
         raise HTTPException(status_code=404, detail="Appliance not found")
+    require_property_access(db, user, appliance.property_id, detail="You are not allowed to edit this appliance")
     return templates.TemplateResponse("edit_appliance.html", {"request": request, "appliance": appliance, "user": user})
 
 @router.post("/update_appliance/{appliance_id}")
@@ -425,6 +422,7 @@ def update_appliance(
     appliance = crud.get_appliance_by_id(db, appliance_id)
     if not appliance:
         raise HTTPException(status_code=404, detail="Appliance not found")
+    require_property_access(db, user, appliance.property_id, detail="You are not allowed to update this appliance")
     try:
         warranty_date = datetime.strptime(warranty_expiry, "%Y-%m-%d").date()
     except ValueError:
@@ -468,15 +466,14 @@ def add_floor(
 ):
     if current_user.role != "owner":
         return RedirectResponse("/dashboard", status_code=303)
+    require_property_access(db, current_user, property_id, detail="You are not allowed to add floors to this property")
 
     existing = db.query(Floor).filter_by(property_id=property_id, floor_number=floor_number).first()
     if existing:
         return RedirectResponse(f"/add_floor?error=exists&property_id={property_id}", status_code=303)
 
-    new_floor = Floor(floor_number=floor_number, property_id=property_id)
-    db.add(new_floor)
-    db.commit()
-    crud.log_activity(db, current_user.id, f"Added floor '{floor_number}' to property ID {property_id}")
+    crud.create_floor(db, floor_number=floor_number, property_id=property_id)
+    crud.log_activity(db, current_user.id, f"Added floor '{floor_number}' to property ID {property_id}", owner_id=current_user.id)
     return RedirectResponse("/add_floor", status_code=303)
 
 @router.get("/edit_floor/{floor_id}", response_class=HTMLResponse)
@@ -486,13 +483,17 @@ def edit_floor_page(floor_id: int, request: Request, db: Session = Depends(get_d
     floor = db.query(Floor).filter(Floor.id == floor_id).first()
     if not floor:
         raise HTTPException(status_code=404, detail="Floor not found.")
+    require_property_access(db, user, floor.property_id, detail="You are not allowed to edit this floor")
     return templates.TemplateResponse("edit_floor.html", {"request": request, "floor": floor, "user": user})
 
 @router.post("/update_floor/{floor_id}")
 def update_floor(floor_id: int, floor_number: str = Form(...), db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    if current_user.role != "owner":
+        raise HTTPException(status_code=403, detail="Only owners can edit floors.")
     floor = db.query(Floor).filter(Floor.id == floor_id).first()
     if not floor:
         raise HTTPException(status_code=404, detail="Floor not found")
+    require_property_access(db, current_user, floor.property_id, detail="You are not allowed to edit this floor")
     floor.floor_number = floor_number
     db.commit()
     return RedirectResponse(url="/view_properties", status_code=303)
@@ -508,11 +509,12 @@ def add_property(
 ):
     if user.role != "owner":
         raise HTTPException(status_code=403, detail="Only owners can add properties.")
-    new_property = Property(name=name, address=address, property_type=property_type, owner_id=user.id)
-    db.add(new_property)
-    db.commit()
-    db.refresh(new_property)
-    crud.log_activity(db, user.id, f"Added property: {name}")
+    new_property = crud.create_property(
+        db,
+        property=schemas.PropertyCreate(name=name, address=address, property_type=property_type),
+        user_id=user.id
+    )
+    crud.log_activity(db, user.id, f"Added property: {name}", owner_id=user.id)
     return RedirectResponse(url=f"/add_floor?property_id={new_property.id}", status_code=303)
 
 @router.post("/delete_property/{property_id}")
@@ -522,9 +524,9 @@ def delete_property(property_id: int = Path(...), db: Session = Depends(get_db),
     property_obj = db.query(Property).filter_by(id=property_id, owner_id=user.id).first()
     if not property_obj:
         raise HTTPException(status_code=404, detail="Property not found.")
-    db.delete(property_obj)
-    db.commit()
-    crud.log_activity(db, user.id, f"Deleted property: {property_obj.name}")
+    property_name = property_obj.name
+    crud.delete_property(db, property_obj)
+    crud.log_activity(db, user.id, f"Deleted property: {property_name}", owner_id=user.id)
     return RedirectResponse(url="/view_properties", status_code=303)
 
 @router.get("/appliance_stats")
@@ -533,23 +535,31 @@ def appliance_stats(request: Request, db: Session = Depends(get_db), current_use
     return templates.TemplateResponse("appliance_stats.html", {"request": request, "total_appliance_count": total_count})
 
 @router.get("/owner_dashboard", response_class=HTMLResponse)
-async def owner_dashboard(request: Request, db: Session = Depends(get_db)):
-    session_token = request.session.get("user")
-    if not session_token:
+async def owner_dashboard(request: Request, db: AsyncSession = Depends(get_async_db)):
+    user_id = request.session.get("user_id")
+    user = await crud_async.get_user_by_id(db, user_id) if user_id else None
+    if not user or user.role != "owner":
         return RedirectResponse("/login", status_code=303)
-    user = db.query(User).filter(User.username == session_token).first()
-    total_appliance_count = (
-        db.query(Appliance).join(Property).filter(Property.owner_id == user.id).count()
-    )
-    return templates.TemplateResponse("owner_dashboard.html", {"request": request, "user": user, "total_appliance_count": total_appliance_count})
+    snapshot = await crud_async.get_dashboard_snapshot(db, user)
+    return templates.TemplateResponse("dashboard_owner.html", {
+        "request": request,
+        "user": user,
+        "total_appliance_count": snapshot.total_appliance_count,
+        "total_properties_count": snapshot.total_properties_count,
+        "total_floors_count": snapshot.total_floors_count,
+        "appliances_expiring_count": snapshot.appliances_expiring_count
+    })
 
 @router.post("/delete_appliance/{appliance_id}")
 def delete_appliance(appliance_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    if user.role not in ["owner", "manager"]:
+        raise HTTPException(status_code=403, detail="Only owners/managers can delete appliances.")
     appliance = db.query(Appliance).filter(Appliance.id == appliance_id).first()
     if appliance:
-        db.delete(appliance)
-        crud.log_activity(db, user.id, f"Deleted appliance: {appliance.name}")
-        db.commit()
+        require_property_access(db, user, appliance.property_id, detail="You are not allowed to delete this appliance")
+        appliance_name, owner_id = appliance.name, appliance.property.owner_id
+        crud.delete_appliance(db, appliance)
+        crud.log_activity(db, user.id, f"Deleted appliance: {appliance_name}", owner_id=owner_id)
     return RedirectResponse(url="/view_properties", status_code=303)
 
 @router.get("/appliance/{appliance_id}", response_class=HTMLResponse)
@@ -559,15 +569,9 @@ def appliance_detail(request: Request, appliance_id: int, db: Session = Depends(
         return HTMLResponse(content="Appliance not found", status_code=404)
 
     # Authorization checks
-    if user.role == "owner":
-        if appliance.property.owner_id != user.id:
-            raise HTTPException(status_code=403, detail="You are not allowed to view this appliance")
-    elif user.role == "manager":
-        assigned_properties = crud.get_properties_assigned_to_manager(db, user.id)
-        if appliance.property_id not in [p.id for p in assigned_properties]:
-            raise HTTPException(status_code=403, detail="You are not allowed to view this appliance")
-    else:
+    if user.role not in ["owner", "manager"]:
         raise HTTPException(status_code=403, detail="Unauthorized")
+    require_property_access(db, user, appliance.property_id, detail="You are not allowed to view this appliance")
 
     # Image fallback paths (these should exist in app/static/images)
     front_image = appliance.front_image or "default_appliance.jpg"
@@ -588,7 +592,7 @@ def assign_tenant_page(request: Request, db: Session = Depends(get_db), user: Us
         raise HTTPException(status_code=403, detail="Only owners can assign tenants.")
     tenants = crud.get_all_tenants(db)
     properties = crud.get_properties_by_owner(db, user.id)
-    floors_per_property = {p.id: crud.get_floors_by_property(db, p.id) for p in properties}
+    floors_per_property = crud.get_floors_for_properties(db, [p.id for p in properties])
     return templates.TemplateResponse("assign_tenant.html", {
         "request": request,
         "user": user,
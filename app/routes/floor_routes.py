@@ -1,19 +1,25 @@
-from fastapi import APIRouter, UploadFile, File, Form, Request, Depends
+import json
+
+from fastapi import APIRouter, UploadFile, File, Form, Request, Depends, HTTPException
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-import os, shutil
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_async_db
+from app import crud_async
+from app.access import require_property_access
+from app.auth import get_current_user_async
+from app.principal import Principal
 from app.models import Floor, Property
 from app.floorplan_extractor import extract_floorplan_details
+from app.uploads import save_upload_async, discard_upload
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
-# Directory to store uploaded floor plans
-UPLOAD_DIR = "app/static/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Floor plans are stored under app/static/uploads (UPLOAD_KINDS["floor_plan"])
 
 # --- GET route: show Add Floor form ---
 @router.get("/add_floor")
@@ -34,33 +40,44 @@ async def add_floor(
     property_id: int = Form(...),
     floor_name: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user_async)
 ):
-    # 1️⃣ Create new Floor object
-    new_floor = Floor(floor_number=floor_name, property_id=property_id)
+    if user.role != "owner":
+        raise HTTPException(status_code=403, detail="Only owners can add floors.")
+    await db.run_sync(require_property_access, user, property_id, "You are not allowed to add floors to this property")
 
-    # 2️⃣ Save uploaded file
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    new_floor.floor_plan = f"/static/uploads/{file.filename}"   # ✅ corrected
-    import json
+    # 1️⃣ Save uploaded file (chunked, size-capped, off the event loop; see app.uploads)
+    stored = await save_upload_async(file, "floor_plan", prefix="floor")
+    if stored is None:
+        raise HTTPException(status_code=400, detail="Floor plan file is required")
+    file_path = stored.path
+    floor_plan = f"/static/uploads/{stored.filename}"   # ✅ corrected
 
-    extracted_details = extract_floorplan_details(file_path)
+    try:
+        extracted_details = await run_in_threadpool(extract_floorplan_details, file_path)
 
-    # Ensure we always store a string
-    if isinstance(extracted_details, dict):
-        new_floor.extracted_details = json.dumps(extracted_details)
-    else:
-        new_floor.extracted_details = str(extracted_details)
+        # Ensure we always store a string
+        if isinstance(extracted_details, dict):
+            extracted_text = json.dumps(extracted_details)
+        else:
+            extracted_text = str(extracted_details)
 
-    # 4️⃣ Save to database
-    db.add(new_floor)
-    db.commit()
-    db.refresh(new_floor)
+        # 2️⃣ Save to database (also updates the owner's dashboard snapshot)
+        await crud_async.create_floor(
+            db,
+            floor_number=floor_name,
+            property_id=property_id,
+            floor_plan=floor_plan,
+            extracted_details=extracted_text
+        )
+    except BaseException:
+        # Nothing references the file yet; don't leave it behind
+        discard_upload(stored)
+        raise
 
-    # 5️⃣ Re-render the same page with extracted details
-    properties = db.query(Property).all()
+    # 3️⃣ Re-render the same page with extracted details
+    properties = await crud_async.get_all_properties(db)
     return templates.TemplateResponse(
         "add_floor.html",
         {
@@ -0,0 +1,49 @@
+# app/routes/internal_routes.py
+#
+# Operational endpoints. Disabled unless INTERNAL_API_TOKEN is set; callers pass it
+# in the X-Internal-Token header.
+
+import os
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, Depends
+
+from app.email_outbox import email_outbox_worker
+from app.password_pool import password_pool
+from app.pool_metrics import collect_pool_metrics
+from app.query_stats import route_totals
+
+router = APIRouter(prefix="/internal")
+
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+
+def require_internal_token(x_internal_token: str = Header(None)):
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+
+@router.get("/db-pool", dependencies=[Depends(require_internal_token)])
+def db_pool_metrics():
+    """Checked-out/overflow gauges, event counters and checkout wait-time histograms per engine."""
+    return collect_pool_metrics()
+
+
+@router.get("/query-stats", dependencies=[Depends(require_internal_token)])
+def query_stats():
+    """Per-route statement counts, DB time and suspected N+1 hits since process start."""
+    return route_totals.snapshot()
+
+
+@router.get("/password-pool", dependencies=[Depends(require_internal_token)])
+def password_pool_stats():
+    """bcrypt process pool: workers, in-flight jobs, completed and rejected (503) counts."""
+    return password_pool.stats()
+
+
+@router.get("/email-outbox", dependencies=[Depends(require_internal_token)])
+def email_outbox_stats():
+    """Outbound email queue: pending depth and age, failed count, and this worker's send counters."""
+    return email_outbox_worker.stats()
@@ -3,11 +3,12 @@ from fastapi import APIRouter, Form, Depends
 from fastapi.responses import RedirectResponse
 from starlette.status import HTTP_303_SEE_OTHER
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from app.utils import send_otp_email, generate_otp
+from app.utils import send_otp_email, generate_otp, verify_otp
+from app.otp_store import otp_service, RESET_PASSWORD, LOGIN
 from app.database import get_db
 from app.models import User
-from app.auth import create_access_token
+from app.auth import create_token_pair
+from app.rate_limit import rate_limit
 
 router = APIRouter()
 
@@ -19,64 +20,47 @@ def forgot_password(email: str = Form(...), db: Session = Depends(get_db)):
         return {"error": "User not found"}
 
     otp_code = generate_otp()
-    otp_expiry = datetime.utcnow() + timedelta(minutes=10)
-
-    user.otp = otp_code
-    user.otp_expiry = otp_expiry
+    otp_service.issue(email, RESET_PASSWORD, otp_code, minutes=10, db=db)
+    send_otp_email(db, email, otp_code)
     db.commit()
-
-    send_otp_email(email, otp_code)
     return {"message": "OTP sent to your email"}
 
 # ====== Verify OTP for forgot password ======
-@router.post("/verify_otp")
-def verify_otp(email: str = Form(...), otp: str = Form(...), db: Session = Depends(get_db)):
+@router.post("/verify_otp", dependencies=[Depends(rate_limit("verify_otp", account_field="email"))])
+def verify_forgot_password_otp(email: str = Form(...), otp: str = Form(...), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == email).first()
     if not user:
         return {"error": "User not found"}
 
-    if user.otp != otp or datetime.utcnow() > user.otp_expiry:
+    # Verifying uses the code up
+    if not verify_otp(email, RESET_PASSWORD, otp):
         return {"error": "Invalid or expired OTP"}
 
-    # Clear OTP after verification
-    user.otp = None
-    user.otp_expiry = None
-    db.commit()
-
     return {"message": "OTP verified. You can now reset your password."}
 
 # ====== Request OTP for login ======
-@router.post("/login_request_otp")
+@router.post("/login_request_otp", dependencies=[Depends(rate_limit("login_request_otp", account_field="email"))])
 def login_request_otp(email: str = Form(...), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == email, User.is_verified == True).first()
     if not user:
         return {"error": "User not found or not verified"}
 
     otp_code = generate_otp()
-    otp_expiry = datetime.utcnow() + timedelta(minutes=10)
-
-    user.otp = otp_code
-    user.otp_expiry = otp_expiry
+    otp_service.issue(email, LOGIN, otp_code, minutes=10, db=db)
+    send_otp_email(db, email, otp_code)
     db.commit()
-
-    send_otp_email(email, otp_code)
     return {"message": "OTP sent to your email"}
 
 # ====== Verify OTP for login ======
-@router.post("/login_verify_otp")
+@router.post("/login_verify_otp", dependencies=[Depends(rate_limit("verify_otp", account_field="email"))])
 def login_verify_otp(email: str = Form(...), otp: str = Form(...), db: Session = Depends(get_db)):
     user = db.query(User).filter(User.email == email, User.is_verified == True).first()
     if not user:
         return {"error": "User not found or not verified"}
 
-    if user.otp != otp or datetime.utcnow() > user.otp_expiry:
+    # Verifying uses the code up
+    if not verify_otp(email, LOGIN, otp):
         return {"error": "Invalid or expired OTP"}
 
-    # Clear OTP after successful login
-    user.otp = None
-    user.otp_expiry = None
-    db.commit()
-
-    # Generate JWT access token
-    access_token = create_access_token(data={"sub": user.email, "role": user.role})
-    return {"access_token": access_token, "token_type": "bearer"}
+    # Bearer access + refresh tokens (see app.auth)
+    return create_token_pair(user)
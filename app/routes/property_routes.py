@@ -32,7 +32,7 @@ def add_property(
     )
 
     # 2️⃣ Log the activity
-    crud.log_activity(db, user.id, f"Added property: {name}")
+    crud.log_activity(db, user.id, f"Added property: {name}", owner_id=user.id)
 
     db.commit()
 
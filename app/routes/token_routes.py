@@ -0,0 +1,46 @@
+# app/routes/token_routes.py
+#
+# Bearer tokens for mobile and integration clients (see app.auth for the claims).
+#   POST /api/token          username + password  -> access + refresh token
+#   POST /api/token/refresh  refresh_token        -> new access + refresh token
+
+from fastapi import APIRouter, Depends, Form, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud_async
+from app.auth import create_token_pair, decode_token, password_version
+from app.database import get_async_db
+from app.rate_limit import rate_limit
+from app.utils import verify_password_async
+
+router = APIRouter(prefix="/api/token")
+
+
+# Shares the /login buckets: both are password guesses against the same accounts
+@router.post("", dependencies=[Depends(rate_limit("login", account_field="username"))])
+async def issue_token(
+    username: str = Form(...),
+    password: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await crud_async.get_user_by_username(db, username)
+    await db.close()  # don't hold a connection through bcrypt
+
+    if not user or not await verify_password_async(password, user.password_hash):
+        raise HTTPException(status_code=401, detail="Invalid username or password",
+                            headers={"WWW-Authenticate": "Bearer"})
+    if user.role not in ["tenant", "vendor"] and not user.is_verified:
+        raise HTTPException(status_code=403, detail="Account not verified")
+    return create_token_pair(user)
+
+
+@router.post("/refresh")
+async def refresh_token(refresh_token: str = Form(...), db: AsyncSession = Depends(get_async_db)):
+    claims = decode_token(refresh_token, "refresh")
+    # The one DB read in the token flow: picks up role/tenancy changes, and a
+    # password change since the token was issued revokes it
+    user = await crud_async.get_user_by_id(db, int(claims["sub"]))
+    if not user or claims.get("pwv") != password_version(user.password_hash):
+        raise HTTPException(status_code=401, detail="Refresh token revoked",
+                            headers={"WWW-Authenticate": "Bearer"})
+    return create_token_pair(user)
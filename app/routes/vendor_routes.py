@@ -4,14 +4,14 @@ from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session, joinedload
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import User, Issue, IssueStatus
-from app.utils import get_current_user
+from app.auth import get_current_user
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 @router.get("/vendor/dashboard", response_class=HTMLResponse)
-def vendor_dashboard(request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+def vendor_dashboard(request: Request, db: Session = Depends(get_read_db), user: User = Depends(get_current_user)):
     if user.role != "vendor":
         raise HTTPException(status_code=403, detail="Not authorized")
 
@@ -0,0 +1,84 @@
+# app/schema_check.py
+#
+# Startup schema handling. Instead of Base.metadata.create_all (which reflects every
+# table on each boot), production compares the database's alembic_version with the
+# head revision of alembic/versions. The head is read from the revision headers with
+# a regex, so no migration module is imported.
+
+import logging
+import os
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import Base, engine, DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIR = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+_REVISION = re.compile(r"^revision\s*(?::[^=]+)?=\s*['\"](\w+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision\s*(?::[^=]+)?=\s*(.+)$", re.MULTILINE)
+_QUOTED_ID = re.compile(r"['\"](\w+)['\"]")
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def default_schema_mode() -> str:
+    # Local SQLite keeps the old auto-create behaviour; real deployments check the migration head
+    return "create_all" if (DATABASE_URL or "").startswith("sqlite") else "check"
+
+
+def alembic_heads(versions_dir: Path = VERSIONS_DIR) -> set:
+    """Revisions in versions_dir that no other revision names as its down_revision."""
+    revisions, parents = set(), set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION.search(source)
+        if not revision:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down:
+            # Strip a trailing comment before collecting ids (merge revisions list several)
+            parents.update(_QUOTED_ID.findall(down.group(1).split("#", 1)[0]))
+    return revisions - parents
+
+
+def database_revisions(bind=engine) -> set:
+    try:
+        with bind.connect() as conn:
+            return {row[0] for row in conn.execute(text("SELECT version_num FROM alembic_version"))}
+    except DBAPIError:
+        return set()
+
+
+def check_schema_is_current(bind=engine):
+    """Raise SchemaOutOfDate unless the database is stamped at the migration head(s)."""
+    expected, current = alembic_heads(), database_revisions(bind)
+    if current != expected:
+        raise SchemaOutOfDate(
+            f"Database schema is at {sorted(current) or 'no alembic revision'}, "
+            f"code expects {sorted(expected)}; run `alembic upgrade head`."
+        )
+
+
+def prepare_schema(mode: str = None):
+    """
+    Run the configured startup step. STARTUP_SCHEMA_MODE:
+      check      - verify alembic_version against the head (default for non-SQLite)
+      create_all - legacy Base.metadata.create_all (default for SQLite)
+      off        - do nothing
+    """
+    mode = (mode or os.getenv("STARTUP_SCHEMA_MODE") or default_schema_mode()).lower()
+    if mode == "create_all":
+        Base.metadata.create_all(bind=engine)
+    elif mode == "check":
+        check_schema_is_current()
+    elif mode != "off":
+        raise ValueError(f"Unknown STARTUP_SCHEMA_MODE: {mode}")
+    logger.info("Startup schema mode: %s", mode)
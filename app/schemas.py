@@ -40,6 +40,7 @@ class UserOut(BaseModel):
 class PropertyBase(BaseModel):
     name: str
     address: str
+    property_type: Optional[str] = None
 
 class PropertyCreate(PropertyBase):  # ✅ Remove user_id here
     pass
@@ -0,0 +1,232 @@
+# app/tenant_import.py
+#
+# Bulk tenant invitations from an uploaded CSV or JSONL file, one row per tenant:
+#   name, email, property_id, floor_id, flat_no, room_no
+# (property_id may come from the form instead; floor_id, flat_no and room_no are
+# optional). The file is read and validated row by row without loading it whole.
+# Valid rows are inserted TENANT_IMPORT_BATCH_SIZE at a time: one query finds the
+# emails in the batch that are already users or pending invites, one INSERT adds
+# the rest, and their activation emails are queued as one outbox batch, which the
+# email worker sends as multi-recipient Brevo calls. Progress (rows processed,
+# emails sent) is kept on the tenant_imports row.
+
+import csv
+import io
+import json
+import os
+import re
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select, union, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import TenantImport, PendingTenant, User, Property, Floor, EmailOutbox
+from app.utils import send_activation_emails
+
+TENANT_IMPORT_BATCH_SIZE = int(os.getenv("TENANT_IMPORT_BATCH_SIZE", "500"))
+TENANT_IMPORT_MAX_ROWS = int(os.getenv("TENANT_IMPORT_MAX_ROWS", "10000"))
+# Row errors kept on the import record; the counts cover all of them
+TENANT_IMPORT_MAX_ERRORS = 100
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_COUNTERS = ("total_rows", "invited", "skipped_existing", "duplicates", "invalid")
+
+
+def file_format(upload: UploadFile) -> str:
+    name = (upload.filename or "").lower()
+    if name.endswith(".csv") or upload.content_type == "text/csv":
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or upload.content_type in ("application/x-ndjson", "application/jsonl"):
+        return "jsonl"
+    raise HTTPException(status_code=400, detail="Upload a .csv or .jsonl file")
+
+
+def iter_records(upload: UploadFile, fmt: str):
+    """Yield (row number, dict) per record, or (row number, error string) for unparseable lines."""
+    text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            if not reader.fieldnames or "email" not in [field.strip().lower() for field in reader.fieldnames]:
+                raise HTTPException(status_code=400, detail="CSV needs a header row with at least name and email")
+            for number, record in enumerate(reader, start=2):
+                yield number, {(key or "").strip().lower(): value for key, value in record.items()}
+        else:
+            for number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield number, "not valid JSON"
+                    continue
+                yield number, record if isinstance(record, dict) else "expected a JSON object"
+    finally:
+        # Hand the underlying file back to UploadFile instead of closing it with the wrapper
+        text.detach()
+
+
+def _text(record: dict, key: str, max_length: int):
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if len(value) > max_length:
+        raise ValueError(f"{key} is longer than {max_length} characters")
+    return value or None
+
+
+def _int(record: dict, key: str):
+    value = record.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{key} must be a number")
+
+
+def validate_record(record: dict, default_property_id, floors_by_property: dict) -> dict:
+    """The PendingTenant values for one row, or ValueError saying what is wrong with it."""
+    name = _text(record, "name", 255)
+    email = (_text(record, "email", 255) or "").lower()
+    if not name:
+        raise ValueError("name is required")
+    if not _EMAIL.match(email):
+        raise ValueError("email is missing or invalid")
+    property_id = _int(record, "property_id") or default_property_id
+    if property_id is None:
+        raise ValueError("property_id is required")
+    if property_id not in floors_by_property:
+        raise ValueError(f"property {property_id} is not one of your properties")
+    floor_id = _int(record, "floor_id")
+    if floor_id is not None and floor_id not in floors_by_property[property_id]:
+        raise ValueError(f"floor {floor_id} is not in property {property_id}")
+    return {
+        "name": name, "email": email, "property_id": property_id, "floor_id": floor_id,
+        "flat_no": _text(record, "flat_no", 50), "room_no": _text(record, "room_no", 50),
+    }
+
+
+def _insert_batch(db: Session, batch: list, batch_key: str) -> tuple:
+    """Insert the batch's new invites and queue their emails. Returns (invited, already existing)."""
+    emails = [row["email"] for row in batch]
+    # Stored emails keep the case they were typed in; file emails are already lower-cased
+    existing = set(db.execute(union(
+        select(func.lower(User.email)).where(func.lower(User.email).in_(emails)),
+        select(func.lower(PendingTenant.email)).where(func.lower(PendingTenant.email).in_(emails)),
+    )).scalars())
+    new = [dict(row, activation_token=str(uuid.uuid4()), is_activated=False, created_at=datetime.utcnow())
+           for row in batch if row["email"] not in existing]
+    if new:
+        # Core insert: one executemany even when optional columns are NULL on some rows
+        db.execute(PendingTenant.__table__.insert(), new)
+        send_activation_emails(db, [(row["email"], row["activation_token"]) for row in new],
+                               batch_key=batch_key)
+    return len(new), len(batch) - len(new)
+
+
+def _flush(db: Session, job: TenantImport, job_id: int, batch: list, counts: dict, errors: list):
+    """Write one batch and the running counts in a single commit."""
+    for attempt in range(2):
+        try:
+            invited, existing = _insert_batch(db, batch, f"tenant_import:{job_id}") if batch else (0, 0)
+            # Counts are tracked here rather than read back from job, which each commit expires
+            updated = dict(counts, invited=counts["invited"] + invited,
+                           skipped_existing=counts["skipped_existing"] + existing)
+            for key in _COUNTERS:
+                setattr(job, key, updated[key])
+            job.errors = json.dumps(errors)
+            db.commit()
+            counts.update(updated)
+            return
+        except IntegrityError:
+            # An invite for one of these emails landed between the check and the insert; check again
+            db.rollback()
+            if attempt:
+                raise
+
+
+def import_tenants(db: Session, owner_id: int, upload: UploadFile, default_property_id: int = None) -> TenantImport:
+    fmt = file_format(upload)
+    properties = [property_id for (property_id,) in db.query(Property.id).filter(Property.owner_id == owner_id)]
+    if default_property_id is not None and default_property_id not in properties:
+        raise HTTPException(status_code=403, detail="Not your property")
+    floors_by_property = {property_id: set() for property_id in properties}
+    for floor_id, property_id in db.query(Floor.id, Floor.property_id).filter(Floor.property_id.in_(properties)):
+        floors_by_property[property_id].add(floor_id)
+
+    job = TenantImport(owner_id=owner_id, filename=(upload.filename or "")[:255], status="processing",
+                       **{key: 0 for key in _COUNTERS})
+    db.add(job)
+    db.commit()
+    # Loaded once; job.id would otherwise be re-read after every batch commit
+    job_id = job.id
+
+    counts = {key: 0 for key in _COUNTERS}
+    errors, seen, batch = [], set(), []
+
+    def reject(number, message):
+        counts["invalid"] += 1
+        if len(errors) < TENANT_IMPORT_MAX_ERRORS:
+            errors.append({"row": number, "error": message})
+
+    try:
+        for number, record in iter_records(upload, fmt):
+            if counts["total_rows"] >= TENANT_IMPORT_MAX_ROWS:
+                errors.append({"row": number, "error": f"stopped: more than {TENANT_IMPORT_MAX_ROWS} rows"})
+                break
+            counts["total_rows"] += 1
+            if isinstance(record, str):
+                reject(number, record)
+                continue
+            try:
+                row = validate_record(record, default_property_id, floors_by_property)
+            except ValueError as e:
+                reject(number, str(e))
+                continue
+            if row["email"] in seen:
+                counts["duplicates"] += 1
+                continue
+            seen.add(row["email"])
+            batch.append(row)
+            if len(batch) >= TENANT_IMPORT_BATCH_SIZE:
+                _flush(db, job, job_id, batch, counts, errors)
+                batch = []
+        _flush(db, job, job_id, batch, counts, errors)
+        job.status = "completed"
+    except HTTPException as e:
+        db.rollback()
+        job.status = "failed"
+        job.errors = json.dumps(errors + [{"row": None, "error": e.detail}])
+    except UnicodeDecodeError:
+        db.rollback()
+        job.status = "failed"
+        job.errors = json.dumps(errors + [{"row": None, "error": "file is not UTF-8 text"}])
+    job.finished_at = datetime.utcnow()
+    db.commit()
+    return job
+
+
+def import_progress(db: Session, job: TenantImport) -> dict:
+    """The import's row counts plus how many of its activation emails are pending, sent or failed."""
+    emails = {"pending": 0, "sent": 0, "failed": 0}
+    for status, count in (
+        db.query(EmailOutbox.status, func.count())
+        .filter(EmailOutbox.batch_key == f"tenant_import:{job.id}")
+        .group_by(EmailOutbox.status)
+    ):
+        emails[status] = count
+    return {
+        "import_id": job.id,
+        "filename": job.filename,
+        "status": "sending" if job.status == "completed" and emails["pending"] else job.status,
+        **{key: getattr(job, key) for key in _COUNTERS},
+        "emails": emails,
+        "errors": json.loads(job.errors or "[]"),
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
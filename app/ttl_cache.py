@@ -0,0 +1,74 @@
+# app/ttl_cache.py
+#
+# Small in-process LRU cache with a TTL per entry, shared by the per-user caches
+# (app.access scope_cache, app.principal principal_cache).
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    LRU map of key -> value, with a TTL per entry. The TTL bounds staleness across
+    worker processes; writes in this process invalidate explicitly.
+
+    A load that races an invalidation must not put back what was just dropped, so
+    callers take generation() before loading on a miss and pass it to set(), which
+    skips the write if the key was invalidated since.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> generation of its latest invalidation, LRU-bounded like the entries. A key
+        # dropped from here counts as invalidated at the newest generation dropped so far.
+        self._invalidated = OrderedDict()
+        self._generation = 0
+        self._forgotten = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation: int = None):
+        """Store value, unless key was invalidated after `generation` (value may be stale then)."""
+        with self._lock:
+            if generation is not None and self._invalidated.get(key, self._forgotten) > generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generation += 1
+                self._invalidated[key] = self._generation
+                self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_entries:
+                _, generation = self._invalidated.popitem(last=False)
+                self._forgotten = max(self._forgotten, generation)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidated.clear()
+            self._generation += 1
+            self._forgotten = self._generation
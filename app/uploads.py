@@ -0,0 +1,120 @@
+# app/uploads.py
+#
+# The one way user files (appliance photos, floor plans) get written to disk. The
+# upload is copied in UPLOAD_CHUNK_SIZE chunks, in a worker thread rather than on
+# the event loop, into a temp file next to its destination. A SHA-256 is computed
+# on the way through, and the copy stops with 413 as soon as the kind's size cap
+# is passed. A finished file is fsync'd and renamed into place in one step, so a
+# half-written file is never visible under its final name.
+
+import hashlib
+import os
+import re
+import tempfile
+import uuid
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+_MB = 1024 * 1024
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".heic", ".heif"}
+
+
+class UploadKind(NamedTuple):
+    directory: str
+    max_bytes: int
+    extensions: frozenset
+
+
+UPLOAD_KINDS = {
+    "image": UploadKind(
+        "app/static/images", int(float(os.getenv("UPLOAD_MAX_IMAGE_MB", "20")) * _MB),
+        frozenset(IMAGE_EXTENSIONS),
+    ),
+    "floor_plan": UploadKind(
+        "app/static/uploads", int(float(os.getenv("UPLOAD_MAX_FLOOR_PLAN_MB", "25")) * _MB),
+        frozenset(IMAGE_EXTENSIONS | {".pdf"}),
+    ),
+}
+
+
+class StoredUpload(NamedTuple):
+    filename: str  # name inside the kind's directory
+    path: str
+    size: int
+    sha256: str
+
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def safe_filename(original_filename: str, prefix: str = None) -> str:
+    """`<prefix>_<8 hex>_<original name>`, with path parts and anything but [A-Za-z0-9._-] removed."""
+    base = _UNSAFE.sub("_", os.path.basename(original_filename.replace("\\", "/"))).strip("._") or "upload"
+    parts = [_UNSAFE.sub("_", prefix).strip("._")] if prefix else []
+    return "_".join([part for part in parts if part] + [uuid.uuid4().hex[:8], base])
+
+
+def _too_large(kind: str, limit: int):
+    return HTTPException(status_code=413, detail=f"File too large: {kind} uploads are limited to {limit // _MB} MB")
+
+
+def save_upload(upload: UploadFile, kind: str, prefix: str = None) -> StoredUpload:
+    """
+    Stream `upload` into the kind's directory. Returns None when no file was sent
+    (empty file field); raises 415 for a disallowed extension and 413 over the cap.
+    Blocking: call save_upload_async from async routes.
+    """
+    if upload is None or not getattr(upload, "filename", None):
+        return None
+    spec = UPLOAD_KINDS[kind]
+    extension = os.path.splitext(upload.filename)[1].lower()
+    if extension not in spec.extensions:
+        raise HTTPException(status_code=415, detail=f"Unsupported file type {extension or '(none)'} for {kind} uploads")
+    # The multipart parser already knows the size; refuse without copying anything
+    if upload.size is not None and upload.size > spec.max_bytes:
+        raise _too_large(kind, spec.max_bytes)
+
+    os.makedirs(spec.directory, exist_ok=True)
+    filename = safe_filename(upload.filename, prefix)
+    digest, size = hashlib.sha256(), 0
+    fd, temp_path = tempfile.mkstemp(dir=spec.directory, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            upload.file.seek(0)
+            while chunk := upload.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > spec.max_bytes:
+                    raise _too_large(kind, spec.max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+            out.flush()
+            os.fsync(out.fileno())
+        path = os.path.join(spec.directory, filename)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        upload.file.close()
+    return StoredUpload(filename, path, size, digest.hexdigest())
+
+
+async def save_upload_async(upload: UploadFile, kind: str, prefix: str = None) -> StoredUpload:
+    """save_upload on the thread pool, so a large copy never stalls the event loop."""
+    return await run_in_threadpool(save_upload, upload, kind, prefix)
+
+
+def discard_upload(stored: StoredUpload):
+    """Remove a stored file again, e.g. when the rest of the request fails."""
+    if stored is not None:
+        try:
+            os.unlink(stored.path)
+        except FileNotFoundError:
+            pass
@@ -1,20 +1,15 @@
 # app/utils.py
 
-import os
 import random
-import requests
-from passlib.context import CryptContext
-from datetime import datetime
-from fastapi import Depends, Request, HTTPException, UploadFile
 from sqlalchemy.orm import Session
-from app.database import get_db
 from app import models
+from app.otp_store import otp_service
+from app.email_outbox import enqueue_email, enqueue_batch
 
 # --------------------------
 # Email configuration
 # --------------------------
-BREVO_API_KEY = os.getenv("BREVO_API_KEY")
-SENDER_EMAIL = os.getenv("SENDER_EMAIL")
+# Brevo key, sender and delivery settings: see app.email_outbox
 
 # Hosted backend URL
 HOSTED_URL = "https://property-management-api-e08h.onrender.com"
@@ -22,13 +17,8 @@ HOSTED_URL = "https://property-management-api-e08h.onrender.com"
 # --------------------------
 # Password hashing
 # --------------------------
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# bcrypt runs in a bounded process pool (503 + Retry-After when saturated); see app.password_pool
+from app.password_pool import pwd_context, hash_password, verify_password, hash_password_async, verify_password_async
 
 # --------------------------
 # OTP
@@ -38,60 +28,26 @@ def generate_otp(length: int = 6) -> str:
         length = 4
     return str(random.randint(10**(length - 1), 10**length - 1))
 
-def send_otp_email(to_email: str, otp: str) -> bool:
-    try:
-        url = "https://api.brevo.com/v3/smtp/email"
-        headers = {
-            "accept": "application/json",
-            "api-key": BREVO_API_KEY,
-            "content-type": "application/json"
-        }
-        payload = {
-            "sender": {"name": "Your App", "email": SENDER_EMAIL},
-            "to": [{"email": to_email}],
-            "subject": "Your OTP Code",
-            "htmlContent": f"<html><body><h3>Your OTP is: {otp}</h3></body></html>"
-        }
-
-        response = requests.post(url, headers=headers, json=payload)
-        print(f"Brevo API Response [{response.status_code}]: {response.text}")
-
-        return response.status_code in [200, 201]
-    except Exception as e:
-        print(f"❌ Error sending OTP email: {e}")
-        return False
-
-def verify_otp(user, input_otp: str) -> bool:
-    if not user.otp or not user.otp_expiry:
-        return False
-    if user.otp != input_otp:
-        return False
-    if user.otp_expiry < datetime.utcnow():
-        return False
-    return True
-
-# --------------------------
-# Current user (session)
-# --------------------------
-def get_current_user(request: Request, db: Session = Depends(get_db)):
-    user_id = request.session.get("user_id")
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+def send_otp_email(db: Session, to_email: str, otp: str):
+    """Queue the OTP email in the caller's session; app.email_outbox sends it after the commit."""
+    return enqueue_email(
+        db, to_email,
+        subject="Your OTP Code",
+        html_content=f"<html><body><h3>Your OTP is: {otp}</h3></body></html>",
+        sender_name="Your App",
+    )
 
-    return user
+def verify_otp(email: str, purpose: str, input_otp: str) -> bool:
+    """Check and use up the live code for (email, purpose); codes live in app.otp_store, not on users."""
+    return otp_service.verify(email, purpose, input_otp)
 
 # --------------------------
 # Activation Email
 # --------------------------
-def send_activation_email(to_email: str, token: str):
-    activation_link = f"{HOSTED_URL}/activate/{token}"
+ACTIVATION_SUBJECT = "Activate Your Tenant Account"
 
-    subject = "Activate Your Tenant Account"
 
+def _activation_email_html(activation_link: str) -> str:
     body = f"""
     Hello,
 
@@ -104,52 +60,26 @@ def send_activation_email(to_email: str, token: str):
     Thanks,
     Property Management Team
     """
-
-    try:
-        url = "https://api.brevo.com/v3/smtp/email"
-        headers = {
-            "accept": "application/json",
-            "api-key": BREVO_API_KEY,
-            "content-type": "application/json"
-        }
-
-        payload = {
-            "sender": {"name": "Property Management", "email": SENDER_EMAIL},
-            "to": [{"email": to_email}],
-            "subject": subject,
-            "htmlContent": f"<html><body><p>{body.replace(chr(10), '<br>')}</p></body></html>"
-        }
-
-        response = requests.post(url, headers=headers, json=payload)
-
-        print(f"Brevo Response [{response.status_code}]: {response.text}")
-        print(f"✅ Activation link sent: {activation_link}")
-
-        return response.status_code in [200, 201]
-
-    except Exception as e:
-        print(f"❌ Error sending activation email: {e}")
-        return False
-
-# --------------------------
-# File Upload Fix (Missing Function)
-# --------------------------
-def save_file(uploaded_file: UploadFile, upload_dir: str = "uploads"):
-    """
-    Saves uploaded file to /uploads folder.
-    Returns file path.
-    """
-    try:
-        if not os.path.exists(upload_dir):
-            os.makedirs(upload_dir)
-
-        file_path = os.path.join(upload_dir, uploaded_file.filename)
-
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.file.read())
-
-        return file_path
-
-    except Exception as e:
-        print(f"❌ Error saving file: {e}")
-        return None
+    return f"<html><body><p>{body.replace(chr(10), '<br>')}</p></body></html>"
+
+
+def send_activation_email(db: Session, to_email: str, token: str):
+    # Queued in the caller's session; app.email_outbox sends it after the commit
+    return enqueue_email(
+        db, to_email,
+        subject=ACTIVATION_SUBJECT,
+        html_content=_activation_email_html(f"{HOSTED_URL}/activate/{token}"),
+        sender_name="Property Management",
+    )
+
+
+def send_activation_emails(db: Session, invites, batch_key: str) -> int:
+    """Queue activation emails for (email, token) pairs as one batch, sent in multi-recipient calls."""
+    return enqueue_batch(
+        db,
+        [(email, {"activation_link": f"{HOSTED_URL}/activate/{token}"}) for email, token in invites],
+        subject=ACTIVATION_SUBJECT,
+        html_template=_activation_email_html("{{ params.activation_link }}"),
+        batch_key=batch_key,
+        sender_name="Property Management",
+    )
@@ -0,0 +1,23 @@
+# archive_activity_logs.py
+# Retention job: moves activity_logs rows older than ACTIVITY_LOG_RETENTION_DAYS (default 90)
+# into activity_log_archives as compressed batches, keeping the hot table small.
+# Schedule it daily (e.g. a Render cron job):  python archive_activity_logs.py [days]
+import os
+import sys
+
+from app.database import SessionLocal
+from app import crud
+
+
+def archive(older_than_days: int):
+    db = SessionLocal()
+    try:
+        count = crud.archive_activity_logs(db, older_than_days=older_than_days)
+    finally:
+        db.close()
+    print(f"✅ Archived {count} activity log entries older than {older_than_days} days.")
+
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.getenv("ACTIVITY_LOG_RETENTION_DAYS", "90"))
+    archive(days)
@@ -0,0 +1,136 @@
+# benchmarks/async_db_throughput.py
+#
+# Concurrent-request throughput of an `async def` route that queries through the
+# sync SessionLocal (old pattern: blocks the event loop per query) versus the
+# same work through AsyncSessionLocal + app.crud_async.
+#
+#   python -m benchmarks.async_db_throughput --appliances 50000 --requests 400 --concurrency 50
+#
+# Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set (sync URL; the
+# async URL is derived from it).
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--properties", type=int, default=200)
+parser.add_argument("--appliances", type=int, default=50000)
+parser.add_argument("--requests", type=int, default=400)
+parser.add_argument("--concurrency", type=int, default=50)
+args = parser.parse_args()
+
+db_url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+os.environ["DATABASE_URL"] = db_url
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import insert
+
+from app import crud, crud_async
+from app.database import Base, engine, async_engine, get_db, get_async_db
+from app.models import User, Property, Floor, Appliance, ApplianceStatus
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": 1, "username": "owner", "email": "owner@example.com", "role": "owner"}])
+        conn.execute(insert(Property), [
+            {"id": i, "name": f"Property {i}", "address": f"{i} Main St", "owner_id": 1}
+            for i in range(1, args.properties + 1)
+        ])
+        conn.execute(insert(Floor), [
+            {"id": i, "floor_number": "1", "property_id": i} for i in range(1, args.properties + 1)
+        ])
+        conn.execute(insert(Appliance), [
+            {
+                "user_id": 1,
+                "property_id": i % args.properties + 1,
+                "floor_id": i % args.properties + 1,
+                "name": "Refrigerator",
+                "appliance_type": "Refrigerator",
+                "status": ApplianceStatus.working.name,
+            }
+            for i in range(args.appliances)
+        ])
+
+
+bench = FastAPI()
+
+
+@bench.get("/before")
+async def before(db=Depends(get_db)):
+    properties = crud.get_properties_by_owner(db, 1)
+    total = db.query(Appliance).join(Property).filter(Property.owner_id == 1).count()
+    return {"properties": len(properties), "appliances": total}
+
+
+@bench.get("/after")
+async def after(db=Depends(get_async_db)):
+    properties = await crud_async.get_properties_by_owner(db, 1)
+    total = await crud_async.count_appliances_by_owner(db, 1)
+    return {"properties": len(properties), "appliances": total}
+
+
+@bench.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+async def run(path):
+    latencies, ping_latencies = [], []
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=bench)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)  # warm up pools and caches
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def pinger(stop):
+            while not stop.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        stop = asyncio.Event()
+        ping_task = asyncio.create_task(pinger(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await ping_task
+
+    def p95(values):
+        return statistics.quantiles(values, n=20)[-1] * 1000 if len(values) > 1 else 0.0
+
+    print(
+        f"{path:8} {args.requests / elapsed:8.1f} req/s   "
+        f"p95 {p95(latencies):7.1f} ms   "
+        f"/ping p95 while loaded {p95(ping_latencies):7.1f} ms"
+    )
+
+
+async def main():
+    try:
+        await run("/before")
+        await run("/after")
+    finally:
+        # pooled aiosqlite connections own worker threads; close them on this loop
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    seed()
+    print(f"{args.properties} properties, {args.appliances} appliances, "
+          f"{args.requests} requests @ concurrency {args.concurrency}")
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+# benchmarks/email_stub.py
+#
+# Local stand-in for Brevo's /v3/smtp/email endpoint, for exercising the email
+# outbox (app.email_outbox) without sending real mail. Accepts JSON POSTs, keeps
+# what it received, and can be made slow or flaky to test timeouts and retries.
+#
+#   python -m benchmarks.email_stub --port 8025 --latency 0.5 --fail-rate 0.2
+#   EMAIL_API_URL=http://127.0.0.1:8025/v3/smtp/email uvicorn app.main:app
+#
+# Or in-process:
+#
+#   with StubEmailServer(fail_first=2) as stub:
+#       os.environ["EMAIL_API_URL"] = stub.url   # before importing app.email_outbox
+#       ...
+#       assert stub.received[0]["to"][0]["email"] == "tenant@example.com"
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubEmailServer:
+    """
+    Threaded HTTP server answering 201 to every POST after `latency` seconds. The
+    first `fail_first` requests, and then a random `fail_rate` share, get
+    `fail_status` instead (503 by default; use 400 for a permanent failure), with a
+    Retry-After header of `retry_after` seconds when one is given.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_rate: float = 0.0,
+                 fail_first: int = 0, fail_status: int = 503, retry_after: int = None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.received = []
+        self.requests = 0
+        self.max_concurrent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v3/smtp/email"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("content-length", 0)))
+                with stub._lock:
+                    stub.requests += 1
+                    number = stub.requests
+                    stub._active += 1
+                    stub.max_concurrent = max(stub.max_concurrent, stub._active)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    if number <= stub.fail_first or random.random() < stub.fail_rate:
+                        headers = {"retry-after": str(stub.retry_after)} if stub.retry_after is not None else {}
+                        self._reply(stub.fail_status, {"message": "stub failure"}, headers)
+                        return
+                    with stub._lock:
+                        stub.received.append(json.loads(body or b"{}"))
+                    self._reply(201, {"messageId": f"<stub-{number}@localhost>"})
+                finally:
+                    with stub._lock:
+                        stub._active -= 1
+
+            def _reply(self, status: int, payload: dict, headers: dict = None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="email-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stub for the Brevo send-email API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with --fail-status")
+    parser.add_argument("--fail-first", type=int, default=0, help="fail this many requests before the rest")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with failures")
+    args = parser.parse_args()
+
+    stub = StubEmailServer(args.host, args.port, args.latency, args.fail_rate, args.fail_first, args.fail_status,
+                           args.retry_after)
+    print(f"Stub email API on {stub.url} (Ctrl+C to stop)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{stub.requests} requests, {len(stub.received)} accepted, max {stub.max_concurrent} concurrent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# benchmarks/explain_hot_queries.py
+#
+# Seeds a generated portfolio and runs EXPLAIN on the queries behind the hot
+# listing routes, failing if any of them still needs a full table scan.
+#
+#   python -m benchmarks.explain_hot_queries --properties 500 --appliances 100000
+#
+# Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set. Point that at a
+# disposable Postgres database only: its tables are dropped and recreated.
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--owners", type=int, default=50)
+parser.add_argument("--properties", type=int, default=500)
+parser.add_argument("--floors", type=int, default=4, help="floors per property")
+parser.add_argument("--appliances", type=int, default=100000)
+parser.add_argument("--issues", type=int, default=20000)
+parser.add_argument("--logs", type=int, default=50000)
+args = parser.parse_args()
+
+db_url = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/explain.db"
+os.environ["DATABASE_URL"] = db_url
+
+from sqlalchemy import text
+
+from app import crud
+from app.database import Base, engine, SessionLocal
+from app.models import User, Property, Floor, Appliance, ActivityLog, Issue, IssueStatus, TenantQuery
+from benchmarks.portfolio import generate_portfolio
+
+
+def seed():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    generate_portfolio(
+        engine,
+        owners=args.owners,
+        managers=max(args.owners // 5, 1),
+        properties_per_owner=max(args.properties // args.owners, 1),
+        floors_per_property=args.floors,
+        appliances=args.appliances,
+        issues=args.issues,
+        queries=args.issues,
+        logs_per_owner=max(args.logs // args.owners, 1),
+        snapshots=False,
+    )
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def hot_queries(db):
+    """(route, query) pairs, built the way the routes and crud build them."""
+    owner_id, manager_id, property_id, floor_id = 1, args.owners + 1, 1, 1
+    vendor_id = db.query(User.id).filter(User.role == "vendor").first()[0]
+    tenant_id = db.query(User.id).filter(User.role == "tenant").first()[0]
+    return [
+        ("/dashboard (owner properties)", db.query(Property).filter(Property.owner_id == owner_id)),
+        ("/dashboard (manager properties)", db.query(Property).filter(Property.manager_id == manager_id)),
+        ("/dashboard, /activity (activity feed)", db.query(ActivityLog).filter(ActivityLog.owner_id == owner_id)
+            .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(crud.ACTIVITY_FEED_PAGE_SIZE + 1)),
+        ("archive_activity_logs.py (retention batch)", db.query(ActivityLog.id).filter(
+            ActivityLog.timestamp < datetime.utcnow() - timedelta(days=90))
+            .order_by(ActivityLog.timestamp, ActivityLog.id).limit(crud.ACTIVITY_ARCHIVE_BATCH_SIZE)),
+        ("/dashboard (tenant appliances)", db.query(Appliance).filter(
+            Appliance.property_id == property_id, Appliance.floor_id == floor_id)),
+        ("/dashboard (warranty alerts)", crud._warranty_alert_query(
+            db, [Appliance.id, Appliance.warranty_expiry], owner_id=owner_id
+        ).order_by(Appliance.warranty_expiry, Appliance.id).limit(crud.WARRANTY_ALERT_PAGE_SIZE)),
+        ("/api/appliance-stats", db.query(Appliance.appliance_type, Appliance.status).join(
+            Property, Appliance.property_id == Property.id).filter(Property.owner_id == owner_id)),
+        ("/add_appliance_page (floors)", db.query(Floor).filter(Floor.property_id == property_id)
+            .order_by(Floor.floor_number)),
+        ("/assign_tenant_page (unassigned tenants)", db.query(User).filter(
+            User.role == "tenant", User.property_id == None)),
+        ("/assign_property_page (managers)", db.query(User).filter(User.role == "manager")),
+        ("/owner/issues", db.query(Issue).join(Property).filter(Property.owner_id == owner_id)),
+        ("/vendor/dashboard", db.query(Issue).filter(Issue.vendor_id == vendor_id)),
+        ("/vendor/issues", db.query(Issue).filter(Issue.vendor_id == vendor_id, Issue.status == IssueStatus.assigned)),
+        ("/tenant/queries", db.query(TenantQuery).filter(TenantQuery.reported_by_id == tenant_id)),
+    ]
+
+
+def explain(conn, query):
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "sqlite":
+        plan = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+        full_scans = [line for line in plan if line.startswith("SCAN ") and " INDEX " not in line]
+    else:
+        plan = [row[0] for row in conn.execute(text("EXPLAIN " + sql))]
+        full_scans = [line for line in plan if "Seq Scan" in line]
+    return plan, full_scans
+
+
+def main():
+    seed()
+    print(f"{engine.dialect.name}: {args.properties} properties, {args.appliances} appliances, "
+          f"{args.issues} issues, {args.logs} activity logs\n")
+    db = SessionLocal()
+    failures = 0
+    try:
+        with engine.connect() as conn:
+            for route, query in hot_queries(db):
+                plan, full_scans = explain(conn, query)
+                failures += bool(full_scans)
+                print(f"{'FULL SCAN' if full_scans else 'ok':9}  {route}")
+                for line in plan:
+                    print(f"           {line}")
+    finally:
+        db.close()
+    print(f"\n{failures} quer{'y' if failures == 1 else 'ies'} with a full table scan")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
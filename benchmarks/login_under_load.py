@@ -0,0 +1,144 @@
+# benchmarks/login_under_load.py
+#
+# Login throughput versus dashboard latency under mixed load. For each password
+# hashing mode, a fresh interpreter serves a login burst (--logins concurrent
+# clients posting /login in a loop, honouring Retry-After on 503) while
+# --dashboards clients keep loading /dashboard:
+#   inline - PASSWORD_POOL_WORKERS=0: bcrypt on the request thread pool (the old behaviour)
+#   pool   - the bounded bcrypt process pool (app.password_pool)
+#
+#   python -m benchmarks.login_under_load --duration 15 --logins 50 --dashboards 5
+#   PASSWORD_POOL_WORKERS=2 PASSWORD_POOL_MAX_QUEUE=8 python -m benchmarks.login_under_load --modes pool
+#
+# Uses a throwaway SQLite file per mode unless BENCH_DATABASE_URL is set.
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ("inline", "pool")
+PASSWORD = "password"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+async def run_load(duration: float, logins: int, dashboards: int) -> dict:
+    import httpx
+    from sqlalchemy import select
+
+    from app.database import Base, engine
+    from app.main import app
+    from app.models import User
+    from benchmarks.portfolio import generate_portfolio
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    generate_portfolio(engine, owners=20, managers=5, vendors=5, appliances=5000, issues=1000,
+                       queries=500, logs_per_owner=20, password=PASSWORD)
+    with engine.connect() as conn:
+        owners = list(conn.scalars(select(User.username).where(User.role == "owner")))
+
+    login_latencies, dashboard_latencies = [], []
+    statuses = {}
+    deadline = time.perf_counter() + duration
+
+    async def login_loop(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.post("/login", data={"username": random.choice(owners), "password": PASSWORD})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 503:
+                await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+            else:
+                login_latencies.append((time.perf_counter() - started) * 1000)
+                client.cookies.clear()
+
+    async def dashboard_loop(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            (await client.get("/dashboard")).raise_for_status()
+            dashboard_latencies.append((time.perf_counter() - started) * 1000)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(logins + dashboards)]
+        try:
+            for client, username in zip(clients[logins:], owners):
+                response = await client.post("/login", data={"username": username, "password": PASSWORD})
+                assert response.status_code == 302, response.status_code
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(login_loop(client) for client in clients[:logins]),
+                *(dashboard_loop(client) for client in clients[logins:]),
+            )
+            elapsed = time.perf_counter() - started
+        finally:
+            for client in clients:
+                await client.aclose()
+
+    return {
+        "elapsed": elapsed,
+        "logins_ok": statuses.get(302, 0),
+        "logins_rejected": statuses.get(503, 0),
+        "login_p50_ms": percentile(login_latencies, 50),
+        "login_p95_ms": percentile(login_latencies, 95),
+        "dashboards": len(dashboard_latencies),
+        "dashboard_p50_ms": percentile(dashboard_latencies, 50),
+        "dashboard_p95_ms": percentile(dashboard_latencies, 95),
+        "dashboard_p99_ms": percentile(dashboard_latencies, 99),
+        "dashboard_mean_ms": statistics.fmean(dashboard_latencies) if dashboard_latencies else 0.0,
+    }
+
+
+def run_mode(mode: str, args) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/login.db"
+    env["QUERY_STATS_ENABLED"] = "false"
+    # Measures hashing capacity; the per-account login limit would otherwise turn most of the burst into 429s
+    env["RATE_LIMIT_ENABLED"] = "false"
+    if mode == "inline":
+        env["PASSWORD_POOL_WORKERS"] = "0"
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.login_under_load", "--child",
+         "--duration", str(args.duration), "--logins", str(args.logins), "--dashboards", str(args.dashboards)],
+        env=env, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login throughput vs dashboard latency under mixed load.")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma-separated, from inline, pool")
+    parser.add_argument("--duration", type=float, default=15, help="seconds of load per mode")
+    parser.add_argument("--logins", type=int, default=50, help="concurrent login clients")
+    parser.add_argument("--dashboards", type=int, default=5, help="concurrent dashboard clients")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(run_load(args.duration, args.logins, args.dashboards))))
+        return
+
+    print(f"{args.logins} login clients + {args.dashboards} dashboard clients for {args.duration:.0f}s per mode")
+    print(f"  {'mode':8} {'logins/s':>9} {'503s':>6} {'login p95':>10} {'dash/s':>7} "
+          f"{'dash p50':>9} {'dash p95':>9} {'dash p99':>9}")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        r = run_mode(mode, args)
+        print(f"  {mode:8} {r['logins_ok'] / r['elapsed']:9.1f} {r['logins_rejected']:6} {r['login_p95_ms']:8.0f}ms "
+              f"{r['dashboards'] / r['elapsed']:7.1f} {r['dashboard_p50_ms']:7.0f}ms {r['dashboard_p95_ms']:7.0f}ms "
+              f"{r['dashboard_p99_ms']:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# benchmarks/portfolio.py
+#
+# Synthetic portfolio generator for load tests and benchmarks. Builds owners,
+# managers, vendors, properties, floors, appliances, tenants, issues, tenant
+# queries and activity logs at any scale, writing them with COPY on Postgres
+# (psycopg2) and executemany elsewhere. IDs are assigned up front, so foreign
+# keys are computed instead of read back, and every user shares one bcrypt hash
+# computed once.
+#
+#   DATABASE_URL=sqlite:///./load.db python -m benchmarks.portfolio --reset --appliances 1000000
+#
+# Without --reset, rows are appended after the current max id of each table.
+# All generated users log in with --password (default "password").
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.database import Base, engine
+from app.models import (
+    User, Property, Floor, Appliance, Issue, IssueStatus, TenantQuery, QueryStatus,
+    ActivityLog, ApplianceStatus, WorkerType
+)
+from app.utils import hash_password
+
+CHUNK_SIZE = 50000
+
+APPLIANCE_TYPES = [
+    ("Refrigerator", ["LG GL-I292", "Samsung RT28", "Whirlpool 265"]),
+    ("Air Conditioner", ["Daikin FTKF50", "Voltas 183V", "LG PS-Q19"]),
+    ("Washing Machine", ["Bosch WAJ24", "IFB Senator", "LG FHM1207"]),
+    ("Television", ["Sony X80K", "Samsung AU7700", "Mi 5X"]),
+    ("Water Heater", ["Racold Eterno", "AO Smith HSE", "Bajaj New Shakti"]),
+    ("Microwave", ["IFB 25SC4", "LG MC2846", "Samsung CE1041"]),
+]
+COLORS = ["White", "Black", "Silver", "Grey", "Red"]
+LOCATIONS = ["Kitchen", "Living Room", "Bedroom", "Bathroom", "Utility"]
+PROPERTY_TYPES = ["Apartment", "Villa", "Office", "Hostel"]
+ACTIONS = ["Added appliance", "Updated appliance", "Added floor", "Assigned tenant", "Approved bill"]
+
+# Status mix roughly like production: most appliances work
+STATUS_WEIGHTS = [(ApplianceStatus.working, 70), (ApplianceStatus.not_working, 20), (ApplianceStatus.warranty_expired, 10)]
+
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _write(conn, model, rows):
+    """Bulk-write an iterable of row dicts in chunks. Returns the row count."""
+    count, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            _write_chunk(conn, model, chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        _write_chunk(conn, model, chunk)
+        count += len(chunk)
+    return count
+
+
+def _write_chunk(conn, model, rows):
+    if conn.dialect.driver == "psycopg2":
+        dbapi_connection = conn.connection.dbapi_connection
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)  # None is written as an empty field, which CSV COPY reads as NULL
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {model.__tablename__} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+    elif conn.dialect.paramstyle in ("qmark", "format"):
+        # Plain DB-API executemany with the column types' bind processors applied once per
+        # value; skips Core's per-row parameter compilation, which dominates at this volume
+        columns = list(rows[0])
+        table_columns = model.__table__.c
+        processors = [table_columns[column].type.bind_processor(conn.dialect) for column in columns]
+        placeholder = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+        sql = (f'INSERT INTO {model.__tablename__} ({", ".join(columns)}) '
+               f'VALUES ({", ".join([placeholder] * len(columns))})')
+        conn.exec_driver_sql(sql, [
+            tuple(process(row[column]) if process else row[column] for column, process in zip(columns, processors))
+            for row in rows
+        ])
+    else:
+        conn.execute(insert(model), rows)
+
+
+def generate_portfolio(bind=engine, owners: int = 100, managers: int = 20, vendors: int = 30,
+                       properties_per_owner: int = 5, floors_per_property: int = 4, appliances: int = 100000,
+                       tenants_per_floor: int = 2, issues: int = 20000, queries: int = 10000,
+                       logs_per_owner: int = 200, password: str = "password", seed: int = 42,
+                       snapshots: bool = True):
+    """
+    Insert one synthetic portfolio and return {table: rows written}. Appliances are spread
+    evenly over all floors; tenants live on the floors; issues and queries come from tenants
+    about appliances on their property.
+    """
+    rng = random.Random(seed)
+    password_hash = hash_password(password)  # once, shared by every generated user
+    today = date.today()
+    now = datetime.utcnow()
+    counts = {}
+
+    with bind.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            conn.commit()
+        with conn.begin():
+            user_id = _next_id(conn, User)
+            property_id = _next_id(conn, Property)
+            floor_id = _next_id(conn, Floor)
+            appliance_id = _next_id(conn, Appliance)
+
+            def staff(role, count, first_id, service_type=None):
+                for offset in range(count):
+                    uid = first_id + offset
+                    yield {
+                        "id": uid, "username": f"{role}{uid}", "email": f"{role}{uid}@example.com",
+                        "name": f"{role.title()} {uid}", "role": role, "password_hash": password_hash,
+                        "is_verified": True, "property_id": None, "floor_id": None,
+                        "service_type": service_type() if service_type else None
+                    }
+
+            owner_ids = range(user_id, user_id + owners)
+            manager_ids = range(owner_ids.stop, owner_ids.stop + managers)
+            vendor_ids = range(manager_ids.stop, manager_ids.stop + vendors)
+            tenant_first_id = vendor_ids.stop
+            counts["users"] = _write(conn, User, staff("owner", owners, owner_ids.start))
+            counts["users"] += _write(conn, User, staff("manager", managers, manager_ids.start))
+            counts["users"] += _write(conn, User, staff(
+                "vendor", vendors, vendor_ids.start, service_type=lambda: rng.choice(list(WorkerType)).value
+            ))
+
+            property_count = owners * properties_per_owner
+            property_ids = range(property_id, property_id + property_count)
+            counts["properties"] = _write(conn, Property, (
+                {
+                    "id": pid, "name": f"Property {pid}", "address": f"{pid} Market Road",
+                    "property_type": rng.choice(PROPERTY_TYPES),
+                    "owner_id": owner_ids[(pid - property_id) // properties_per_owner],
+                    # about two thirds of properties have a manager
+                    "manager_id": manager_ids[pid % managers] if managers and pid % 3 else None,
+                }
+                for pid in property_ids
+            ))
+
+            floor_count = property_count * floors_per_property
+            floor_ids = range(floor_id, floor_id + floor_count)
+
+            def floor_property(fid):
+                return property_ids[(fid - floor_id) // floors_per_property]
+
+            counts["floors"] = _write(conn, Floor, (
+                {"id": fid, "floor_number": str((fid - floor_id) % floors_per_property), "property_id": floor_property(fid)}
+                for fid in floor_ids
+            ))
+
+            # warranties from two years ago to four years out
+            expiry_dates = [today + timedelta(days=days) for days in range(-730, 1461)]
+            status_names, status_weights = zip(*((status.name, weight) for status, weight in STATUS_WEIGHTS))
+
+            def appliance_rows():
+                # Random columns are drawn a chunk at a time; per-row rng calls dominate at 1M rows
+                for start in range(0, appliances, CHUNK_SIZE):
+                    size = min(CHUNK_SIZE, appliances - start)
+                    statuses = rng.choices(status_names, status_weights, k=size)
+                    expiries = rng.choices(expiry_dates, k=size)
+                    model_picks = rng.choices(range(3), k=size)
+                    colors = rng.choices(COLORS, k=size)
+                    locations = rng.choices(LOCATIONS, k=size)
+                    for i in range(size):
+                        offset = start + i
+                        fid = floor_ids[offset % floor_count]
+                        pid = floor_property(fid)
+                        appliance_type, models_ = APPLIANCE_TYPES[offset % len(APPLIANCE_TYPES)]
+                        yield {
+                            "id": appliance_id + offset,
+                            "user_id": owner_ids[(pid - property_id) // properties_per_owner],
+                            "property_id": pid, "floor_id": fid,
+                            "name": appliance_type, "appliance_type": appliance_type,
+                            "model": models_[model_picks[i]], "color": colors[i],
+                            "status": statuses[i], "warranty_expiry": expiries[i],
+                            "location": locations[i],
+                        }
+
+            # Building secondary indexes once after the load beats maintaining them row by row
+            deferred_indexes = list(Appliance.__table__.indexes) if appliance_id == 1 else []
+            for index in deferred_indexes:
+                index.drop(conn)
+            counts["appliances"] = _write(conn, Appliance, appliance_rows())
+            for index in deferred_indexes:
+                index.create(conn)
+
+            tenant_count = floor_count * tenants_per_floor
+            tenant_ids = range(tenant_first_id, tenant_first_id + tenant_count)
+
+            def tenant_floor(tid):
+                return floor_ids[(tid - tenant_first_id) // tenants_per_floor]
+
+            counts["users"] += _write(conn, User, (
+                {
+                    "id": tid, "username": f"tenant{tid}", "email": f"tenant{tid}@example.com",
+                    "name": f"Tenant {tid}", "role": "tenant", "password_hash": password_hash,
+                    "is_verified": True, "property_id": floor_property(tenant_floor(tid)),
+                    "floor_id": tenant_floor(tid), "service_type": None,
+                }
+                for tid in tenant_ids
+            ))
+
+            def tenant_appliance(tid):
+                # An appliance on the tenant's floor (appliances are spread round-robin over floors)
+                floor_offset = tenant_floor(tid) - floor_id
+                per_floor = max((appliances - 1 - floor_offset) // floor_count + 1, 0) if appliances else 0
+                if not per_floor:
+                    return None
+                return appliance_id + floor_offset + floor_count * rng.randrange(per_floor)
+
+            issue_statuses = list(IssueStatus)
+
+            def issue_rows():
+                for _ in range(issues if tenant_count else 0):
+                    tid = tenant_ids[rng.randrange(tenant_count)]
+                    status = rng.choice(issue_statuses)
+                    yield {
+                        "description": "Appliance not working as expected", "status": status.name,
+                        "tenant_id": tid, "property_id": floor_property(tenant_floor(tid)),
+                        "appliance_id": tenant_appliance(tid), "appliance_name": None,
+                        "vendor_id": vendor_ids[rng.randrange(vendors)] if vendors and status != IssueStatus.pending else None,
+                        "bill_amount": round(rng.uniform(500, 5000), 2) if status == IssueStatus.paid else None,
+                        "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                    }
+
+            counts["issues"] = _write(conn, Issue, issue_rows())
+
+            def query_rows():
+                for _ in range(queries if tenant_count else 0):
+                    tid = tenant_ids[rng.randrange(tenant_count)]
+                    yield {
+                        "description": "Question about my appliance",
+                        "status": rng.choice(list(QueryStatus)).name,
+                        "reported_by_id": tid, "property_id": floor_property(tenant_floor(tid)),
+                        "appliance_id": tenant_appliance(tid),
+                        "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 365)),
+                    }
+
+            counts["tenant_queries"] = _write(conn, TenantQuery, query_rows())
+
+            counts["activity_logs"] = _write(conn, ActivityLog, (
+                {
+                    "action": rng.choice(ACTIONS), "user_id": oid, "owner_id": oid, "user": None,
+                    "timestamp": now - timedelta(minutes=rng.randint(0, 60 * 24 * 180)),
+                }
+                for oid in owner_ids
+                for _ in range(logs_per_owner)
+            ))
+
+            if conn.dialect.name == "postgresql":
+                # Explicit ids bypass the sequences; move them past the new rows
+                for model in (User, Property, Floor, Appliance, Issue, TenantQuery, ActivityLog):
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+                        f"(SELECT COALESCE(MAX(id), 1) FROM {model.__tablename__}))"
+                    ))
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("PRAGMA synchronous = FULL")
+            conn.commit()
+
+    if snapshots:
+        with Session(bind) as db:
+            counts["dashboard_snapshots"] = crud.rebuild_dashboard_snapshots(db)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic property portfolio in DATABASE_URL.")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--managers", type=int, default=20)
+    parser.add_argument("--vendors", type=int, default=30)
+    parser.add_argument("--properties-per-owner", type=int, default=5)
+    parser.add_argument("--floors-per-property", type=int, default=4)
+    parser.add_argument("--appliances", type=int, default=100000, help="total, spread over all floors")
+    parser.add_argument("--tenants-per-floor", type=int, default=2)
+    parser.add_argument("--issues", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--logs-per-owner", type=int, default=200)
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-snapshots", dest="snapshots", action="store_false",
+                        help="skip rebuilding dashboard_snapshots afterwards")
+    args = vars(parser.parse_args())
+
+    if args.pop("reset"):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+
+    started = time.perf_counter()
+    counts = generate_portfolio(engine, **args)
+    elapsed = time.perf_counter() - started
+    for table, count in counts.items():
+        print(f"  {table:20} {count:>10,}")
+    print(f"✅ Generated {sum(counts.values()):,} rows in {elapsed:.1f}s "
+          f"({engine.url.render_as_string(hide_password=True)}); users log in with '{args['password']}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+# benchmarks/route_latency.py
+#
+# Route-level benchmark: drives the pages we serve through the ASGI app against
+# generated portfolios of increasing size (benchmarks.portfolio) and reports, per
+# route and dataset size, p50/p95/p99 latency, SQL statements per request (from
+# the Server-Timing header added by app.query_stats) and peak Python memory
+# allocated while serving one request (tracemalloc).
+#
+# Results are checked against benchmarks/route_budgets.json; the run exits 1 when
+# any route goes over its p95, statement or memory budget.
+#
+#   python -m benchmarks.route_latency                         # small + medium, check budgets
+#   python -m benchmarks.route_latency --sizes small,medium,large --requests 50
+#   python -m benchmarks.route_latency --record                # re-record budgets after an intended change
+#
+# --record only proposes numbers: review the diff before committing it, and don't
+# give a budget to a route whose time or memory grows with the dataset (see the
+# _notes in route_budgets.json).
+#
+# Uses a throwaway SQLite file unless BENCH_DATABASE_URL is set (its tables are
+# dropped and recreated for every size).
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/routes.db"
+os.environ.pop("READ_DATABASE_URL", None)
+os.environ["QUERY_STATS_ENABLED"] = "true"
+
+import httpx
+from sqlalchemy import select
+
+from app.database import Base, engine
+from app.main import app
+from app.models import User, Property, Issue
+from benchmarks.portfolio import generate_portfolio
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "route_budgets.json")
+PASSWORD = "password"
+
+SIZES = {
+    "small": dict(owners=10, managers=4, vendors=5, properties_per_owner=5, floors_per_property=4,
+                  appliances=2000, tenants_per_floor=2, issues=500, queries=250, logs_per_owner=50),
+    "medium": dict(owners=40, managers=30, vendors=15, properties_per_owner=15, floors_per_property=4,
+                   appliances=20000, tenants_per_floor=2, issues=5000, queries=2500, logs_per_owner=100),
+    "large": dict(owners=100, managers=160, vendors=30, properties_per_owner=40, floors_per_property=4,
+                  appliances=100000, tenants_per_floor=2, issues=20000, queries=10000, logs_per_owner=200),
+}
+
+# Owner portfolios grow with the size too, so per-property work in owner routes shows up.
+# Managers grow with them to keep about 20-25 managed properties each.
+
+# (label, role, path)
+ROUTES = [
+    ("GET /dashboard [owner]", "owner", "/dashboard"),
+    ("GET /dashboard [manager]", "manager", "/dashboard"),
+    ("GET /dashboard [tenant]", "tenant", "/dashboard"),
+    ("GET /view_properties", "owner", "/view_properties"),
+    ("GET /api/appliance-stats", "owner", "/api/appliance-stats"),
+    ("GET /manager/issues", "manager", "/manager/issues"),
+    ("GET /vendor/dashboard", "vendor", "/vendor/dashboard"),
+    ("GET /add_appliance_page", "owner", "/add_appliance_page"),
+]
+
+# Recorded budgets = measured value times the headroom; statement counts are recorded exactly.
+# Fast routes also get an absolute slack, or a GC pause alone would fail them.
+LATENCY_HEADROOM = 2.0
+LATENCY_SLACK_MS = 50
+MEMORY_HEADROOM = 1.5
+
+_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def statement_count(response) -> int:
+    match = _QUERIES.search(response.headers.get("server-timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+def prepare_dataset(size: str):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    generate_portfolio(engine, password=PASSWORD, **SIZES[size])
+
+
+def pick_users() -> dict:
+    """One representative login per role: users that actually own or are assigned data."""
+    with engine.connect() as conn:
+        return {
+            "owner": conn.scalar(
+                select(User.username).join(Property, Property.owner_id == User.id).order_by(User.id).limit(1)
+            ),
+            "manager": conn.scalar(
+                select(User.username).join(Property, Property.manager_id == User.id).order_by(User.id).limit(1)
+            ),
+            "tenant": conn.scalar(
+                select(User.username).where(User.role == "tenant", User.floor_id.is_not(None)).order_by(User.id).limit(1)
+            ),
+            "vendor": conn.scalar(
+                select(User.username).join(Issue, Issue.vendor_id == User.id).order_by(User.id).limit(1)
+            ),
+        }
+
+
+async def login(client: httpx.AsyncClient, username: str):
+    response = await client.post("/login", data={"username": username, "password": PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f"login as {username} failed with {response.status_code}")
+
+
+async def measure_route(client: httpx.AsyncClient, path: str, requests: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        (await client.get(path)).raise_for_status()
+
+    latencies, statements = [], []
+    for _ in range(requests):
+        # Don't bill this sample for collecting the previous request's garbage
+        gc.collect()
+        started = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        response.raise_for_status()
+        statements.append(statement_count(response))
+
+    # Separate pass: tracemalloc slows allocation-heavy code too much to time under it
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        (await client.get(path)).raise_for_status()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "statements": max(statements),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+async def run_size(size: str, requests: int, warmup: int) -> dict:
+    users = pick_users()
+    clients = {}
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    # Inside the app lifespan, so the async engine and password pool are shut down afterwards
+    async with app.router.lifespan_context(app):
+        try:
+            for label, role, path in ROUTES:
+                if role not in clients:
+                    clients[role] = httpx.AsyncClient(transport=transport, base_url="http://bench")
+                    await login(clients[role], users[role])
+                results[label] = await measure_route(clients[role], path, requests, warmup)
+        finally:
+            for client in clients.values():
+                await client.aclose()
+    return results
+
+
+def check_budgets(results: dict, budgets: dict) -> list:
+    """Human-readable violations of the recorded budgets; routes without a budget are not checked."""
+    violations = []
+    for size, routes in results.items():
+        for label, measured in routes.items():
+            budget = budgets.get(size, {}).get(label)
+            if budget is None:
+                continue
+            for key in ("p95_ms", "statements", "peak_kib"):
+                if key in budget and measured[key] > budget[key]:
+                    violations.append(f"{size} {label}: {key} {measured[key]} > budget {budget[key]}")
+    return violations
+
+
+def record_budgets(results: dict, budgets: dict) -> dict:
+    for size, routes in results.items():
+        budgets[size] = {
+            label: {
+                "p95_ms": math.ceil(max(measured["p95_ms"] * LATENCY_HEADROOM, measured["p95_ms"] + LATENCY_SLACK_MS)),
+                "statements": measured["statements"],
+                "peak_kib": math.ceil(measured["peak_kib"] * MEMORY_HEADROOM),
+            }
+            for label, measured in routes.items()
+        }
+    return budgets
+
+
+def print_results(size: str, routes: dict):
+    print(f"\n{size} ({SIZES[size]['appliances']:,} appliances, {SIZES[size]['issues']:,} issues)")
+    print(f"  {'route':28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'peak KiB':>9}")
+    for label, m in routes.items():
+        print(f"  {label:28} {m['p50_ms']:8.1f} {m['p95_ms']:8.1f} {m['p99_ms']:8.1f} "
+              f"{m['statements']:8} {m['peak_kib']:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark served routes against growing datasets.")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated, from {', '.join(SIZES)}")
+    parser.add_argument("--requests", type=int, default=30, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    parser.add_argument("--record", action="store_true", help="write measured values (plus headroom) as the new budgets")
+    parser.add_argument("--json", dest="json_out", help="also write the raw results to this file")
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    results = {}
+    for size in sizes:
+        started = time.perf_counter()
+        prepare_dataset(size)
+        print(f"generated {size} dataset in {time.perf_counter() - started:.1f}s")
+        results[size] = asyncio.run(run_size(size, args.requests, args.warmup))
+        print_results(size, results[size])
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets) as f:
+            budgets = json.load(f)
+
+    if args.record:
+        with open(args.budgets, "w") as f:
+            json.dump(record_budgets(results, budgets), f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n✅ Recorded budgets for {', '.join(sizes)} in {args.budgets}")
+        return
+
+    violations = check_budgets(results, budgets)
+    if violations:
+        print("\n❌ Over budget:")
+        for violation in violations:
+            print(f"  {violation}")
+        sys.exit(1)
+    print("\n✅ All routes within budget")
+
+
+if __name__ == "__main__":
+    main()
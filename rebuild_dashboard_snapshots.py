@@ -0,0 +1,18 @@
+# rebuild_dashboard_snapshots.py
+# Recomputes every owner/manager row in dashboard_snapshots from the live tables.
+# Run after migrations or bulk data fixes:  python rebuild_dashboard_snapshots.py
+from app.database import SessionLocal
+from app import crud
+
+
+def rebuild():
+    db = SessionLocal()
+    try:
+        count = crud.rebuild_dashboard_snapshots(db)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt {count} dashboard snapshots.")
+
+
+if __name__ == "__main__":
+    rebuild()
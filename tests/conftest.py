@@ -0,0 +1,96 @@
+# tests/conftest.py
+#
+# The app reads DATABASE_URL when app.database is imported, so point it at a
+# throwaway SQLite file before any test module imports app code. Activity logs
+# are written through the caller's session, passwords are hashed inline, and rate
+# limiting is off unless a test turns it on (tests/test_rate_limit.py).
+import itertools
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ.pop("READ_DATABASE_URL", None)
+os.environ["ACTIVITY_LOG_MODE"] = "sync"
+os.environ["PASSWORD_POOL_WORKERS"] = "0"
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ.setdefault("JWT_SECRET_KEY", "test-signing-key")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import Base, engine, SessionLocal
+from app import models  # noqa: F401  registers the tables
+
+PASSWORD = "password"
+_ids = itertools.count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    Base.metadata.create_all(bind=engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def password_hash():
+    from app.utils import hash_password
+    return hash_password(PASSWORD)
+
+
+@pytest.fixture
+def make_user(db, password_hash):
+    """Create a verified user with a unique username/email; the password is PASSWORD."""
+    def make(role="owner", **fields):
+        n = next(_ids)
+        fields.setdefault("username", f"{role}{n}")
+        fields.setdefault("email", f"{role}{n}@example.com")
+        user = models.User(password_hash=password_hash, role=role, is_verified=True, **fields)
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_property(db):
+    """A property with `floors` floors and `appliances` appliances on each floor, inserted directly."""
+    def make(owner, manager=None, floors=1, appliances=0, warranty_expiry=None):
+        property_obj = models.Property(name=f"Property {next(_ids)}", address="1 Test Street",
+                                       owner_id=owner.id, manager_id=manager.id if manager else None)
+        db.add(property_obj)
+        db.flush()
+        for number in range(floors):
+            floor = models.Floor(floor_number=str(number), property_id=property_obj.id)
+            db.add(floor)
+            db.flush()
+            for _ in range(appliances):
+                db.add(models.Appliance(user_id=owner.id, property_id=property_obj.id, floor_id=floor.id,
+                                        name="Fridge", appliance_type="Fridge",
+                                        status=models.ApplianceStatus.working, warranty_expiry=warranty_expiry))
+        db.commit()
+        return property_obj
+    return make
+
+
+@pytest.fixture
+def client_for():
+    """A TestClient logged in (browser session) as the given user."""
+    from app.main import app
+
+    def login(user):
+        client = TestClient(app)
+        response = client.post("/login", data={"username": user.username, "password": PASSWORD},
+                               follow_redirects=False)
+        assert response.status_code == 302, response.text
+        return client
+    return login
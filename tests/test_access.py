@@ -0,0 +1,76 @@
+# tests/test_access.py
+#
+# Property access scopes (app.access): the cached scope follows ownership and
+# assignment changes made through crud, and the write routes check it.
+from app import crud, schemas
+from app.access import get_accessible_property_ids, scope_cache
+from app.models import Appliance, Floor
+
+
+def test_scope_follows_create_assign_and_delete(db, make_user):
+    owner, manager, other_manager = make_user("owner"), make_user("manager"), make_user("manager")
+    assert get_accessible_property_ids(db, owner) == frozenset()
+    assert get_accessible_property_ids(db, manager) == frozenset()
+
+    property_obj = crud.create_property(
+        db, schemas.PropertyCreate(name="Block A", address="1 Road", property_type="flat"), owner.id
+    )
+    assert get_accessible_property_ids(db, owner) == {property_obj.id}
+
+    crud.assign_property_to_manager(db, property_obj.id, manager.id)
+    assert get_accessible_property_ids(db, manager) == {property_obj.id}
+
+    crud.assign_property_to_manager(db, property_obj.id, other_manager.id)
+    assert get_accessible_property_ids(db, manager) == frozenset()
+    assert get_accessible_property_ids(db, other_manager) == {property_obj.id}
+
+    crud.delete_property(db, property_obj)
+    assert get_accessible_property_ids(db, owner) == frozenset()
+    assert get_accessible_property_ids(db, other_manager) == frozenset()
+
+
+def test_scope_is_cached_between_changes(db, make_user, make_property):
+    owner = make_user("owner")
+    first = make_property(owner)
+    assert get_accessible_property_ids(db, owner) == {first.id}
+
+    # Written behind crud's back: only the TTL would pick this up
+    make_property(owner)
+    assert get_accessible_property_ids(db, owner) == {first.id}
+    scope_cache.invalidate(owner.id)
+    assert len(get_accessible_property_ids(db, owner)) == 2
+
+
+def test_add_appliance_checks_property_and_floor(db, make_user, make_property, client_for):
+    owner, intruder = make_user("owner"), make_user("owner")
+    property_obj = make_property(owner)
+    elsewhere = make_property(owner)
+    form = {"name": "Kettle", "status": "Working", "property_id": property_obj.id,
+            "floor_id": property_obj.floors[0].id}
+
+    assert client_for(intruder).post("/add_appliance", data=form, follow_redirects=False).status_code == 403
+    response = client_for(owner).post("/add_appliance", data={**form, "floor_id": elsewhere.floors[0].id},
+                                      follow_redirects=False)
+    assert response.status_code == 400
+    assert db.query(Appliance).filter(Appliance.name == "Kettle").count() == 0
+
+    assert client_for(owner).post("/add_appliance", data=form, follow_redirects=False).status_code == 303
+    assert db.query(Appliance).filter(Appliance.name == "Kettle").count() == 1
+
+
+def test_floor_edits_check_scope(db, make_user, make_property, client_for):
+    owner = make_user("owner")
+    floor_id = make_property(owner).floors[0].id
+    tenant = make_user("tenant")
+
+    assert client_for(make_user("owner")).get(f"/edit_floor/{floor_id}").status_code == 403
+    for user in (tenant, make_user("vendor"), make_user("owner")):
+        response = client_for(user).post(f"/update_floor/{floor_id}", data={"floor_number": "Roof"},
+                                         follow_redirects=False)
+        assert response.status_code == 403
+
+    response = client_for(owner).post(f"/update_floor/{floor_id}", data={"floor_number": "Roof"},
+                                      follow_redirects=False)
+    assert response.status_code == 303
+    db.expire_all()
+    assert db.get(Floor, floor_id).floor_number == "Roof"
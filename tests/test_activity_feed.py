@@ -0,0 +1,68 @@
+# tests/test_activity_feed.py
+#
+# The per-owner activity feed: keyset pagination on (timestamp, id), and
+# archiving of old entries out of activity_logs (crud.archive_activity_logs).
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import crud
+from app.models import ActivityLog, ActivityLogArchive
+
+
+def add_logs(db, owner, count, start):
+    for i in range(count):
+        db.add(ActivityLog(user_id=owner.id, owner_id=owner.id, action=f"action {i}",
+                           timestamp=start + timedelta(minutes=i // 2)))  # pairs share a timestamp
+    db.commit()
+
+
+def test_feed_pages_newest_first_without_gaps(db, make_user):
+    owner = make_user("owner")
+    add_logs(db, owner, 7, datetime(2026, 1, 1))
+    add_logs(db, make_user("owner"), 3, datetime(2026, 1, 1))
+
+    entries, cursor = [], None
+    while True:
+        page, cursor = crud.get_activity_feed(db, owner_id=owner.id, cursor=cursor, limit=3)
+        entries.extend(page)
+        if cursor is None:
+            break
+
+    assert [e["action"] for e in entries] == [f"action {i}" for i in reversed(range(7))]
+    keys = [(e["timestamp"], e["id"]) for e in entries]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_feed_rejects_a_malformed_cursor(db, make_user):
+    with pytest.raises(HTTPException) as error:
+        crud.get_activity_feed(db, owner_id=make_user("owner").id, cursor="garbage")
+    assert error.value.status_code == 400
+
+
+def test_archiving_moves_old_entries_out_of_the_feed(db, make_user):
+    owner = make_user("owner")
+    add_logs(db, owner, 4, datetime.utcnow() - timedelta(days=400))
+    add_logs(db, owner, 2, datetime.utcnow())
+
+    crud.archive_activity_logs(db, older_than_days=365, batch_size=3)
+
+    entries, _ = crud.get_activity_feed(db, owner_id=owner.id, limit=10)
+    assert len(entries) == 2
+    archives = db.query(ActivityLogArchive).filter(ActivityLogArchive.owner_id == owner.id).all()
+    archived = [entry for archive in archives for entry in crud.read_activity_archive(archive)]
+    assert sorted(entry["action"] for entry in archived) == [f"action {i}" for i in range(4)]
+    assert sum(archive.entry_count for archive in archives) == 4
+
+
+def test_api_feed_is_scoped_and_paged(db, make_user, client_for):
+    owner = make_user("owner")
+    add_logs(db, owner, 5, datetime(2026, 2, 1))
+    client = client_for(owner)
+
+    first = client.get("/api/activity", params={"limit": 3}).json()
+    second = client.get("/api/activity", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+    assert len(first["entries"]) == 3 and len(second["entries"]) == 2
+    assert second["next_cursor"] is None
+    assert client_for(make_user("owner")).get("/api/activity").json()["entries"] == []
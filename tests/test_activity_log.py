@@ -0,0 +1,72 @@
+# tests/test_activity_log.py
+#
+# The write-behind activity sink (app.activity_log): entries are buffered and
+# written in one INSERT, and a failed flush keeps them for the next try.
+import pytest
+
+from app.activity_log import ActivityLogSink
+from app.database import engine
+from app.models import ActivityLog
+
+
+class FailingBind:
+    def begin(self):
+        raise RuntimeError("database is down")
+
+
+def logged_actions(db, owner_id):
+    db.expire_all()
+    return [action for (action,) in db.query(ActivityLog.action).filter(ActivityLog.owner_id == owner_id)
+            .order_by(ActivityLog.id)]
+
+
+@pytest.fixture
+def make_sink():
+    sinks = []
+
+    def make(**kwargs):
+        sink = ActivityLogSink(flush_interval=3600, buffered=True, **kwargs)
+        sinks.append(sink)
+        return sink
+
+    yield make
+    for sink in sinks:
+        sink.stop()
+
+
+def test_entries_are_written_in_one_batch_when_the_buffer_fills(db, make_user, make_sink):
+    owner = make_user("owner")
+    sink = make_sink(flush_size=3)
+
+    sink.enqueue(owner.id, "one", owner_id=owner.id)
+    sink.enqueue(owner.id, "two", owner_id=owner.id)
+    assert logged_actions(db, owner.id) == []
+    assert sink.pending_count() == 2
+
+    sink.enqueue(owner.id, "three", owner_id=owner.id)
+    assert logged_actions(db, owner.id) == ["one", "two", "three"]
+    assert sink.pending_count() == 0
+
+
+def test_stop_writes_what_is_left(db, make_user, make_sink):
+    owner = make_user("owner")
+    sink = make_sink(flush_size=100)
+    sink.enqueue(owner.id, "late", owner_id=owner.id)
+
+    sink.stop()
+    assert logged_actions(db, owner.id) == ["late"]
+
+
+def test_failed_flush_keeps_the_newest_entries_for_the_next_try(db, make_user, make_sink):
+    owner = make_user("owner")
+    sink = make_sink(flush_size=100, max_buffer=2)
+    sink.bind = FailingBind()
+    for action in ("a", "b", "c"):
+        sink.enqueue(owner.id, action, owner_id=owner.id)
+
+    assert sink.flush() == 0
+    assert sink.pending_count() == 2
+
+    sink.bind = engine
+    assert sink.flush() == 2
+    assert logged_actions(db, owner.id) == ["b", "c"]
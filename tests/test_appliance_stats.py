@@ -0,0 +1,48 @@
+# tests/test_appliance_stats.py
+#
+# Stored, normalized appliance status and type, and the SQL-grouped
+# /api/appliance-stats built on them.
+import pytest
+
+from app import crud
+from app.models import ApplianceStatus
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Working", ApplianceStatus.working),
+    (" working ", ApplianceStatus.working),
+    ("Not Working", ApplianceStatus.not_working),
+    ("not_working", ApplianceStatus.not_working),
+    ("WARRANTY EXPIRED", ApplianceStatus.warranty_expired),
+    (ApplianceStatus.working, ApplianceStatus.working),
+    ("broken", ApplianceStatus.not_working),
+    (None, ApplianceStatus.not_working),
+])
+def test_normalize_appliance_status(raw, expected):
+    assert crud.normalize_appliance_status(raw) is expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Refrigerator Front", "Refrigerator"),
+    ("TV", "TV"),
+    ("", "Unknown"),
+    (None, "Unknown"),
+])
+def test_derive_appliance_type(name, expected):
+    assert crud.derive_appliance_type(name) == expected
+
+
+def test_appliance_stats_groups_by_type_and_status(db, make_user, make_property, client_for):
+    owner = make_user("owner")
+    floor = make_property(owner).floors[0]
+    for name, status in [("TV Front", "working"), ("TV", "Not Working"), ("AC", "Working")]:
+        crud.create_appliance(db, owner.id, name, None, None, status, None, floor.property_id, floor.id, "Hall")
+    make_property(make_user("owner"), appliances=5)  # someone else's
+
+    stats = client_for(owner).get("/api/appliance-stats").json()
+
+    assert stats["type_status"] == {
+        "TV": {"Working": 1, "Not Working": 1, "Warranty Expired": 0},
+        "AC": {"Working": 1, "Not Working": 0, "Warranty Expired": 0},
+    }
+    assert stats["health_percent"] == round(2 / 3 * 100, 2)
@@ -0,0 +1,56 @@
+# tests/test_crud_async.py
+#
+# app.crud_async: native AsyncSession reads, and writes that run the sync crud
+# function through run_sync (so the same snapshot updates and errors apply).
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import crud, crud_async
+from app.database import AsyncSessionLocal, async_engine
+
+
+def run(fn):
+    """Run fn(session) on a fresh event loop; pooled connections belong to that loop, so close them after."""
+    async def main():
+        try:
+            async with AsyncSessionLocal() as session:
+                return await fn(session)
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(main())
+
+
+def test_reads(db, make_user, make_property):
+    owner = make_user("owner")
+    property_obj = make_property(owner, floors=2, appliances=2)
+
+    assert run(lambda s: crud_async.get_user_by_username(s, owner.username)).id == owner.id
+    assert [p.id for p in run(lambda s: crud_async.get_properties_by_owner(s, owner.id))] == [property_obj.id]
+    assert len(run(lambda s: crud_async.get_floors_by_property(s, property_obj.id))) == 2
+    assert run(lambda s: crud_async.count_appliances_by_owner(s, owner.id)) == 4
+
+
+def test_create_appliance_goes_through_sync_crud(db, make_user, make_property):
+    owner = make_user("owner")
+    floor = make_property(owner).floors[0]
+    crud.get_dashboard_snapshot(db, owner)
+
+    appliance = run(lambda s: crud_async.create_appliance(
+        s, owner.id, "Washer Front", None, None, "not working", None, floor.property_id, floor.id, "Utility"
+    ))
+
+    assert appliance.appliance_type == "Washer"
+    assert appliance.status.value == "Not Working"
+    db.expire_all()
+    assert crud.get_dashboard_snapshot(db, owner).total_appliance_count == 1
+
+
+def test_create_appliance_on_unknown_property_is_404(make_user):
+    owner = make_user("owner")
+    with pytest.raises(HTTPException) as error:
+        run(lambda s: crud_async.create_appliance(
+            s, owner.id, "TV", None, None, "Working", None, 999999, 1, "Hall"
+        ))
+    assert error.value.status_code == 404
@@ -0,0 +1,101 @@
+# tests/test_dashboard_snapshot.py
+#
+# Per-user dashboard snapshot rows (crud._load_snapshot / _apply_snapshot_delta):
+# built on first read, shifted in the same transaction as each write, and safe
+# against a concurrent first insert of the same user's row.
+from datetime import date, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import Query
+
+from app import crud
+from app.database import SessionLocal
+from app.models import DashboardSnapshot
+
+
+def snapshot_counts(db, user):
+    db.expire_all()
+    snapshot = crud.get_dashboard_snapshot(db, user)
+    return {field: getattr(snapshot, field) for field in crud.SNAPSHOT_COUNTERS}
+
+
+def test_first_read_computes_counts(db, make_user, make_property):
+    owner = make_user("owner")
+    make_property(owner, floors=2, appliances=3)
+
+    assert snapshot_counts(db, owner) == {
+        "total_properties_count": 1,
+        "total_floors_count": 2,
+        "total_appliance_count": 6,
+        "appliances_expiring_count": 0,
+    }
+
+
+def test_writes_shift_owner_and_manager_counters(db, make_user, make_property):
+    owner, manager = make_user("owner"), make_user("manager")
+    property_obj = make_property(owner, manager=manager, floors=1)
+    floor = property_obj.floors[0]
+    snapshot_counts(db, owner), snapshot_counts(db, manager)
+
+    appliance = crud.create_appliance(
+        db, owner.id, "TV", None, None, "Working", date.today() + timedelta(days=5),
+        property_obj.id, floor.id, "Hall"
+    )
+    crud.create_floor(db, "1", property_obj.id)
+    for user in (owner, manager):
+        counts = snapshot_counts(db, user)
+        assert counts["total_appliance_count"] == 1
+        assert counts["appliances_expiring_count"] == 1
+        assert counts["total_floors_count"] == 2
+
+    crud.delete_appliance(db, appliance)
+    assert snapshot_counts(db, owner)["total_appliance_count"] == 0
+    assert snapshot_counts(db, owner)["appliances_expiring_count"] == 0
+
+
+def test_unknown_property_is_404_and_leaves_snapshots_alone(db, make_user):
+    owner = make_user("owner")
+    before = snapshot_counts(db, owner)
+
+    with pytest.raises(HTTPException) as error:
+        crud.create_appliance(db, owner.id, "TV", None, None, "Working", None, 999999, 1, "Hall")
+    assert error.value.status_code == 404
+    with pytest.raises(HTTPException) as error:
+        crud.create_floor(db, "9", 999999)
+    assert error.value.status_code == 404
+    db.rollback()
+    assert snapshot_counts(db, owner) == before
+
+
+def test_concurrent_first_insert_reuses_the_other_row(db, make_user, make_property, monkeypatch):
+    owner = make_user("owner")
+    make_property(owner)
+    today = date.today()
+    other = SessionLocal()
+
+    # This session finds no row; another request inserts and commits one before our insert
+    first = Query.first
+    raced = []
+
+    def racing_first(query):
+        row = first(query)
+        if not raced and query.column_descriptions[0]["entity"] is DashboardSnapshot:
+            raced.append(True)
+            other.add(DashboardSnapshot(user_id=owner.id, total_properties_count=1, computed_on=today))
+            other.commit()
+            return None
+        return row
+
+    monkeypatch.setattr(Query, "first", racing_first)
+    try:
+        snapshot, recomputed = crud._load_snapshot(db, owner.id, "owner", today)
+    finally:
+        other.close()
+    monkeypatch.undo()
+
+    assert raced
+    assert recomputed is False
+    assert snapshot.total_properties_count == 1
+    db.commit()
+    assert db.query(DashboardSnapshot).filter(DashboardSnapshot.user_id == owner.id).count() == 1
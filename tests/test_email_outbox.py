@@ -0,0 +1,172 @@
+# tests/test_email_outbox.py
+#
+# The outbox worker (app.email_outbox) against the local Brevo stub
+# (benchmarks/email_stub.py): claiming and leasing, retry with backoff, honouring
+# Retry-After, giving up on permanent failures, and batched sends.
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.database import engine
+from app.email_outbox import EmailOutboxWorker, enqueue_email, enqueue_batch, EMAIL_OUTBOX_BACKOFF_SECONDS
+from app.models import EmailOutbox
+from benchmarks.email_stub import StubEmailServer
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    with engine.begin() as conn:
+        conn.execute(delete(EmailOutbox))
+    yield
+
+
+@pytest.fixture
+def make_worker():
+    workers = []
+
+    def make(stub, **kwargs):
+        worker = EmailOutboxWorker(api_url=stub.url, timeout=5, **kwargs)
+        workers.append(worker)
+        return worker
+
+    yield make
+    for worker in workers:
+        worker.stop()
+
+
+def queue(db, *emails):
+    for to_email in emails:
+        enqueue_email(db, to_email, "Subject", "<p>Hello</p>")
+    db.commit()
+
+
+def outbox_rows(db):
+    db.expire_all()
+    return db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+
+
+def make_due(db):
+    """Skip the backoff wait: every pending row becomes due now."""
+    db.execute(update(EmailOutbox).where(EmailOutbox.status == "pending")
+               .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+
+
+def test_server_error_is_retried_with_backoff_then_sent(db, make_worker):
+    with StubEmailServer(fail_first=1, fail_status=503) as stub:
+        worker = make_worker(stub)
+        queue(db, "tenant@example.com")
+
+        started = datetime.utcnow()
+        assert worker.drain() == 1
+        [row] = outbox_rows(db)
+        assert row.status == "pending"
+        assert row.attempts == 1
+        assert row.last_error.startswith("HTTP 503")
+        # First retry after the base backoff, +-20% jitter
+        delay = (row.next_attempt_at - started).total_seconds()
+        assert EMAIL_OUTBOX_BACKOFF_SECONDS * 0.8 - 1 <= delay <= EMAIL_OUTBOX_BACKOFF_SECONDS * 1.2 + 1
+
+        # Not due yet: nothing is sent again
+        assert worker.drain() == 0
+        assert stub.requests == 1
+
+        make_due(db)
+        assert worker.drain() == 1
+        [row] = outbox_rows(db)
+        assert row.status == "sent"
+        assert row.attempts == 2
+        assert row.sent_at is not None
+        assert row.last_error is None
+        assert stub.received[0]["to"] == [{"email": "tenant@example.com"}]
+        assert (worker.sent, worker.retried, worker.failed) == (1, 1, 0)
+
+
+def test_client_error_fails_without_retry(db, make_worker):
+    with StubEmailServer(fail_first=1, fail_status=400) as stub:
+        worker = make_worker(stub)
+        queue(db, "bad-address@example.com")
+
+        assert worker.drain() == 1
+        [row] = outbox_rows(db)
+        assert row.status == "failed"
+        assert row.attempts == 1
+        assert row.last_error.startswith("HTTP 400")
+
+        make_due(db)
+        assert worker.drain() == 0
+        assert stub.requests == 1
+        assert (worker.sent, worker.retried, worker.failed) == (0, 0, 1)
+
+
+def test_retries_stop_at_max_attempts(db, make_worker):
+    with StubEmailServer(fail_rate=1.0, fail_status=503) as stub:
+        worker = make_worker(stub, max_attempts=2)
+        queue(db, "tenant@example.com")
+
+        worker.drain()
+        make_due(db)
+        worker.drain()
+        [row] = outbox_rows(db)
+        assert row.status == "failed"
+        assert row.attempts == 2
+        assert stub.requests == 2
+
+
+def test_retry_after_is_honoured(db, make_worker):
+    with StubEmailServer(fail_first=1, fail_status=429, retry_after=600) as stub:
+        worker = make_worker(stub)
+        queue(db, "tenant@example.com")
+
+        started = datetime.utcnow()
+        worker.drain()
+        [row] = outbox_rows(db)
+        assert row.status == "pending"
+        assert row.last_error.startswith("HTTP 429")
+        # Longer than the jittered backoff, so the header decided the delay
+        assert (row.next_attempt_at - started).total_seconds() >= 599
+
+
+def test_batch_key_groups_recipients_into_message_versions(db, make_worker):
+    with StubEmailServer() as stub:
+        worker = make_worker(stub, max_recipients=2)
+        enqueue_batch(
+            db, [(f"t{i}@example.com", {"activation_link": f"https://example.com/activate/{i}"}) for i in range(3)],
+            "Activate your account", "<a href='{{ params.activation_link }}'>Activate</a>", batch_key="import:1",
+        )
+        queue(db, "single@example.com")
+
+        assert worker.drain() == 4
+        assert all(row.status == "sent" for row in outbox_rows(db))
+        # Three batched recipients in chunks of two, plus the plain email on its own
+        assert stub.requests == 3
+        batched = [payload for payload in stub.received if "messageVersions" in payload]
+        plain = [payload for payload in stub.received if "to" in payload]
+        assert sorted(len(payload["messageVersions"]) for payload in batched) == [1, 2]
+        assert [payload["to"] for payload in plain] == [[{"email": "single@example.com"}]]
+        versions = [version for payload in batched for version in payload["messageVersions"]]
+        assert sorted(version["to"][0]["email"] for version in versions) == [f"t{i}@example.com" for i in range(3)]
+        assert {version["params"]["activation_link"] for version in versions} == {
+            f"https://example.com/activate/{i}" for i in range(3)
+        }
+        assert all(payload["htmlContent"] == "<a href='{{ params.activation_link }}'>Activate</a>" for payload in batched)
+
+
+def test_claimed_rows_are_leased_until_the_lease_runs_out(db, make_worker):
+    with StubEmailServer() as stub:
+        worker = make_worker(stub, concurrency=2)
+        queue(db, "a@example.com", "b@example.com")
+
+        now = datetime.utcnow()
+        calls = worker._claim(now)
+        assert sorted(row.to_email for call in calls for row in call) == ["a@example.com", "b@example.com"]
+        # A second worker (or this one) can't claim them while the lease holds...
+        assert worker._claim(now) == []
+        lease_end = max(row.next_attempt_at for row in outbox_rows(db))
+        assert lease_end > now + timedelta(seconds=worker.timeout)
+        # ...but can once it has run out, as if the first worker died mid-send
+        again = worker._claim(lease_end + timedelta(seconds=1))
+        assert sum(len(call) for call in again) == 2
+        assert all(row.attempts == 2 for row in outbox_rows(db))
+        assert stub.requests == 0
@@ -0,0 +1,92 @@
+# tests/test_image_store.py
+#
+# Content-addressed appliance photos (app.image_store): one file per distinct
+# image, reference counts kept by the Appliance mapper events, and unreferenced
+# blobs deleted (file included) by discard() or the collector.
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app import uploads
+from app.background import delete_in_batches
+from app.database import engine
+from app.image_store import ImageStore
+from app.models import Appliance, ApplianceStatus, ImageBlob
+from app.uploads import UploadKind
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, db):
+    monkeypatch.setitem(uploads.UPLOAD_KINDS, "image", UploadKind(str(tmp_path), 1024, frozenset({".png"})))
+    db.query(ImageBlob).delete()
+    db.commit()
+    return ImageStore(directory=str(tmp_path), grace_seconds=0)
+
+
+def photo(data=b"png bytes"):
+    return UploadFile(file=io.BytesIO(data), filename="photo.png")
+
+
+def ref_count(db, image):
+    db.expire_all()
+    blob = db.get(ImageBlob, image.sha256)
+    return None if blob is None else blob.ref_count
+
+
+def test_same_content_is_stored_once(store, tmp_path):
+    first = store.store(photo())
+    second = store.store(photo())
+    other = store.store(photo(b"other bytes"))
+
+    assert first.filename == second.filename != other.filename
+    assert sorted(os.listdir(tmp_path)) == sorted([first.filename, other.filename])
+
+
+def test_references_follow_appliance_rows_and_collect_removes_the_rest(store, tmp_path, db, make_user,
+                                                                      make_property):
+    owner = make_user("owner")
+    floor = make_property(owner).floors[0]
+    image = store.store(photo())
+    appliance = Appliance(user_id=owner.id, property_id=floor.property_id, floor_id=floor.id, name="Fridge",
+                          status=ApplianceStatus.working, front_image=image.filename, detail_image=image.filename)
+    db.add(appliance)
+    db.commit()
+    assert ref_count(db, image) == 2
+
+    db.refresh(appliance)  # routes edit rows they have loaded
+    appliance.detail_image = None
+    db.commit()
+    assert ref_count(db, image) == 1
+    assert store.collect() == 0
+
+    db.delete(appliance)
+    db.commit()
+    assert ref_count(db, image) == 0
+    assert store.collect() == 1
+    assert ref_count(db, image) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_discard_removes_only_an_unused_image(store, tmp_path):
+    image = store.store(photo())
+    reused = store.store(photo())  # another request picked the same blob up meanwhile
+    store.discard(image)
+    assert os.listdir(tmp_path) == [image.filename]
+
+    store.discard(reused)
+    assert os.listdir(tmp_path) == []
+
+
+def test_delete_in_batches_reports_each_batch(store):
+    for n in range(5):
+        store.store(photo(b"image %d" % n))
+    batches = []
+
+    deleted = delete_in_batches(engine, ImageBlob.sha256, (ImageBlob.ref_count <= 0,), 2,
+                                returning=(ImageBlob.filename,), on_deleted=batches.append)
+
+    assert deleted == 5
+    assert [len(rows) for rows in batches] == [2, 2, 1]
+    assert all(filename.endswith(".png") for rows in batches for _, filename in rows)
@@ -0,0 +1,40 @@
+# tests/test_indexes.py
+#
+# The hot listing queries have an index to use (the same check as
+# benchmarks/explain_hot_queries.py, on the test schema): SQLite's plan must not
+# contain a full table scan.
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from app import crud
+from app.database import engine
+from app.models import ActivityLog, Appliance, Floor, Issue, IssueStatus, Property, TenantQuery, User
+
+HOT_QUERIES = {
+    "owner properties": lambda db: db.query(Property).filter(Property.owner_id == 1),
+    "manager properties": lambda db: db.query(Property).filter(Property.manager_id == 1),
+    "activity feed": lambda db: db.query(ActivityLog).filter(ActivityLog.owner_id == 1)
+        .order_by(ActivityLog.timestamp.desc(), ActivityLog.id.desc()).limit(21),
+    "activity retention batch": lambda db: db.query(ActivityLog.id)
+        .filter(ActivityLog.timestamp < datetime(2020, 1, 1) - timedelta(days=90))
+        .order_by(ActivityLog.timestamp, ActivityLog.id).limit(1000),
+    "tenant appliances": lambda db: db.query(Appliance).filter(Appliance.property_id == 1, Appliance.floor_id == 1),
+    "warranty alerts": lambda db: crud._warranty_alert_query(db, [Appliance.id], owner_id=1)
+        .order_by(Appliance.warranty_expiry, Appliance.id).limit(50),
+    "floors of a property": lambda db: db.query(Floor).filter(Floor.property_id == 1).order_by(Floor.floor_number),
+    "unassigned tenants": lambda db: db.query(User).filter(User.role == "tenant", User.property_id.is_(None)),
+    "vendor issues": lambda db: db.query(Issue).filter(Issue.vendor_id == 1, Issue.status == IssueStatus.assigned),
+    "tenant queries": lambda db: db.query(TenantQuery).filter(TenantQuery.reported_by_id == 1),
+}
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_an_index(db, name):
+    if engine.dialect.name != "sqlite":
+        pytest.skip("plan check is written for SQLite")
+    query = HOT_QUERIES[name](db)
+    sql = str(query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    plan = [row[-1] for row in db.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    assert not [line for line in plan if line.startswith("SCAN ") and " INDEX " not in line], plan
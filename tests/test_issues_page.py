@@ -0,0 +1,52 @@
+# tests/test_issues_page.py
+#
+# The manager issue list is keyset-paged by id (crud.get_issues_page) instead of
+# loading every issue ever raised.
+import pytest
+
+from app import crud
+from app.models import Issue
+
+
+@pytest.fixture
+def make_issues(db, make_user, make_property):
+    def make(count):
+        tenant = make_user("tenant")
+        property_obj = make_property(make_user("owner"))
+        issues = [Issue(description=f"Issue {n}", tenant_id=tenant.id, property_id=property_obj.id)
+                  for n in range(count)]
+        db.add_all(issues)
+        db.commit()
+        return [issue.id for issue in issues]
+    return make
+
+
+def test_pages_follow_the_cursor_without_gaps_or_repeats(db, make_issues):
+    ids = make_issues(7)
+    seen, cursor = [], ids[0] - 1
+    while cursor is not None:
+        page, cursor = crud.get_issues_page(db, cursor=cursor, limit=3)
+        assert len(page) <= 3
+        seen.extend(issue.id for issue in page)
+    assert seen[:len(ids)] == ids
+
+
+def test_page_loads_its_relations(db, make_issues):
+    first = make_issues(1)[0]
+    [issue], _ = crud.get_issues_page(db, cursor=first - 1, limit=1)
+    db.expunge_all()  # relations must already be loaded
+    assert issue.property.id == issue.property_id
+    assert issue.tenant.role == "tenant"
+
+
+def test_manager_issues_links_the_next_page(make_user, make_issues, client_for):
+    ids = make_issues(crud.ISSUE_PAGE_SIZE + 1)
+    client = client_for(make_user("manager"))
+
+    first = client.get("/manager/issues", params={"cursor": ids[0] - 1})
+    assert first.status_code == 200
+    assert f"/manager/issues?cursor={ids[crud.ISSUE_PAGE_SIZE - 1]}" in first.text
+
+    last = client.get("/manager/issues", params={"cursor": ids[crud.ISSUE_PAGE_SIZE - 1]})
+    assert "Issue 50" in last.text
+    assert "Issue 49" not in last.text
@@ -0,0 +1,55 @@
+# tests/test_otp_store.py
+#
+# One-time codes (app.otp_store), for both stores: a code works once, only for
+# its purpose and before it expires, and a new code replaces the old one.
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import engine
+from app.otp_store import LOGIN, RESET_PASSWORD, DatabaseOtpStore, MemoryOtpStore
+
+NOW = datetime(2030, 1, 1, 12, 0)
+
+
+@pytest.fixture(params=["memory", "database"])
+def store(request):
+    store = MemoryOtpStore() if request.param == "memory" else DatabaseOtpStore(bind=engine)
+    store.clear()
+    yield store
+    store.clear()
+
+
+def test_code_is_single_use(store):
+    store.issue("Ann@Example.com ", LOGIN, "123456", NOW + timedelta(minutes=10))
+    assert not store.consume("ann@example.com", LOGIN, "000000", NOW)
+    assert store.consume("ann@example.com", LOGIN, "123456", NOW)
+    assert not store.consume("ann@example.com", LOGIN, "123456", NOW)
+
+
+def test_expired_code_is_refused(store):
+    store.issue("ben@example.com", LOGIN, "123456", NOW)
+    assert not store.consume("ben@example.com", LOGIN, "123456", NOW)
+
+
+def test_code_only_works_for_its_purpose(store):
+    store.issue("cat@example.com", RESET_PASSWORD, "123456", NOW + timedelta(minutes=10))
+    assert not store.consume("cat@example.com", LOGIN, "123456", NOW)
+    assert store.consume("cat@example.com", RESET_PASSWORD, "123456", NOW)
+
+
+def test_new_code_replaces_the_old_one(store):
+    store.issue("dan@example.com", LOGIN, "111111", NOW + timedelta(minutes=10))
+    store.issue("dan@example.com", LOGIN, "222222", NOW + timedelta(minutes=10))
+    assert not store.consume("dan@example.com", LOGIN, "111111", NOW)
+    assert store.consume("dan@example.com", LOGIN, "222222", NOW)
+
+
+def test_sweep_deletes_expired_codes_in_batches(store):
+    for n in range(5):
+        store.issue(f"old{n}@example.com", LOGIN, "123456", NOW - timedelta(minutes=1))
+    store.issue("live@example.com", LOGIN, "123456", NOW + timedelta(minutes=10))
+
+    assert store.sweep(NOW, batch_size=2) == 5
+    assert store.sweep(NOW, batch_size=2) == 0
+    assert store.consume("live@example.com", LOGIN, "123456", NOW)
@@ -0,0 +1,43 @@
+# tests/test_password_pool.py
+#
+# app.password_pool caps in-flight bcrypt work; past the cap callers get a 503
+# with Retry-After instead of queueing behind a login burst.
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from app.password_pool import PasswordPool, _hash, _verify
+
+
+@pytest.fixture
+def pool():
+    # A thread executor stands in for the process pool, so a job can be held open
+    pool = PasswordPool(workers=1, max_queue=1)
+    pool._executor = ThreadPoolExecutor(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_saturated_pool_answers_503_with_retry_after(pool):
+    release = threading.Event()
+    running = [pool._submit(release.wait) for _ in range(pool.capacity)]
+
+    with pytest.raises(HTTPException) as error:
+        pool.run(_hash, "password")
+    assert error.value.status_code == 503
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    for future in running:
+        future.result()
+    assert pool.stats()["in_flight"] == 0
+    assert pool.run(_verify, "password", pool.run(_hash, "password"))
+
+
+def test_zero_workers_hash_inline():
+    pool = PasswordPool(workers=0, max_queue=0)
+    assert pool.run(_verify, "password", pool.run(_hash, "password"))
+    assert pool._executor is None
@@ -0,0 +1,44 @@
+# tests/test_portfolio.py
+#
+# The synthetic dataset generator (benchmarks.portfolio) on its own SQLite file:
+# row counts, consistent foreign keys, appending a second run, and dashboard
+# snapshots that agree with the rows written.
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app.models import ActivityLog, Appliance, DashboardSnapshot, Floor, Issue, Property, TenantQuery, User
+from benchmarks.portfolio import generate_portfolio
+
+SMALL = dict(owners=3, managers=2, vendors=2, properties_per_owner=2, floors_per_property=2, appliances=40,
+             tenants_per_floor=1, issues=10, queries=5, logs_per_owner=4)
+
+
+def test_generated_rows_are_consistent(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/portfolio.db")
+    Base.metadata.create_all(bind=bind)
+    try:
+        counts = generate_portfolio(bind, **SMALL)
+        again = generate_portfolio(bind, seed=7, **SMALL)  # appended after the existing ids
+
+        with Session(bind) as db:
+            for model, table in ((User, "users"), (Property, "properties"), (Floor, "floors"),
+                                 (Appliance, "appliances"), (Issue, "issues"), (TenantQuery, "tenant_queries"),
+                                 (ActivityLog, "activity_logs")):
+                assert db.query(model).count() == counts[table] + again[table], table
+            assert counts["properties"] == 3 * 2 and counts["floors"] == 3 * 2 * 2
+            assert counts["appliances"] == 40
+
+            misplaced = (db.query(Appliance).join(Floor, Floor.id == Appliance.floor_id)
+                         .filter(Floor.property_id != Appliance.property_id).count())
+            assert misplaced == 0
+            assert db.query(Property).join(User, User.id == Property.owner_id).filter(User.role != "owner").count() == 0
+
+            snapshot = db.query(DashboardSnapshot).join(User, User.id == DashboardSnapshot.user_id) \
+                .filter(User.role == "owner").order_by(DashboardSnapshot.user_id).first()
+            owned = db.query(func.count(Appliance.id)).join(Property, Property.id == Appliance.property_id) \
+                .filter(Property.owner_id == snapshot.user_id).scalar()
+            assert snapshot.total_properties_count == 2
+            assert snapshot.total_appliance_count == owned
+    finally:
+        bind.dispose()
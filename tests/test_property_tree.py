@@ -0,0 +1,57 @@
+# tests/test_property_tree.py
+#
+# The lazily loaded /view_properties tree: keyset-paged properties, floors and
+# appliances under /api, each limited to the owner's own portfolio.
+from datetime import date
+
+
+def walk(client, path, key):
+    items, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        page = client.get(path, params=params).json()
+        items.extend(page[key])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_tree_pages_through_properties_floors_and_appliances(make_user, make_property, client_for):
+    owner = make_user("owner")
+    properties = [make_property(owner, floors=3, appliances=3) for _ in range(5)]
+    make_property(make_user("owner"), floors=2)  # someone else's
+    client = client_for(owner)
+
+    listed = walk(client, "/api/properties", "properties")
+    assert [p["id"] for p in listed] == [p.id for p in properties]
+    assert listed[0]["floors_count"] == 3
+    assert listed[0]["appliances_count"] == 9
+
+    floors = walk(client, f"/api/properties/{properties[0].id}/floors", "floors")
+    assert [f["floor_number"] for f in floors] == ["0", "1", "2"]
+    assert all(f["appliances_count"] == 3 for f in floors)
+
+    appliances = walk(client, f"/api/floors/{floors[0]['id']}/appliances", "appliances")
+    assert len(appliances) == 3
+    assert len({a["id"] for a in appliances}) == 3
+
+
+def test_other_owners_branches_are_404(make_user, make_property, client_for):
+    other = make_property(make_user("owner"), floors=1, appliances=1)
+    client = client_for(make_user("owner"))
+
+    assert client.get(f"/api/properties/{other.id}/floors").status_code == 404
+    assert client.get(f"/api/floors/{other.floors[0].id}/appliances").status_code == 404
+
+
+def test_tree_is_owner_only(make_user, client_for):
+    assert client_for(make_user("manager")).get("/api/properties").status_code == 403
+
+
+def test_appliance_nodes_carry_the_display_date(make_user, make_property, client_for):
+    owner = make_user("owner")
+    floor = make_property(owner, appliances=1, warranty_expiry=date(2027, 3, 4)).floors[0]
+
+    [appliance] = client_for(owner).get(f"/api/floors/{floor.id}/appliances").json()["appliances"]
+    assert appliance["warranty_expiry"] == "2027-03-04"
+    assert appliance["warranty_expiry_label"] == "Mar 04, 2027"
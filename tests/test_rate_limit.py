@@ -0,0 +1,64 @@
+# tests/test_rate_limit.py
+#
+# Token buckets on the auth endpoints (app.rate_limit): 429 + Retry-After once a
+# bucket is empty, and a refused request charges neither its IP nor its account.
+import pytest
+from fastapi.testclient import TestClient
+
+from app import rate_limit
+from app.database import engine
+from app.rate_limit import DatabaseBucketStore, MemoryBucketStore, RateLimiter
+
+LIMITS = {"login": {"ip": (3, 3 / 60), "account": (2, 2 / 60)}, "verify_otp": {"ip": (10, 1), "account": (2, 2 / 60)}}
+
+
+@pytest.fixture
+def limited(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "rate_limiter", RateLimiter(MemoryBucketStore(), LIMITS))
+    from app.main import app
+    return TestClient(app)
+
+
+def login(client, username):
+    return client.post("/login", data={"username": username, "password": "wrong"}, follow_redirects=False)
+
+
+def test_empty_account_bucket_answers_429_with_retry_after(limited):
+    assert all(login(limited, "alice").status_code != 429 for _ in range(2))
+    refused = login(limited, "Alice ")  # same account bucket, whatever the case and spacing
+    assert refused.status_code == 429
+    assert 1 <= int(refused.headers["Retry-After"]) <= 30
+
+
+def test_refused_requests_do_not_drain_the_ip_bucket(limited):
+    for _ in range(2):
+        login(limited, "bob")
+    for _ in range(5):
+        assert login(limited, "bob").status_code == 429
+
+    # The IP bucket paid for two requests only, so it still has one left
+    assert login(limited, "carol").status_code != 429
+    assert login(limited, "dave").status_code == 429
+
+
+def test_verify_otp_is_limited_per_account(limited):
+    codes = [limited.post("/verify_otp", data={"email": "eve@example.com", "otp": str(n)}).status_code
+             for n in range(3)]
+    assert codes[0] != 429 and codes[1] != 429
+    assert codes[2] == 429
+    assert limited.post("/login_verify_otp", data={"email": "EVE@example.com", "otp": "1"}).status_code == 429
+
+
+@pytest.mark.parametrize("store", [MemoryBucketStore, lambda: DatabaseBucketStore(bind=engine)])
+def test_buckets_refill_over_time(store):
+    store = store()
+    store.clear()
+    limiter = RateLimiter(store, {"login": {"ip": (2, 1.0), "account": (1, 0.5)}})
+    identities = [("ip", "10.0.0.1"), ("account", "frank")]
+
+    assert limiter.take("login", identities, now=100.0) == 0
+    assert limiter.take("login", identities, now=100.0) == pytest.approx(2.0)
+    assert limiter.take("login", [("ip", "10.0.0.1"), ("account", "grace")], now=100.0) == 0
+    assert limiter.take("login", identities, now=102.0) == 0
+    store.clear()
@@ -0,0 +1,58 @@
+# tests/test_read_routing.py
+#
+# get_read_db: reads go to the replica session factory unless a recent write
+# pinned the browser session to the primary (read-your-writes).
+import pytest
+from starlette.requests import Request
+
+from app import database
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    """Stand-in replica factory, so the test can tell which one served a read."""
+    opened = []
+
+    def factory():
+        session = database.SessionLocal()
+        opened.append(session)
+        return session
+
+    monkeypatch.setattr(database, "ReadSessionLocal", factory)
+    return opened
+
+
+def request_with_session(session: dict) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": [], "session": session})
+
+
+def read_once(request):
+    dependency = database.get_read_db(request)
+    session = next(dependency)
+    dependency.close()
+    return session
+
+
+def test_reads_use_the_replica_by_default(replica):
+    session = read_once(request_with_session({}))
+    assert replica == [session]
+
+
+def test_a_write_pins_the_next_reads_to_the_primary(replica):
+    session = {}
+    request = request_with_session(session)
+    database.pin_reads_to_primary(request)
+    assert session[database.READ_PIN_SESSION_KEY] == database.READ_YOUR_WRITES_REQUESTS
+
+    for _ in range(database.READ_YOUR_WRITES_REQUESTS):
+        read_once(request)
+    assert replica == []
+    assert database.READ_PIN_SESSION_KEY not in session
+
+    read_once(request)
+    assert len(replica) == 1
+
+
+def test_requests_without_a_session_use_the_replica(replica):
+    read_once(Request({"type": "http", "method": "GET", "path": "/", "headers": []}))
+    assert len(replica) == 1
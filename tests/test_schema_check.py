@@ -0,0 +1,58 @@
+# tests/test_schema_check.py
+#
+# Startup without create_all (app.schema_check): the migration head is read from
+# the revision files and compared with alembic_version, and importing the app
+# leaves the OCR libraries unloaded.
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.schema_check import SchemaOutOfDate, alembic_heads, check_schema_is_current, database_revisions
+
+
+def write_revision(directory, revision, down_revision):
+    (directory / f"{revision}_change.py").write_text(
+        f'"""change"""\n'
+        f"revision: str = '{revision}'\n"
+        f"down_revision: Union[str, Sequence[str], None] = {down_revision!r}\n",
+        encoding="utf-8",
+    )
+
+
+def test_heads_follow_the_down_revision_chain(tmp_path):
+    write_revision(tmp_path, "aaa", None)
+    write_revision(tmp_path, "bbb", "aaa")
+    write_revision(tmp_path, "ccc", "aaa")
+    assert alembic_heads(tmp_path) == {"bbb", "ccc"}
+
+    write_revision(tmp_path, "ddd", ("bbb", "ccc"))  # merge revision
+    assert alembic_heads(tmp_path) == {"ddd"}
+
+
+def test_repository_has_a_single_head():
+    assert len(alembic_heads()) == 1
+
+
+def test_check_needs_the_database_stamped_at_head(tmp_path):
+    bind = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    assert database_revisions(bind) == set()
+    with pytest.raises(SchemaOutOfDate):
+        check_schema_is_current(bind)
+
+    [head] = alembic_heads()
+    with bind.begin() as conn:
+        conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        conn.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+    check_schema_is_current(bind)
+    bind.dispose()
+
+
+def test_importing_the_app_does_not_load_ocr(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path}/boot.db")
+    code = "import sys, app.main; print(any(m in sys.modules for m in ('pytesseract', 'PIL.Image')))"
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,55 @@
+# tests/test_tenant_import.py
+#
+# Bulk tenant invites (app.tenant_import): emails are matched case-insensitively
+# against the file itself, existing users and pending invites.
+import io
+import json
+
+from fastapi import UploadFile
+
+from app.models import EmailOutbox, PendingTenant
+from app.tenant_import import import_tenants
+
+
+def upload(text, filename="tenants.csv"):
+    return UploadFile(file=io.BytesIO(text.encode()), filename=filename)
+
+
+def test_existing_and_repeated_emails_are_skipped_whatever_their_case(db, make_user, make_property):
+    owner = make_user("owner")
+    property_obj = make_property(owner)
+    make_user("tenant", email="Taken.User@Example.com")
+    db.add(PendingTenant(name="Invited", email="Already.Invited@example.com", property_id=property_obj.id))
+    db.commit()
+
+    job = import_tenants(db, owner.id, upload(
+        "Name,Email,Flat_No\n"
+        "Ann,ann.new@example.com,1A\n"
+        "Ann again,ANN.NEW@example.com,1A\n"
+        "Taken,taken.user@EXAMPLE.com,2B\n"
+        "Invited,already.invited@example.com,3C\n"
+        "No email,,4D\n"
+    ), default_property_id=property_obj.id)
+
+    assert job.status == "completed"
+    assert (job.total_rows, job.invited, job.duplicates, job.skipped_existing, job.invalid) == (5, 1, 1, 2, 1)
+    assert json.loads(job.errors) == [{"row": 6, "error": "email is missing or invalid"}]
+    invite = db.query(PendingTenant).filter(PendingTenant.email == "ann.new@example.com").one()
+    assert invite.flat_no == "1A"
+    assert db.query(EmailOutbox).filter(EmailOutbox.batch_key == f"tenant_import:{job.id}").count() == 1
+
+
+def test_rows_must_name_one_of_the_owners_properties(db, make_user, make_property):
+    owner = make_user("owner")
+    mine = make_property(owner)
+    theirs = make_property(make_user("owner"))
+
+    job = import_tenants(db, owner.id, upload(
+        json.dumps({"name": "Bo", "email": "bo@example.com", "property_id": mine.id}) + "\n"
+        + json.dumps({"name": "Cy", "email": "cy@example.com", "property_id": theirs.id}) + "\n"
+        + "not json\n",
+        filename="tenants.jsonl",
+    ))
+
+    assert (job.invited, job.invalid) == (1, 2)
+    assert [error["row"] for error in json.loads(job.errors)] == [2, 3]
@@ -0,0 +1,86 @@
+# tests/test_tokens.py
+#
+# Bearer tokens (app.auth, app.routes.token_routes): short-lived access tokens
+# verified without a DB read, refresh tokens revoked by a password change, and
+# scopes per role.
+import pytest
+from fastapi.testclient import TestClient
+
+from app import auth, crud
+from app.utils import hash_password
+
+PASSWORD = "password"  # what the make_user fixture sets
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    return TestClient(app)
+
+
+def issue(client, user, password=PASSWORD):
+    return client.post("/api/token", data={"username": user.username, "password": password})
+
+
+def bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_access_token_authenticates_json_routes(client, make_user, make_property):
+    owner = make_user("owner")
+    make_property(owner)
+    tokens = issue(client, owner).json()
+
+    assert tokens["token_type"] == "bearer"
+    response = client.get("/api/properties", headers=bearer(tokens["access_token"]))
+    assert response.status_code == 200
+    assert len(response.json()["properties"]) == 1
+
+
+def test_wrong_password_is_401(client, make_user):
+    assert issue(client, make_user("owner"), password="nope").status_code == 401
+
+
+def test_refresh_returns_a_new_pair_with_the_current_role(client, db, make_user):
+    user = make_user("tenant")
+    refresh_token = issue(client, user).json()["refresh_token"]
+    crud.update_user(db, user, role="manager")
+
+    response = client.post("/api/token/refresh", data={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    claims = auth.decode_token(response.json()["access_token"])
+    assert claims["role"] == "manager"
+    assert "issues:read" in claims["scope"].split()
+
+
+def test_password_change_revokes_refresh_tokens(client, db, make_user):
+    user = make_user("owner")
+    refresh_token = issue(client, user).json()["refresh_token"]
+    crud.update_user(db, user, password_hash=hash_password("new password"))
+
+    response = client.post("/api/token/refresh", data={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token revoked"
+
+
+def test_tokens_are_only_accepted_as_their_own_type(client, make_user):
+    tokens = issue(client, make_user("owner")).json()
+    assert client.post("/api/token/refresh", data={"refresh_token": tokens["access_token"]}).status_code == 401
+    assert client.get("/api/properties", headers=bearer(tokens["refresh_token"])).status_code == 401
+    assert client.get("/api/properties", headers=bearer("not-a-jwt")).status_code == 401
+
+
+def test_token_without_the_scope_is_403(client, make_user):
+    access_token = issue(client, make_user("vendor")).json()["access_token"]
+    response = client.get("/api/properties", headers=bearer(access_token))
+    assert response.status_code == 403
+    assert response.headers["WWW-Authenticate"] == 'Bearer scope="properties:read"'
+
+
+def test_bearer_auth_is_off_without_a_signing_key(client, make_user, monkeypatch):
+    owner = make_user("owner")
+    access_token = issue(client, owner).json()["access_token"]
+    monkeypatch.setattr(auth, "SECRET_KEY", None)
+
+    assert issue(client, owner).status_code == 503
+    assert client.get("/api/properties", headers=bearer(access_token)).status_code == 401
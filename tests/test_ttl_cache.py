@@ -0,0 +1,76 @@
+# tests/test_ttl_cache.py
+#
+# The per-user caches (app.ttl_cache, app.principal): LRU and TTL bounds, and a
+# load that races an invalidation must not put the stale value back.
+import pytest
+
+from app import crud, ttl_cache
+from app.principal import load_principal, principal_cache
+from app.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl_seconds=10, max_entries=10)
+    cache.set("a", 1)
+    clock[0] += 10
+    assert cache.get("a") == 1
+    clock[0] += 1
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_load_that_raced_an_invalidation_is_not_stored():
+    cache = TTLCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation()
+    cache.invalidate("a")  # a write lands while the load is reading
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", cache.generation())
+    assert cache.get("a") == "fresh"
+
+
+def test_other_keys_still_store_after_an_invalidation():
+    cache = TTLCache(ttl_seconds=60, max_entries=10)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set("b", "value", generation)
+    assert cache.get("b") == "value"
+
+
+def test_forgotten_invalidations_count_as_recent():
+    cache = TTLCache(ttl_seconds=60, max_entries=1)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.invalidate("b")  # pushes "a" out of the invalidation record
+    cache.set("a", "stale", generation)
+    assert cache.get("a") is None
+
+    generation = cache.generation()
+    cache.clear()
+    cache.set("c", "stale", generation)
+    assert cache.get("c") is None
+
+
+def test_role_change_through_crud_is_seen_by_the_next_request(db, make_user):
+    user = make_user("tenant")
+    assert load_principal(db, user.id).role == "tenant"
+    assert principal_cache.get(user.id) is not None
+
+    crud.update_user(db, user, role="manager")
+    assert load_principal(db, user.id).role == "manager"
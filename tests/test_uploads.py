@@ -0,0 +1,78 @@
+# tests/test_uploads.py
+#
+# app.uploads: files are streamed into place under a safe name, and refused by
+# extension (415) or size (413) without leaving anything behind.
+import hashlib
+import io
+import os
+import re
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app import uploads
+from app.uploads import UploadKind, discard_upload, safe_filename, save_upload
+
+
+@pytest.fixture
+def image_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(uploads.UPLOAD_KINDS, "image", UploadKind(str(tmp_path), 10, frozenset({".png"})))
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_SIZE", 4)
+    return tmp_path
+
+
+def upload(data: bytes, filename: str, size: int = None):
+    return UploadFile(file=io.BytesIO(data), filename=filename, size=size)
+
+
+def test_safe_filename_drops_paths_and_odd_characters():
+    name = safe_filename("..\\..\\etc/pass wd?.png", prefix="floor 1")
+    assert re.fullmatch(r"floor_1_[0-9a-f]{8}_pass_wd_\.png", name), name
+    assert safe_filename("../..").endswith("_upload")
+
+
+def test_saved_file_has_its_hash_and_size(image_dir):
+    stored = save_upload(upload(b"png bytes", "photo.PNG"), "image", prefix="appliance")
+    assert os.path.dirname(stored.path) == str(image_dir)
+    assert (stored.size, stored.sha256) == (9, hashlib.sha256(b"png bytes").hexdigest())
+    assert open(stored.path, "rb").read() == b"png bytes"
+
+    discard_upload(stored)
+    assert not os.path.exists(stored.path)
+
+
+def test_unsupported_extension_is_415(image_dir):
+    with pytest.raises(HTTPException) as error:
+        save_upload(upload(b"x", "script.exe"), "image")
+    assert error.value.status_code == 415
+
+
+@pytest.mark.parametrize("size", [None, 11])  # streamed past the cap / declared size over it
+def test_file_over_the_cap_is_413_and_leaves_nothing(image_dir, size):
+    with pytest.raises(HTTPException) as error:
+        save_upload(upload(b"x" * 11, "big.png", size=size), "image")
+    assert error.value.status_code == 413
+    assert os.listdir(image_dir) == []
+
+
+def test_missing_file_is_none(image_dir):
+    assert save_upload(upload(b"", ""), "image") is None
+
+
+def test_floor_plan_is_discarded_when_the_floor_cannot_be_saved(tmp_path, monkeypatch, make_user, make_property,
+                                                                client_for):
+    from app.routes import floor_routes
+
+    def failing_ocr(path):
+        assert os.path.dirname(path) == str(tmp_path) and os.path.exists(path)
+        raise RuntimeError("tesseract crashed")
+
+    monkeypatch.setitem(uploads.UPLOAD_KINDS, "floor_plan", UploadKind(str(tmp_path), 1024, frozenset({".png"})))
+    monkeypatch.setattr(floor_routes, "extract_floorplan_details", failing_ocr)
+    owner = make_user("owner")
+    property_obj = make_property(owner)
+
+    with pytest.raises(RuntimeError):
+        client_for(owner).post("/floors/add", data={"property_id": property_obj.id, "floor_name": "2"},
+                               files={"file": ("plan.png", b"png bytes", "image/png")})
+    assert os.listdir(tmp_path) == []
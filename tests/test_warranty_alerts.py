@@ -0,0 +1,64 @@
+# tests/test_warranty_alerts.py
+#
+# Keyset pagination of warranty alerts on (warranty_expiry, id), via crud and
+# /api/warranty-alerts.
+from datetime import date, timedelta
+
+from app import crud
+from app.models import Appliance
+
+
+def add_appliances(db, owner, floor, expiries):
+    for expiry in expiries:
+        db.add(Appliance(user_id=owner.id, property_id=floor.property_id, floor_id=floor.id,
+                         name="Boiler", appliance_type="Boiler", warranty_expiry=expiry))
+    db.commit()
+
+
+def test_pages_cover_the_window_once_in_expiry_order(db, make_user, make_property):
+    owner = make_user("owner")
+    floor = make_property(owner).floors[0]
+    today = date.today()
+    # Ties on the same day are broken by id; the last one is outside the 30-day window
+    expiries = [today - timedelta(days=3), today + timedelta(days=2), today + timedelta(days=2),
+                today + timedelta(days=2), today, today + timedelta(days=29), today + timedelta(days=31)]
+    add_appliances(db, owner, floor, expiries)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        alerts, cursor = crud.get_warranty_alerts(db, cursor=cursor, limit=2, owner_id=owner.id)
+        seen.extend(alerts)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert [alert["expiry"] for alert in seen] == sorted(expiries[:-1])
+    assert len({alert["appliance_id"] for alert in seen}) == 6
+    assert seen[0]["status"] == "expired"
+    assert seen[-1]["status"] == "expiring_soon"
+    assert crud.count_warranty_alerts(db, owner_id=owner.id) == 6
+    assert crud.count_warranty_alerts(db, owner_id=owner.id, include_expired=False) == 5
+
+
+def test_alerts_are_scoped_to_the_owner(db, make_user, make_property):
+    owner, other = make_user("owner"), make_user("owner")
+    add_appliances(db, other, make_property(other).floors[0], [date.today()])
+
+    assert crud.get_warranty_alerts(db, limit=10, owner_id=owner.id) == ([], None)
+
+
+def test_api_follows_the_cursor(db, make_user, make_property, client_for):
+    owner = make_user("owner")
+    add_appliances(db, owner, make_property(owner).floors[0], [date.today() + timedelta(days=i) for i in range(3)])
+    client = client_for(owner)
+
+    first = client.get("/api/warranty-alerts", params={"limit": 2}).json()
+    assert len(first["alerts"]) == 2 and first["next_cursor"]
+    second = client.get("/api/warranty-alerts", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert len(second["alerts"]) == 1 and second["next_cursor"] is None
+
+
+def test_malformed_cursor_is_400(make_user, client_for):
+    response = client_for(make_user("owner")).get("/api/warranty-alerts", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400